@@ -1,7 +1,13 @@
 import os
+import ipaddress
+import json
 import logging
 import traceback
-from aiohttp import ClientSession
+from typing import Callable
+from aiohttp import ClientSession, hdrs
+
+from metrics import metrics
+from options import get_option
 
 HA_URL = "http://supervisor/core/api"
 HA_TOKEN = os.getenv('SUPERVISOR_TOKEN')
@@ -11,28 +17,163 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def get_context(raw=False):
+# "full" or "compact" (domain-grouped, shared prefixes factored out)
+CONTEXT_FORMAT = get_option("context_format", "full")
+# Estimated tokens the compact context may use; 0 means no limit
+CONTEXT_TOKEN_BUDGET = int(get_option("context_token_budget", 0))
+
+# Per-satellite context scoping, matched by IP address or HA device_id
+DEVICE_PROFILES = get_option("device_profiles", [])
+_PROFILE_PARAMS = ("area", "neighbors", "other_area_limit", "location")
+
+# Last good response per request: (raw, profile params) -> (etag, value)
+_cached_context: dict[tuple, tuple[str, object]] = {}
+# Formatted context pushed by the component (see ha_stream.py), by profile
+# key; only filled while the stream is connected
+_streamed_context: dict[str, str] = {}
+# Called with (profile key, text) when a pushed context changes
+_context_listeners: list[Callable[[str, str], None]] = []
+
+
+def _is_ip(value: str) -> bool:
+    try:
+        ipaddress.ip_address(value)
+    except ValueError:
+        return False
+    return True
+
+
+def device_profile(client_id) -> dict[str, str] | None:
+    """
+    Query parameters scoping the context to one satellite, or None for the
+    whole-house context.
+
+    A profile's `match` is an IP address or a Home Assistant device_id; a
+    device_id (from `match` or `device_id`) lets the component place the
+    satellite in its registry area.
+    """
+    if not client_id:
+        return None
+    for profile in DEVICE_PROFILES:
+        if profile.get("match") != client_id:
+            continue
+        params = {
+            name: str(profile[name])
+            for name in _PROFILE_PARAMS
+            if profile.get(name) not in (None, "")
+        }
+        device_id = profile.get("device_id") or (None if _is_ip(client_id) else client_id)
+        if device_id:
+            params["device_id"] = device_id
+        return params
+    return None
+
+
+def profile_key(profile: dict[str, str] | None) -> str:
+    """Stable key for a device profile; "default" is the whole house."""
+    if not profile:
+        return "default"
+    return json.dumps(profile, sort_keys=True)
+
+
+def streamed_profiles() -> list[dict[str, str]]:
+    """The configured device profiles, as subscription parameters."""
+    profiles = {}
+    for entry in DEVICE_PROFILES:
+        params = device_profile(entry.get("match"))
+        if params:
+            profiles[profile_key(params)] = params
+    return [{"key": key, **params} for key, params in profiles.items()]
+
+
+def add_context_listener(listener: Callable[[str, str], None]) -> Callable[[], None]:
+    """Calls `listener(key, text)` on each pushed context change; returns a remover."""
+    _context_listeners.append(listener)
+    return lambda: _context_listeners.remove(listener)
+
+
+def set_streamed_context(key: str, text: str):
+    previous = _streamed_context.get(key)
+    _streamed_context[key] = text
+    if text == previous:
+        return
+    for listener in list(_context_listeners):
+        try:
+            listener(key, text)
+        except Exception as e:
+            logger.error("Context listener failed: %s", e)
+
+
+def clear_streamed_context():
+    """Forgets pushed context; get_context goes back to HTTP."""
+    _streamed_context.clear()
+
+
+def _record_size(headers):
+    """Publishes the context size the component reports."""
+    for name in ("chars", "tokens", "entities", "dropped"):
+        value = headers.get(f"X-Context-{name.title()}")
+        if value is not None:
+            metrics.gauge(f"context.{name}").set(int(value))
+
+
+async def get_context(raw=False, profile: dict[str, str] | None = None):
     """
     Fetches entity data (raw) or pre-formatted context string from the Home Assistant component.
+
+    `profile` (see device_profile) scopes the formatted context to one
+    satellite. While the push stream is connected, the formatted context is
+    served from memory. Otherwise the last response is kept locally and
+    revalidated with If-None-Match, so an unchanged context costs a 304
+    instead of the full body.
     """
+    if not raw:
+        # Kept current by the component's push stream; no round trip
+        streamed = _streamed_context.get(profile_key(profile))
+        if streamed is not None:
+            metrics.counter("context.streamed").inc()
+            return streamed
+
     url = f"{HA_URL}/gemini_live/entities"
     headers = {
         "Authorization": f"Bearer {HA_TOKEN}",
         "Content-Type": "application/json" if raw else "text/plain",
     }
+    params = {}
+    if not raw:
+        params["format"] = CONTEXT_FORMAT
+        if CONTEXT_TOKEN_BUDGET:
+            params["token_budget"] = str(CONTEXT_TOKEN_BUDGET)
+        params.update(profile or {})
+    cache_key = (raw, tuple(sorted(params.items())))
+    cached = _cached_context.get(cache_key)
+    if cached:
+        headers[hdrs.IF_NONE_MATCH] = cached[0]
 
     try:
         async with ClientSession() as session:
-            async with session.post(url, headers=headers) as resp:
+            async with session.post(url, headers=headers, params=params) as resp:
+                if not raw:
+                    _record_size(resp.headers)
+                if resp.status == 304 and cached:
+                    metrics.counter("context.not_modified").inc()
+                    return cached[1]
                 if resp.status == 200:
+                    metrics.counter("context.fetched").inc()
+                    etag = resp.headers.get(hdrs.ETAG)
                     if raw:
                         data = await resp.json()
                         if data.get("success"):
+                            if etag:
+                                _cached_context[cache_key] = (etag, data)
                             return data
                         else:
                             logger.error(f"API Error fetching raw entities: {data.get('error')}")
                     else:
-                        return await resp.text() # Return the pre-formatted string directly
+                        text = await resp.text() # Return the pre-formatted string directly
+                        if etag:
+                            _cached_context[cache_key] = (etag, text)
+                        return text
                 else:
                     logger.error(f"Failed to fetch context: {resp.status} {await resp.text()}")
     except Exception as e:
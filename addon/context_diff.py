@@ -0,0 +1,76 @@
+"""
+Compact diffs between two versions of the formatted context.
+
+Both context formats are a fixed instruction header followed by blocks that
+start with an "Area: ..." line, so a diff lists the lines added to and
+removed from each area. A changed header can't be expressed as a delta.
+"""
+
+AREA_PREFIX = "Area: "
+DIFF_HEADER = (
+    "CONTEXT UPDATE: The home changed since your instructions were written. "
+    "Apply these changes to the device and entity list; lines starting with "
+    "'-' were removed and lines starting with '+' were added."
+)
+
+
+def split_context(text: str) -> tuple[str, dict[str, list[str]]]:
+    """Splits a context into its header and {area heading: lines}."""
+    lines = text.split("\n")
+    header_end = next(
+        (i for i, line in enumerate(lines) if line.startswith(AREA_PREFIX)), len(lines)
+    )
+    areas: dict[str, list[str]] = {}
+    current = ""
+    for line in lines[header_end:]:
+        if line.startswith(AREA_PREFIX):
+            current = line[len(AREA_PREFIX) :]
+            areas.setdefault(current, [])
+        elif line.strip():
+            # Lines after a blank line that aren't in an area (e.g. the
+            # omitted-entities note) are grouped under ""
+            if not line.startswith(" "):
+                current = ""
+            areas.setdefault(current, []).append(line.strip())
+    return "\n".join(lines[:header_end]), areas
+
+
+def _item(line: str) -> str:
+    """A context line without its "- " bullet, so it can take a diff marker."""
+    return line[2:] if line.startswith("- ") else line
+
+
+def diff_context(old: str, new: str) -> str | None:
+    """
+    A delta that turns `old` into `new` for a model that has seen `old`:
+    "" when nothing changed, None when only a full reload can express it.
+    """
+    if old == new:
+        return ""
+    old_header, old_areas = split_context(old)
+    new_header, new_areas = split_context(new)
+    if old_header != new_header:
+        return None
+
+    out = []
+    for area in sorted(old_areas.keys() | new_areas.keys()):
+        old_lines = old_areas.get(area, [])
+        new_lines = new_areas.get(area, [])
+        old_set, new_set = set(old_lines), set(new_lines)
+        removed = [line for line in old_lines if line not in new_set]
+        added = [line for line in new_lines if line not in old_set]
+        if not removed and not added:
+            continue
+        heading = f"{AREA_PREFIX}{area}" if area else "Notes:"
+        if area and area not in new_areas:
+            heading += " (removed)"
+        elif area and area not in old_areas:
+            heading += " (new)"
+        out.append(heading)
+        out.extend(f"- {_item(line)}" for line in removed)
+        out.extend(f"+ {_item(line)}" for line in added)
+
+    if not out:
+        # Only ordering changed; nothing the model needs to know
+        return ""
+    return "\n".join([DIFF_HEADER, *out])
@@ -0,0 +1,111 @@
+"""
+Live operations view: a WebSocket that streams a snapshot of every session
+once a second.
+
+Sessions only bump counters (see session_stats.py); rates, queue depths and
+CPU shares are derived here, once per interval, and only while someone is
+watching. Viewers that come through ingress also get the conversation
+turns finished since the previous snapshot (see transcripts.py).
+"""
+import asyncio
+import json
+import logging
+import time
+
+from aiohttp import web
+
+from loop_monitor import loop_monitor
+from metrics import metrics
+from transcripts import transcripts
+from web import from_ingress
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_INTERVAL_SECONDS = 1.0
+
+
+class Dashboard:
+    def __init__(self, proxy):
+        self.proxy = proxy
+        # Viewer -> whether it came through ingress and may see transcripts
+        self.viewers: dict[web.WebSocketResponse, bool] = {}
+        self._task: asyncio.Task | None = None
+        self._cpu_sampled = (time.monotonic(), time.process_time())
+        # The last transcript turn sent to viewers
+        self._transcript_seq = transcripts.seq
+
+    async def websocket_handler(self, request: web.Request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        self.viewers[ws] = from_ingress(request)
+        if self._task is None:
+            self._task = asyncio.create_task(self._broadcast_task())
+        try:
+            # Viewers only listen; wait for them to go away
+            async for _ in ws:
+                pass
+        finally:
+            self.viewers.pop(ws, None)
+        return ws
+
+    async def _broadcast_task(self):
+        try:
+            while self.viewers:
+                snapshot = self.snapshot()
+                turns = self._new_turns()
+                payload = json.dumps(snapshot)
+                trusted_payload = (
+                    json.dumps({**snapshot, "transcripts": turns})
+                    if any(self.viewers.values())
+                    else payload
+                )
+                for ws, trusted in list(self.viewers.items()):
+                    try:
+                        await ws.send_str(trusted_payload if trusted else payload)
+                    except Exception as e:
+                        logger.debug("Dropping dashboard viewer: %s", e)
+                        self.viewers.pop(ws, None)
+                await asyncio.sleep(DASHBOARD_INTERVAL_SECONDS)
+        finally:
+            self._task = None
+
+    def _process_cpu(self) -> float:
+        """Whole-process CPU since the last sample, as a percentage of one core."""
+        now, cpu = time.monotonic(), time.process_time()
+        sampled_at, sampled_cpu = self._cpu_sampled
+        self._cpu_sampled = (now, cpu)
+        return round((cpu - sampled_cpu) * 100 / max(now - sampled_at, 1e-6), 1)
+
+    def _new_turns(self) -> list[dict]:
+        turns = transcripts.since(self._transcript_seq)
+        self._transcript_seq = transcripts.seq
+        return turns
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        sessions = []
+        for session in list(self.proxy.sessions.values()):
+            link = self.proxy.links.get(session.address)
+            sessions.append(
+                {
+                    "id": session.id,
+                    "mode": session.mode,
+                    "input_rate": session.input_rate,
+                    "age_s": round(now - session.started_at, 1),
+                    "ai_speaking": session.ai_is_speaking,
+                    "connections": session.connections,
+                    "mic_queue": session.audio_queue_mic.qsize(),
+                    "speaker_queue": session.audio_queue_speaker.qsize(),
+                    **session.stats.sample(),
+                    "playback": session.playback,
+                    "framing": link.stats() if link else None,
+                }
+            )
+        return {
+            "time": time.time(),
+            "process_cpu_pct": self._process_cpu(),
+            "web_clients": len(self.proxy.web_clients),
+            "sessions": sessions,
+            "loop": loop_monitor.snapshot(),
+            "metrics": metrics.snapshot(),
+        }
@@ -0,0 +1,174 @@
+"""
+Speculative fast path for simple device commands.
+
+When a completed user transcript matches a small grammar of on/off and
+brightness commands for a single, unambiguous entity, the intent is fired
+right away instead of waiting for the model's tool call. The model's
+matching call is then answered from the already-running result.
+"""
+import asyncio
+import logging
+import re
+import time
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Only domains where a wrong guess is harmless and easy to undo
+FAST_PATH_DOMAINS = {"light", "switch", "fan"}
+BRIGHTNESS_DOMAINS = {"light"}
+
+# A speculation the model has not claimed by then is counted as a mismatch
+SPECULATION_WINDOW_SECONDS = 8.0
+# Don't speculate on the same entity twice within this window
+ENTITY_COOLDOWN_SECONDS = 3.0
+# Disable the fast path for the session if it keeps guessing wrong
+MAX_MISMATCH_RATE = 0.2
+MIN_SAMPLES_FOR_DISABLE = 10
+
+_FILLER = r"(?:please\s+)?(?:can you\s+|could you\s+)?"
+_TARGET = r"(?:the\s+)?(?P<name>[\w' -]+?)"
+_END = r"(?:\s+please)?[.!]?$"
+
+GRAMMAR = [
+    re.compile(rf"^{_FILLER}(?:turn|switch)\s+(?P<state>on|off)\s+{_TARGET}{_END}"),
+    re.compile(rf"^{_FILLER}(?:turn|switch)\s+{_TARGET}\s+(?P<state>on|off){_END}"),
+    re.compile(
+        rf"^{_FILLER}(?:set|dim)\s+{_TARGET}(?:\s+brightness)?\s+to\s+"
+        rf"(?P<brightness>\d{{1,3}})\s*(?:%|percent)?{_END}"
+    ),
+]
+
+# Words that make a command conditional or negated; never speculate on these
+_UNSAFE_WORDS = re.compile(r"\b(?:don't|do not|not|never|if|when|after|before|unless|and|all)\b")
+
+
+class _Speculation:
+    __slots__ = ("key", "task", "created_at")
+
+    def __init__(self, key, task):
+        self.key = key
+        self.task = task
+        self.created_at = time.monotonic()
+
+
+class FastPath:
+    """Per-session speculative executor fed by input transcription."""
+
+    def __init__(self, ha_client):
+        self.ha = ha_client
+        self.enabled = True
+        self._pending: dict[tuple, _Speculation] = {}
+        self._last_fired: dict[str, float] = {}
+        self._attempts = 0
+        self._mismatches = 0
+
+        self._fired = metrics.counter("fast_path.fired")
+        self._hits = metrics.counter("fast_path.hits")
+        self._mismatch_counter = metrics.counter("fast_path.mismatches")
+
+    def match(self, transcript: str):
+        """
+        Parses a transcript into (intent_name, entity_id, brightness),
+        or returns None if it is not a safe, simple command.
+        """
+        text = " ".join(transcript.lower().split())
+        if not text or _UNSAFE_WORDS.search(text):
+            return None
+
+        for pattern in GRAMMAR:
+            m = pattern.match(text)
+            if not m:
+                continue
+
+            eid = self.ha.entities.get(m.group("name").strip())
+            if not eid:
+                return None
+            domain = eid.split(".")[0]
+
+            brightness = m.groupdict().get("brightness")
+            if brightness is not None:
+                level = int(brightness)
+                if domain not in BRIGHTNESS_DOMAINS or level > 100:
+                    return None
+                return ("HassLightSet", eid, level)
+
+            if domain not in FAST_PATH_DOMAINS:
+                return None
+            intent = "HassTurnOn" if m.group("state") == "on" else "HassTurnOff"
+            return (intent, eid, None)
+
+        return None
+
+    def on_transcript(self, transcript: str):
+        """Fires the command in a completed user transcript, if it is one."""
+        if not self.enabled:
+            return
+
+        key = self.match(transcript)
+        if key is None or key in self._pending:
+            return
+
+        intent, eid, brightness = key
+        now = time.monotonic()
+        if now - self._last_fired.get(eid, 0.0) < ENTITY_COOLDOWN_SECONDS:
+            return
+        if not self.ha.breaker.allow():
+            return
+
+        data = {"name": self.ha.entity_name_map.get(eid, eid)}
+        if brightness is not None:
+            data["brightness"] = brightness
+
+        logger.info("Fast path: speculatively firing %s for %s", intent, eid)
+        self.ha.tool_cache.invalidate_entities([eid])
+        self._last_fired[eid] = now
+        self._fired.inc()
+        self._attempts += 1
+        task = asyncio.create_task(self.ha.fire_intent(intent, data))
+        self._pending[key] = _Speculation(key, task)
+
+    def claim(self, resolved, args):
+        """
+        Returns the speculative task matching a model call, or None.
+
+        `resolved` is the call's (intent_name, data); `args` are the call's
+        prepared args, used to resolve the target entity.
+        """
+        if not self._pending or resolved is None or "area" in args:
+            return None
+
+        intent, data = resolved
+        eid = args.get("entity_id")
+        if not eid and isinstance(args.get("name"), str):
+            eid = self.ha.entities.get(args["name"].lower())
+        if not eid:
+            return None
+
+        brightness = data.get("brightness") if intent == "HassLightSet" else None
+        speculation = self._pending.pop((intent, eid, brightness), None)
+        if speculation is None:
+            return None
+
+        self._hits.inc()
+        logger.info("Fast path: answered %s for %s from speculation", intent, eid)
+        return speculation.task
+
+    def end_turn(self, force=False):
+        """Counts unclaimed speculations as mismatches once they expire."""
+        now = time.monotonic()
+        for key, speculation in list(self._pending.items()):
+            if force or now - speculation.created_at >= SPECULATION_WINDOW_SECONDS:
+                del self._pending[key]
+                self._mismatches += 1
+                self._mismatch_counter.inc()
+                logger.warning("Fast path: model never confirmed %s", key)
+
+        if (
+            self.enabled
+            and self._attempts >= MIN_SAMPLES_FOR_DISABLE
+            and self._mismatches / self._attempts > MAX_MISMATCH_RATE
+        ):
+            self.enabled = False
+            logger.warning("Fast path disabled for this session: too many mismatches")
@@ -0,0 +1,292 @@
+"""
+Optional framing for satellite audio: a small versioned header in front of
+each UDP packet or WebSocket binary message.
+
+    magic "GL" | version u8 | codec u8 | seq u32 | timestamp u32 | rate u32
+
+Big-endian, 16 bytes, followed by the payload. `timestamp` is the sender's
+capture clock in milliseconds; it only has to be steady, and it wraps.
+
+Framing is negotiated per device. A UDP satellite opts in by sending a HELLO
+control frame (codec 0, JSON payload) before its audio, and the proxy
+answers with one of its own. A web client asks for it in its config
+message. Devices that never ask are legacy firmware and keep raw PCM in
+both directions.
+"""
+import json
+import logging
+import struct
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GL"
+VERSION = 1
+HEADER = struct.Struct("!2sBBIII")
+
+CODEC_CONTROL = 0
+CODEC_PCM16 = 1
+SUPPORTED_CODECS = (CODEC_PCM16,)
+
+# Frames held while waiting for a missing one before it is declared lost;
+# at 20-30 ms frames this bounds the added delay to under 100 ms
+REORDER_DEPTH = 3
+# A jump this far, either way, is a restarted stream, not loss or lateness
+MAX_GAP = 50
+# Gain for the first concealment frame (a repeat of the last good one);
+# later consecutive losses are silence
+CONCEAL_GAIN = 0.5
+# Capture rates a client may announce; anything else falls back to the default
+MIN_RATE = 8000
+MAX_RATE = 96000
+
+_SEQ_MODULO = 1 << 32
+
+
+@dataclass(frozen=True, slots=True)
+class Frame:
+    version: int
+    codec: int
+    seq: int
+    timestamp: int
+    rate: int
+    payload: bytes
+
+
+def now_ms() -> int:
+    """This side's frame clock."""
+    return int(time.monotonic() * 1000) % _SEQ_MODULO
+
+
+def seq_diff(a: int, b: int) -> int:
+    """a - b for wrapping u32 counters, in [-2^31, 2^31)."""
+    return (a - b + (1 << 31)) % _SEQ_MODULO - (1 << 31)
+
+
+def pack_frame(codec: int, seq: int, timestamp: int, rate: int, payload: bytes) -> bytes:
+    return HEADER.pack(MAGIC, VERSION, codec, seq, timestamp, rate) + payload
+
+
+def parse_frame(data: bytes) -> Frame | None:
+    """The frame in `data`, or None if it doesn't carry a header."""
+    if len(data) < HEADER.size or data[:2] != MAGIC:
+        return None
+    magic, version, codec, seq, timestamp, rate = HEADER.unpack_from(data)
+    return Frame(version, codec, seq, timestamp, rate, bytes(data[HEADER.size :]))
+
+
+def parse_control(frame: Frame) -> dict | None:
+    if frame.codec != CODEC_CONTROL:
+        return None
+    try:
+        message = json.loads(frame.payload)
+    except ValueError:
+        return None
+    return message if isinstance(message, dict) else None
+
+
+def control_frame(message: dict) -> bytes:
+    return pack_frame(CODEC_CONTROL, 0, now_ms(), 0, json.dumps(message).encode())
+
+
+class TransitStats:
+    """
+    One-way delay as seen by the receiver. Sender and receiver clocks are
+    not synchronized, so delay is reported relative to the fastest frame
+    seen (queueing and buffering above the path minimum); jitter is the
+    RFC 3550 interarrival estimate.
+    """
+
+    def __init__(self):
+        self.min_transit: int | None = None
+        self.last_transit: int | None = None
+        self.jitter_ms = 0.0
+        self.delay_ms = 0
+
+    def observe(self, sent_ms: int, arrived_ms: int):
+        transit = seq_diff(arrived_ms, sent_ms)
+        if self.min_transit is None or transit < self.min_transit:
+            self.min_transit = transit
+        if self.last_transit is not None:
+            self.jitter_ms += (abs(transit - self.last_transit) - self.jitter_ms) / 16
+        self.last_transit = transit
+        self.delay_ms = transit - self.min_transit
+
+
+class FrameReceiver:
+    """
+    Puts frames back in sequence order. A missing frame is waited for until
+    REORDER_DEPTH later frames have arrived, then replaced by concealment
+    audio; late and duplicate frames are dropped.
+    """
+
+    def __init__(self):
+        self.expected: int | None = None
+        self.pending: dict[int, Frame] = {}
+        self.last_payload: bytes | None = None
+        self.concealed_run = 0
+        self.received = 0
+        self.lost = 0
+        self.late = 0
+        self.reordered = 0
+        self.restarts = 0
+
+    def reset(self):
+        self.expected = None
+        self.pending.clear()
+        self.last_payload = None
+        self.concealed_run = 0
+
+    def push(self, frame: Frame) -> list[bytes]:
+        """Payloads that are ready to play, in order, concealment included."""
+        self.received += 1
+        if self.expected is None:
+            self.expected = frame.seq
+
+        ahead = seq_diff(frame.seq, self.expected)
+        if abs(ahead) > MAX_GAP:
+            # The sender restarted its sequence; start over from here
+            self.restarts += 1
+            self.pending.clear()
+            self.expected = frame.seq
+        elif ahead < 0 or frame.seq in self.pending:
+            self.late += 1
+            metrics.counter("framing.late").inc()
+            return []
+        elif ahead == 0 and self.pending:
+            # Filled a gap that later frames were waiting on
+            self.reordered += 1
+            metrics.counter("framing.reordered").inc()
+
+        self.pending[frame.seq] = frame
+        ready = []
+        while self.pending:
+            next_frame = self.pending.pop(self.expected, None)
+            if next_frame is not None:
+                ready.append(next_frame.payload)
+                self.last_payload = next_frame.payload
+                self.concealed_run = 0
+            elif len(self.pending) >= REORDER_DEPTH:
+                ready.append(self._conceal())
+            else:
+                break
+            self.expected = (self.expected + 1) % _SEQ_MODULO
+        return ready
+
+    def _conceal(self) -> bytes:
+        self.lost += 1
+        metrics.counter("framing.lost").inc()
+        if self.last_payload is None:
+            return b""
+        self.concealed_run += 1
+        if self.concealed_run > 1:
+            return bytes(len(self.last_payload))
+        samples = np.frombuffer(self.last_payload, dtype=np.int16)
+        return (samples * CONCEAL_GAIN).astype(np.int16).tobytes()
+
+
+class FramedLink:
+    """Framing state for one client that negotiated it, in both directions."""
+
+    def __init__(self, name: str, rate: int | None = None):
+        self.name = name
+        # Capture rate the client announced, if any
+        self.rate = rate
+        self.receiver = FrameReceiver()
+        self.uplink = TransitStats()
+        # Latest report on frames we sent (lost, jitter_ms, delay_ms)
+        self.downlink: dict | None = None
+        self._reported_lost = 0
+        self.send_seq = 0
+        self.invalid = 0
+
+    @classmethod
+    def from_hello(cls, name: str, data: bytes) -> "FramedLink | None":
+        """A link if `data` is a HELLO control frame this proxy can speak."""
+        frame = parse_frame(data)
+        if frame is None or frame.version != VERSION:
+            return None
+        message = parse_control(frame)
+        if not message or message.get("type") != "hello":
+            return None
+        if CODEC_PCM16 not in message.get("codecs", [CODEC_PCM16]):
+            logger.warning("[%s] No common codec in %s; using raw PCM", name, message)
+            return None
+        rate = message.get("rate")
+        if rate is not None and not (isinstance(rate, int) and MIN_RATE <= rate <= MAX_RATE):
+            logger.warning("[%s] Ignoring invalid rate %r in HELLO", name, rate)
+            rate = None
+        return cls(name, rate)
+
+    def hello_reply(self, output_rate: int) -> bytes:
+        return control_frame(
+            {"type": "hello", "version": VERSION, "codec": CODEC_PCM16, "rate": output_rate}
+        )
+
+    def reset(self):
+        """Forgets sequence state, e.g. when a new session starts."""
+        self.receiver.reset()
+
+    def receive(self, data: bytes) -> list[bytes]:
+        """Audio payloads from one received frame, reordered and concealed."""
+        frame = parse_frame(data)
+        if frame is None or frame.version != VERSION:
+            self.invalid += 1
+            metrics.counter("framing.invalid").inc()
+            return []
+        if frame.codec == CODEC_CONTROL:
+            message = parse_control(frame)
+            if message and message.get("type") == "report":
+                self.record_report(message)
+            return []
+        if frame.codec not in SUPPORTED_CODECS:
+            self.invalid += 1
+            metrics.counter("framing.invalid").inc()
+            return []
+
+        self.uplink.observe(frame.timestamp, now_ms())
+        metrics.gauge("framing.uplink_jitter_ms").set(round(self.uplink.jitter_ms, 1))
+        metrics.gauge("framing.uplink_delay_ms").set(self.uplink.delay_ms)
+        return self.receiver.push(frame)
+
+    def wrap(self, payload: bytes, rate: int) -> bytes:
+        """Frames outgoing audio."""
+        frame = pack_frame(CODEC_PCM16, self.send_seq, now_ms(), rate, payload)
+        self.send_seq = (self.send_seq + 1) % _SEQ_MODULO
+        return frame
+
+    def record_report(self, report: dict):
+        """The client's view of our frames: cumulative loss, jitter and delay."""
+        self.downlink = {
+            name: report[name]
+            for name in ("lost", "late", "jitter_ms", "delay_ms")
+            if isinstance(report.get(name), (int, float))
+        }
+        lost = int(self.downlink.get("lost", 0))
+        if lost > self._reported_lost:
+            metrics.counter("framing.downlink_lost").inc(lost - self._reported_lost)
+        self._reported_lost = lost
+        for name in ("jitter_ms", "delay_ms"):
+            if name in self.downlink:
+                metrics.gauge(f"framing.downlink_{name}").set(self.downlink[name])
+
+    def stats(self) -> dict:
+        receiver = self.receiver
+        return {
+            "uplink": {
+                "received": receiver.received,
+                "lost": receiver.lost,
+                "late": receiver.late,
+                "reordered": receiver.reordered,
+                "restarts": receiver.restarts,
+                "invalid": self.invalid,
+                "jitter_ms": round(self.uplink.jitter_ms, 1),
+                "delay_ms": self.uplink.delay_ms,
+            },
+            "downlink": {"sent": self.send_seq, **(self.downlink or {})},
+        }
@@ -0,0 +1,128 @@
+"""
+Keeps one Home Assistant WebSocket subscription open to the custom
+component's context stream.
+
+The component pushes the formatted context for each device profile when it
+changes, entity name map changes and state changes of exposed entities, so
+context is warm before a session asks for it and tool name resolution never
+waits on a round trip. While disconnected, everything falls back to the
+REST endpoints.
+"""
+import asyncio
+import logging
+import os
+
+from aiohttp import ClientSession, WSMsgType
+
+import context
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+HA_WS_URL = "ws://supervisor/core/websocket"
+HA_TOKEN = os.getenv("SUPERVISOR_TOKEN")
+SUBSCRIBE_CONTEXT = "gemini_tool_bridge/subscribe_context"
+
+# Seconds between reconnect attempts, growing after each failure
+RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+# The component may be missing or too old; don't hammer it
+UNSUPPORTED_RETRY_SECONDS = 300
+
+
+class ContextStream:
+    """Applies context, name map and state pushes to the shared HA client."""
+
+    def __init__(self, ha_client):
+        self.ha = ha_client
+        self.connected = False
+        self._connected_gauge = metrics.gauge("ha_stream.connected")
+        self._events = metrics.counter("ha_stream.events")
+        self._connected_gauge.set(0)
+
+    async def run(self):
+        attempt = 0
+        while True:
+            try:
+                supported = await self._run_once()
+                attempt = 0
+                if not supported:
+                    await asyncio.sleep(UNSUPPORTED_RETRY_SECONDS)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Context stream error: %s", e)
+            finally:
+                self._set_connected(False)
+
+            delay = RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)]
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _set_connected(self, connected: bool):
+        if not connected and self.connected:
+            logger.info("Context stream disconnected; using REST until it is back")
+            context.clear_streamed_context()
+        self.connected = connected
+        self._connected_gauge.set(int(connected))
+
+    async def _run_once(self) -> bool:
+        """
+        Connects, subscribes and handles pushes until the socket closes.
+        Returns False if the component does not support the stream.
+        """
+        async with ClientSession() as session:
+            async with session.ws_connect(HA_WS_URL, heartbeat=30) as ws:
+                message = await ws.receive_json()
+                if message.get("type") == "auth_required":
+                    await ws.send_json({"type": "auth", "access_token": HA_TOKEN})
+                    message = await ws.receive_json()
+                if message.get("type") != "auth_ok":
+                    raise ConnectionError(f"Authentication failed: {message}")
+
+                subscribe = {
+                    "id": 1,
+                    "type": SUBSCRIBE_CONTEXT,
+                    "format": context.CONTEXT_FORMAT,
+                    "profiles": context.streamed_profiles(),
+                }
+                if context.CONTEXT_TOKEN_BUDGET:
+                    subscribe["token_budget"] = context.CONTEXT_TOKEN_BUDGET
+                await ws.send_json(subscribe)
+
+                result = await ws.receive_json()
+                if not result.get("success"):
+                    logger.warning(
+                        f"Context stream not available: {result.get('error')}"
+                    )
+                    return False
+
+                logger.info("Context stream connected")
+                self._set_connected(True)
+
+                async for msg in ws:
+                    if msg.type == WSMsgType.TEXT:
+                        message = msg.json()
+                        if message.get("type") == "event":
+                            self._handle(message["event"])
+                    elif msg.type in (WSMsgType.ERROR, WSMsgType.CLOSED):
+                        break
+        return True
+
+    def _handle(self, event: dict):
+        self._events.inc()
+        kind = event.get("type")
+        if kind == "context":
+            context.set_streamed_context(event["key"], event["text"])
+            logger.debug(
+                f"Context {event['key']} updated to {event['version']} ({event.get('stats')})"
+            )
+        elif kind == "name_map":
+            self.ha.update_name_map(
+                event.get("updated", {}),
+                event.get("removed", ()),
+                replace=event.get("replace", False),
+            )
+        elif kind == "states":
+            # Read-only tool results that depend on these entities are stale
+            self.ha.tool_cache.invalidate_entities(list(event.get("states", {})))
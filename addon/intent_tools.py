@@ -1,16 +1,28 @@
-from google.genai import types
+import asyncio
 import logging
-import datetime
-from aiohttp import ClientSession
+import time
+from aiohttp import ClientConnectorError, ClientSession
 import os
 
 from context import get_context
+from metrics import metrics
+from options import get_option
+from resilience import CircuitBreaker, run_with_deadline
+from tool_cache import ToolResultCache
+from tool_registry import registry
 
 # Reuse logger and constants from tools.py
 logger = logging.getLogger(__name__)
 HA_URL = "http://supervisor/core/api"
 HA_TOKEN = os.getenv("SUPERVISOR_TOKEN")
 
+# Seconds a tool call may take before the model gets a "still working" result
+TOOL_DEADLINE_SECONDS = float(get_option("tool_deadline_seconds", 6.0))
+# Hedge a slow read-only call after this long if there is no latency history yet
+DEFAULT_HEDGE_AFTER_SECONDS = 1.0
+# Result statuses produced by the deadline/breaker wrapper rather than a tool
+DEADLINE_STATUSES = {"pending", "failed", "unavailable"}
+
 
 class HomeAssistantClient:
     """Client for interacting with Home Assistant via Supervisor API."""
@@ -22,6 +34,26 @@ class HomeAssistantClient:
         }
         self.entities = {}
         self.entity_name_map = {}
+        # Shared by every session's tool handler
+        self.tool_cache = ToolResultCache()
+        self.breaker = CircuitBreaker()
+        # Requests that errored or got a non-2xx status; results produced
+        # while this moves are not cached
+        self.failed_requests = 0
+
+    def _record_status(self, status):
+        """Feeds an HTTP status from HA into the circuit breaker."""
+        if status >= 300:
+            self.failed_requests += 1
+        if status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _record_failure(self):
+        """A request that never got a response."""
+        self.failed_requests += 1
+        self.breaker.record_failure()
 
     async def fetch_name_map(self):
         """Fetches the entity name map from the custom component."""
@@ -29,14 +61,31 @@ class HomeAssistantClient:
         try:
             raw_data = await get_context(raw=True)
             if isinstance(raw_data, dict) and "entity_name_map" in raw_data:
-                self.entity_name_map = raw_data["entity_name_map"]
-                # Create a reverse map for convenience
-                self.entities = {v.lower(): k for k, v in self.entity_name_map.items()}
+                self.update_name_map(raw_data["entity_name_map"], replace=True)
                 logger.info(
-                    f"Successfully fetched name map for {len(self.entity_name_map)} entities."
+                    "Successfully fetched name map for %d entities.", len(self.entity_name_map)
                 )
         except Exception as e:
-            logger.error(f"Failed to fetch entity name map: {e}")
+            logger.error("Failed to fetch entity name map: %s", e)
+
+    def update_name_map(self, updated, removed=(), replace=False):
+        """Applies name map changes, keeping the reverse lookup in step."""
+        if replace:
+            self.entity_name_map = dict(updated)
+            # Create a reverse map for convenience
+            self.entities = {v.lower(): k for k, v in self.entity_name_map.items()}
+            return
+
+        for entity_id in removed:
+            name = self.entity_name_map.pop(entity_id, None)
+            if name is not None and self.entities.get(name.lower()) == entity_id:
+                del self.entities[name.lower()]
+        for entity_id, name in updated.items():
+            old_name = self.entity_name_map.get(entity_id)
+            if old_name is not None and self.entities.get(old_name.lower()) == entity_id:
+                del self.entities[old_name.lower()]
+            self.entity_name_map[entity_id] = name
+            self.entities[name.lower()] = entity_id
 
     async def get_state(self, entity_id):
         """Fetch specific state."""
@@ -45,11 +94,13 @@ class HomeAssistantClient:
                 async with session.get(
                     f"{HA_URL}/states/{entity_id}", headers=self.headers
                 ) as resp:
+                    self._record_status(resp.status)
                     if resp.status == 200:
                         return await resp.json()
                     return None
             except Exception as e:
-                logger.error(f"HA API Error: {e}")
+                logger.error("HA API Error: %s", e)
+                self._record_failure()
                 return None
 
     async def get_states(self) -> list[dict] | None:
@@ -59,11 +110,39 @@ class HomeAssistantClient:
                 async with session.get(
                     f"{HA_URL}/states", headers=self.headers
                 ) as resp:
+                    self._record_status(resp.status)
                     if resp.status == 200:
                         return await resp.json()
                     return None
             except Exception as e:
-                logger.error(f"HA API Error: {e}")
+                logger.error("HA API Error: %s", e)
+                self._record_failure()
+                return None
+
+    async def call_service(self, domain, service, data=None, return_response=False):
+        """Calls a service, optionally returning its service response."""
+        url = f"{HA_URL}/services/{domain}/{service}"
+        if return_response:
+            url += "?return_response"
+
+        logger.info("Calling Service: %s/%s with %s", domain, service, data)
+
+        async with ClientSession() as session:
+            try:
+                async with session.post(
+                    url, headers=self.headers, json=data or {}
+                ) as resp:
+                    self._record_status(resp.status)
+                    if resp.status == 200:
+                        response_json = await resp.json()
+                        if return_response:
+                            return response_json.get("service_response")
+                        return "Done."
+                    logger.error("Service Call Failed %s: %s", resp.status, await resp.text())
+                    return None
+            except Exception as e:
+                logger.error("HA API Error: %s", e)
+                self._record_failure()
                 return None
 
     async def fire_intent(self, intent_name, data=None):
@@ -77,13 +156,14 @@ class HomeAssistantClient:
         url = f"{HA_URL}/intent/handle"
         payload = {"name": intent_name, "data": data or {}}
 
-        logger.info(f"Firing Intent: {intent_name} with {payload['data']}")
+        logger.info("Firing Intent: %s with %s", intent_name, payload['data'])
 
         async with ClientSession() as session:
             try:
                 async with session.post(
                     url, headers=self.headers, json=payload
                 ) as resp:
+                    self._record_status(resp.status)
                     response_json = await resp.json()
 
                     if resp.status == 200:
@@ -93,29 +173,89 @@ class HomeAssistantClient:
                             .get("plain", {})
                             .get("speech", "Done.")
                         )
-                        logger.info(f"Intent Success: {speech}")
+                        logger.info("Intent Success: %s", speech)
                         return speech
                     else:
-                        logger.error(
-                            f"Intent Failed {resp.status}: {await resp.text()}"
-                        )
+                        logger.error("Intent Failed %s: %s", resp.status, await resp.text())
                         return f"Failed to execute intent: {await resp.text()}"
             except Exception as e:
+                self._record_failure()
                 return f"Error firing intent: {str(e)}"
 
+    async def fire_intents(self, intents):
+        """
+        Fires several intents in one request through the custom component,
+        which handles them concurrently in-process.
+
+        Falls back to individual /intent/handle requests only when the batch
+        endpoint is missing (an older component) or HA refused the
+        connection. Any other failure may come after HA ran the batch, so
+        firing again could run an intent twice; each intent gets an error
+        instead.
+        """
+        if not HA_TOKEN:
+            return ["Error: No API Token"] * len(intents)
+
+        url = f"{HA_URL}/gemini_live/intents"
+        payload = {
+            "intents": [{"name": name, "data": data or {}} for name, data in intents]
+        }
+
+        logger.info("Firing %d Intents: %s", len(intents), [name for name, _ in intents])
+
+        async with ClientSession() as session:
+            try:
+                async with session.post(
+                    url, headers=self.headers, json=payload
+                ) as resp:
+                    self._record_status(resp.status)
+                    if resp.status in (404, 405):
+                        logger.warning(
+                            "Intent batch endpoint unavailable (%s), firing individually",
+                            resp.status,
+                        )
+                    elif resp.status == 200:
+                        response_json = await resp.json()
+                        if response_json.get("success"):
+                            speeches = [
+                                r.get("speech", "Done.") for r in response_json["results"]
+                            ]
+                            logger.info("Intent Batch Success: %s", speeches)
+                            return speeches
+                        logger.error("Intent batch failed: %s", response_json)
+                        error = response_json.get("error", "batch failed")
+                        return [f"Failed to execute intent: {error}"] * len(intents)
+                    else:
+                        text = await resp.text()
+                        logger.error("Intent batch failed %s: %s", resp.status, text)
+                        return [f"Failed to execute intent: {text}"] * len(intents)
+            except ClientConnectorError as e:
+                # Nothing was sent, so nothing ran
+                self._record_failure()
+                logger.warning("Intent batch connection failed (%s), firing individually", e)
+            except Exception as e:
+                self._record_failure()
+                logger.error("Intent batch error: %s", e)
+                return [f"Error firing intent: {str(e)}"] * len(intents)
+
+        return list(
+            await asyncio.gather(*(self.fire_intent(name, data) for name, data in intents))
+        )
+
 
 class IntentToolHandler:
     """
-    Handles tools defined in intent_tools.py by transforming them
+    Handles tools declared in tool_definitions.py by transforming them
     into Home Assistant Intents defined in intents.yaml.
     """
 
-    def __init__(self, ha_client: HomeAssistantClient):
+    def __init__(self, ha_client: HomeAssistantClient, fast_path=None):
         self.ha = ha_client
+        # Optional FastPath whose speculative results can answer intent calls
+        self.fast_path = fast_path
 
-    async def handle_tool_call(self, tool_name, args):
-        """Dispatches tool calls to specific intent handlers."""
-        logger.info(f"Processing Intent Tool: {tool_name} with args: {args}")
+    async def _prepare_args(self, tool_name, args):
+        logger.info("Processing Intent Tool: %s with args: %s", tool_name, args)
 
         if not self.ha.entity_name_map:
             await self.ha.fetch_name_map()
@@ -125,554 +265,197 @@ class IntentToolHandler:
                 args["entity_id"], args["entity_id"]
             )
 
-        try:
-            if tool_name == "HassIntentRaw":
-                return await self.ha.fire_intent(args.get("name"), args.get("data"))
-
-            elif tool_name == "ProxySetState":
-                return await self._handle_proxy_set_state(args)
-
-            elif tool_name == "HassLightSet":
-                return await self.ha.fire_intent("HassLightSet", args)
-
-            elif tool_name == "HassFanSetSpeed":
-                return await self.ha.fire_intent("HassFanSetSpeed", args)
-
-            elif tool_name == "HassMediaSearchAndPlay":
-                return await self.ha.fire_intent("HassMediaSearchAndPlay", args)
+    async def handle_tool_calls(self, calls):
+        """
+        Handles every function call from one tool_call message.
 
-            elif tool_name == "ProxyMediaControl":
-                return await self._handle_proxy_media_control(args)
+        Intent-backed calls are coalesced into a single request to the custom
+        component's batch endpoint; everything else is handled individually.
+        Results are returned in call order.
+        """
+        results = [None] * len(calls)
+        batch = []  # (index, intent_name, data, target entity ids)
+        singles = []  # (index, tool_name, args)
+        speculated = []  # (index, task already fired by the fast path)
+
+        for index, (tool_name, args) in enumerate(calls):
+            args = dict(args or {})
+            await self._prepare_args(tool_name, args)
+            if self.ha.tool_cache.is_cacheable(tool_name):
+                singles.append((index, tool_name, args))
+                continue
 
-            elif tool_name == "ProxyControlVolume":
-                return await self._handle_proxy_control_volume(args)
+            try:
+                resolved = self._resolve_intent(tool_name, dict(args))
+            except ValueError as e:
+                results[index] = f"Error: {e}"
+                continue
+            except Exception as e:
+                logger.error("Intent Handling Error: %s", e)
+                results[index] = f"Error executing {tool_name}: {e}"
+                continue
+
+            task = self.fast_path.claim(resolved, args) if self.fast_path else None
+            if task is not None:
+                speculated.append((index, task))
+            elif resolved is None:
+                singles.append((index, tool_name, args))
+            else:
+                batch.append((index, *resolved, self._target_entity_ids(args)))
 
-            elif tool_name == "ProxySetMute":
-                mute = args.get("mute")
-                intent = "HassMediaPlayerMute" if mute else "HassMediaPlayerUnmute"
-                # Filter args to valid slots (name, area)
-                data = {k: v for k, v in args.items() if k in ["name", "area"]}
-                return await self.ha.fire_intent(intent, data)
+        for index, task in speculated:
+            results[index] = await self._with_deadline(
+                calls[index][0], lambda: asyncio.shield(task)
+            )
 
-            elif tool_name == "HassBroadcast":
-                return await self.ha.fire_intent("HassBroadcast", args)
+        if len(batch) == 1:
+            index, intent_name, data, targets = batch[0]
+            self.ha.tool_cache.invalidate_entities(targets)
+            results[index] = await self._with_deadline(
+                calls[index][0], lambda: self.ha.fire_intent(intent_name, data)
+            )
+        elif batch:
+            for *_, targets in batch:
+                self.ha.tool_cache.invalidate_entities(targets)
+            intents = [(intent_name, data) for _, intent_name, data, _ in batch]
+            speeches = await self._with_deadline(
+                "intent_batch", lambda: self.ha.fire_intents(intents)
+            )
+            if isinstance(speeches, dict):  # Timed out or HA unavailable
+                speeches = [speeches] * len(batch)
+            for (index, *_), speech in zip(batch, speeches):
+                results[index] = speech
+
+        if singles:
+            single_results = await asyncio.gather(
+                *(self._run_tool(name, args) for _, name, args in singles)
+            )
+            for (index, *_), result in zip(singles, single_results):
+                results[index] = result
 
-            # --- Timer Proxies ---
-            elif tool_name == "HassStartTimer":
-                return await self.ha.fire_intent("HassStartTimer", args)
+        return results
 
-            elif tool_name == "HassCancelAllTimers":
-                return await self.ha.fire_intent("HassCancelAllTimers", args)
+    async def handle_tool_call(self, tool_name, args):
+        """Dispatches tool calls to specific intent handlers."""
+        await self._prepare_args(tool_name, args)
+        return await self._run_tool(tool_name, args)
+
+    async def _run_tool(self, tool_name, args):
+        """Runs a prepared call, serving read-only tools from the cache."""
+        cache = self.ha.tool_cache
+        spec = registry.get(tool_name)
+        if not cache.is_cacheable(tool_name):
+            # Anything that is not a pure read may change entity state
+            cache.invalidate_entities(self._target_entity_ids(args))
+            return await self._with_deadline(
+                tool_name,
+                lambda: self._dispatch(tool_name, args),
+                read_only=bool(spec and spec.read_only),
+            )
 
-            elif tool_name == "HassCancelTimer":
-                return await self.ha.fire_intent("HassCancelTimer", args)
+        cached = cache.get(tool_name, args)
+        if cached is not cache.MISS:
+            logger.info("Serving %s from cache", tool_name)
+            return cached
 
-            elif tool_name == "ProxyAdjustTimer":
-                operation = args.pop("operation")
-                intent = (
-                    "HassIncreaseTimer"
-                    if operation == "increase"
-                    else "HassDecreaseTimer"
-                )
-                return await self.ha.fire_intent(intent, args)
+        key_args = dict(args)
+        failed_requests = self.ha.failed_requests
+        started = time.perf_counter()
+        if spec.stateless:
+            result = await self._dispatch(tool_name, args)
+        else:
+            # Each hedged attempt gets its own copy of the args
+            result = await self._with_deadline(
+                tool_name, lambda: self._dispatch(tool_name, dict(args)), read_only=True
+            )
+            if isinstance(result, dict) and result.get("status") in DEADLINE_STATUSES:
+                return result
+        if self.ha.failed_requests != failed_requests:
+            # Built from a failed HA call (or raced one); don't keep it
+            return result
+        cache.put(
+            tool_name,
+            key_args,
+            result,
+            time.perf_counter() - started,
+            self._target_entity_ids(args),
+        )
+        return result
 
-            elif tool_name == "ProxyPauseResumeTimer":
-                action = args.pop("action")
-                intent = "HassPauseTimer" if action == "pause" else "HassUnpauseTimer"
-                return await self.ha.fire_intent(intent, args)
+    async def _with_deadline(self, tool_name, make_call, read_only=False):
+        """
+        Runs a tool call under the deadline and the HA circuit breaker.
 
-            # --- Context/Info Tools (Not Intents) ---
-            elif tool_name == "GetDateTime":
-                return datetime.datetime.now().isoformat()
+        Read-only calls are hedged with a second attempt once they run past
+        their p95 latency. Writes are left running past the deadline, since
+        HA may still complete them, and the model is told they are pending.
+        """
+        if not self.ha.breaker.allow():
+            logger.warning("Rejecting %s: Home Assistant is unavailable", tool_name)
+            return {
+                "status": "unavailable",
+                "message": "Home Assistant is not responding right now. Try again shortly.",
+            }
+
+        latency = metrics.latency(f"tool.{tool_name}")
+        hedge_after = None
+        if read_only:
+            hedge_after = min(
+                latency.percentile(95) or DEFAULT_HEDGE_AFTER_SECONDS,
+                TOOL_DEADLINE_SECONDS / 2,
+            )
 
-            elif tool_name == "GetLiveContext":
-                return await self._handle_get_context(args)
+        started = time.perf_counter()
+        try:
+            return await run_with_deadline(
+                make_call,
+                TOOL_DEADLINE_SECONDS,
+                hedge_after=hedge_after,
+                keep_running=not read_only,
+            )
+        except asyncio.TimeoutError:
+            self.ha.breaker.record_failure()
+            metrics.counter("tool.timeouts").inc()
+            logger.warning("%s exceeded %ss deadline", tool_name, TOOL_DEADLINE_SECONDS)
+            if read_only:
+                return {
+                    "status": "failed",
+                    "message": "Home Assistant did not answer in time.",
+                }
+            return {
+                "status": "pending",
+                "message": "Still working on it; Home Assistant has not confirmed yet.",
+            }
+        finally:
+            latency.observe(time.perf_counter() - started)
+
+    def _target_entity_ids(self, args):
+        """Entity ids a call targets, or None when it may affect any entity."""
+        eid = args.get("entity_id")
+        if not eid and isinstance(args.get("name"), str) and "area" not in args:
+            eid = self.ha.entities.get(args["name"].lower())
+        return [eid] if eid else None
+
+    async def _dispatch(self, tool_name, args):
+        spec = registry.get(tool_name)
+        if spec is None:
+            return f"Error: Tool {tool_name} not implemented."
 
-            else:
-                return f"Error: Tool {tool_name} not implemented."
+        try:
+            if spec.handler:
+                return await spec.handler(self.ha, args)
+            return await self.ha.fire_intent(*spec.resolve_intent(args))
 
+        except ValueError as e:
+            return f"Error: {e}"
         except Exception as e:
-            logger.error(f"Intent Handling Error: {e}")
+            logger.error("Intent Handling Error: %s", e)
             return f"Error executing {tool_name}: {e}"
 
-    async def _handle_proxy_set_state(self, args):
-        """Maps generic state changes to HassTurnOn/Off intents."""
-        state = args.get("state")
-        data = {k: v for k, v in args.items() if k != "state"}
-
-        intent_name = "HassTurnOn"  # Default
-
-        # Map generic 'state' to Intent + inferred slots if necessary
-        if state == "on":
-            intent_name = "HassTurnOn"
-        elif state == "off":
-            intent_name = "HassTurnOff"
-        elif state == "open":
-            intent_name = "HassTurnOn"
-            # Explicitly helps HA infer it's a cover if no device_class provided
-            if "device_class" not in data and "domain" not in data:
-                data["domain"] = "cover"
-        elif state == "close":
-            intent_name = "HassTurnOff"
-            if "device_class" not in data and "domain" not in data:
-                data["domain"] = "cover"
-        elif state == "lock":
-            # In HA Intent Land: 'Turning On' a lock usually means engaging it (Locking)
-            intent_name = "HassTurnOn"
-            if "device_class" not in data:
-                data["device_class"] = "lock"
-        elif state == "unlock":
-            # 'Turning Off' a lock usually means disengaging it (Unlocking)
-            intent_name = "HassTurnOff"
-            if "device_class" not in data:
-                data["device_class"] = "lock"
-
-        return await self.ha.fire_intent(intent_name, data)
-
-    async def _handle_proxy_media_control(self, args):
-        """Maps media commands to specific media intents."""
-        command = args.get("command")
-        data = {k: v for k, v in args.items() if k != "command"}
-
-        if command == "play":
-            intent_name = "HassMediaUnpause"  # Resume/Play
-        elif command == "pause":
-            intent_name = "HassMediaPause"
-        elif command == "next":
-            intent_name = "HassMediaNext"
-        elif command == "previous":
-            intent_name = "HassMediaPrevious"
-        elif command == "stop":
-            # intents.yaml does not have HassMediaStop.
-            # HassTurnOff is the standard equivalent for stopping media devices.
-            intent_name = "HassTurnOff"
-            if "domain" not in data:
-                data["domain"] = "media_player"
-        else:
-            return "Error: Unknown media command"
-
-        return await self.ha.fire_intent(intent_name, data)
-
-    async def _handle_proxy_control_volume(self, args):
-        """Maps volume tools to Absolute or Relative volume intents."""
-        mode = args.get("mode")
-        level = args.get("level")
-        data = {k: v for k, v in args.items() if k not in ["mode", "level"]}
-
-        if mode == "set":
-            data["volume_level"] = level
-            return await self.ha.fire_intent("HassSetVolume", data)
-        elif mode in ["increase", "decrease"]:
-            # HassSetVolumeRelative takes 'volume_step' (percentage) NOT 'level'
-            # Note: The tool uses 'level' for both, but intents.yaml expects 'volume_step'
-
-            # Check if level is provided, otherwise default to a reasonable step
-            step = level if level else 10
-
-            if mode == "decrease":
-                step = -abs(step)  # Ensure negative
-            else:
-                step = abs(step)
-
-            data["volume_step"] = step
-            return await self.ha.fire_intent("HassSetVolumeRelative", data)
-
-        return "Error: Invalid volume mode"
-
-    async def _handle_get_context(self, args):
-        """Helper to get state data for answering questions (Not an intent)."""
-        # Logic reused from tools.py to support 'GetLiveContext'
-        payload = args or {}
-
-        # Name resolution
-        if "name" in payload and "entity_id" not in payload:
-            eid = self.ha.entities.get(payload["name"].lower())
-            if eid:
-                payload["entity_id"] = eid
-            elif "." in payload["name"]:
-                payload["entity_id"] = payload["name"]
-
-        if "entity_id" in payload:
-            return await self.ha.get_state(payload["entity_id"])
-
-        # Fallback: Return summary of all states
-        states = (await self.ha.get_states()) or []
-        summary = []
-        for s in states:
-            summary.append(f"{s['entity_id']}: {s['state']}")
-        logger.info(f"GetLiveContext returning {len(summary)} states")
-        return "\n".join(summary)
-
-
-def get_intent_tools() -> types.ToolListUnion:
-    return [
-        types.Tool(
-            function_declarations=[
-                types.FunctionDeclaration(
-                    name="ProxySetState",
-                    description="Changes the state of a device. Use this to turn things on/off, lock/unlock locks, or open/close covers. [name, area, area+name, area+domain, area+device_class, device_class+domain]",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "state": {
-                                "type": "STRING",
-                                "enum": [
-                                    "on",
-                                    "off",
-                                    "lock",
-                                    "unlock",
-                                    "open",
-                                    "close",
-                                ],
-                                # "description": "The desired state. Use 'on' for activating, 'lock' for locks, 'open' for covers."
-                            },
-                            "name": {"type": "STRING"},
-                            "entity_id": {"type": "STRING"},
-                            "area": {"type": "STRING"},
-                            "device_class": {
-                                "type": "STRING",
-                                "enum": [
-                                    "tv",
-                                    "speaker",
-                                    "switch",
-                                    "light",
-                                    "fan",
-                                    "lock",
-                                    "cover",
-                                ],
-                                "default": "light",
-                            },
-                        },
-                        "required": ["state"],
-                    },
-                ),
-                types.FunctionDeclaration(
-                    name="HassLightSet",
-                    description="Sets the brightness or color of a light. [name+brightness, name+color, brightness, area+brightness, color, area+color]",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "brightness": {
-                                "type": "INTEGER",
-                                "description": "0 to 100",
-                            },
-                            "color": {
-                                "type": "STRING",
-                                "description": "Color name or RGB value",
-                            },
-                            # "temperature": {
-                            #     "type": "INTEGER",
-                            #     "description": "Kelvin value",
-                            # },
-                            "name": {"type": "STRING"},
-                            "entity_id": {"type": "STRING"},
-                            "area": {"type": "STRING"},
-                        },
-                    },
-                ),
-                types.FunctionDeclaration(
-                    name="HassFanSetSpeed",
-                    description="Sets a fan's speed percentage. [name, area]",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "percentage": {"type": "INTEGER"},
-                            "name": {"type": "STRING"},
-                            "entity_id": {"type": "STRING"},
-                            "area": {"type": "STRING"},
-                        },
-                        "required": ["percentage"],
-                    },
-                ),
-                # Media
-                types.FunctionDeclaration(
-                    name="HassMediaSearchAndPlay",
-                    description="Searches for media and plays it. [NONE, area, name, name+area]",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "search_query": {"type": "STRING"},
-                            "media_class": {
-                                "type": "STRING",
-                                "enum": [
-                                    "music",
-                                    "tv_show",
-                                    "movie",
-                                    "podcast",
-                                    "video",
-                                ],
-                            },
-                            "name": {"type": "STRING"},
-                            "entity_id": {"type": "STRING"},
-                            "area": {"type": "STRING"},
-                        },
-                        "required": ["search_query"],
-                    },
-                ),
-                types.FunctionDeclaration(
-                    name="ProxyMediaControl",
-                    description="Controls media playback (pause, resume, skip). [NONE, area, name]",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "command": {
-                                "type": "STRING",
-                                "enum": ["play", "pause", "next", "previous", "stop"],
-                                "description": "The playback command to issue.",
-                            },
-                            "name": {"type": "STRING"},
-                            "entity_id": {"type": "STRING"},
-                            "area": {"type": "STRING"},
-                        },
-                        "required": ["command"],
-                    },
-                ),
-                types.FunctionDeclaration(
-                    name="ProxyControlVolume",
-                    description="Sets or adjusts the volume of a media player. [For mode 'set': NONE, name. For mode 'increase'/'decrease': NONE, area, name.]",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "mode": {
-                                "type": "STRING",
-                                "enum": ["set", "increase", "decrease"],
-                                "description": "Use 'set' for a specific percentage, 'increase'/'decrease' for relative adjustments.",
-                            },
-                            "level": {
-                                "type": "INTEGER",
-                                "description": "The target volume percentage (0-100) or the step amount to change by.",
-                            },
-                            "name": {"type": "STRING"},
-                            "entity_id": {"type": "STRING"},
-                            "area": {"type": "STRING"},
-                        },
-                        "required": ["mode", "level"],
-                    },
-                ),
-                types.FunctionDeclaration(
-                    name="ProxySetMute",
-                    description="Mutes or unmutes a media player. [NONE, name]",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "mute": {
-                                "type": "BOOLEAN",
-                                "description": "True to mute, False to unmute.",
-                            },
-                            "name": {"type": "STRING"},
-                            "entity_id": {"type": "STRING"},
-                            "area": {"type": "STRING"},
-                        },
-                        "required": ["mute"],
-                    },
-                ),
-                types.FunctionDeclaration(
-                    name="HassBroadcast",
-                    description="Broadcast a message via TTS.",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {"message": {"type": "STRING"}},
-                        "required": ["message"],
-                    },
-                ),
-                # Timers
-                types.FunctionDeclaration(
-                    name="HassStartTimer",
-                    description="Starts a timer. [hours, minutes, seconds, hours+minutes, hours+seconds, minutes+seconds, hours+minutes+seconds]",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "hours": {
-                                "type": "INTEGER",
-                                "description": "Number of hours",
-                            },
-                            "minutes": {
-                                "type": "INTEGER",
-                                "description": "Number of minutes",
-                            },
-                            "seconds": {
-                                "type": "INTEGER",
-                                "description": "Number of seconds",
-                            },
-                            "name": {
-                                "type": "STRING",
-                                "description": "Name attached to the timer",
-                            },
-                            "conversation_command": {
-                                "type": "STRING",
-                                "description": "Command to execute when timer finishes",
-                            },
-                        },
-                    },
-                ),
-                types.FunctionDeclaration(
-                    name="HassCancelAllTimers",
-                    description="Cancels all active timers in an area. [NONE, area]",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {"area": {"type": "STRING"}},
-                    },
-                ),
-                types.FunctionDeclaration(
-                    name="HassCancelTimer",
-                    description="Cancels a timer. [NONE, name, area]",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "start_hours": {
-                                "type": "INTEGER",
-                                "description": "Hours the timer was started with",
-                            },
-                            "start_minutes": {
-                                "type": "INTEGER",
-                                "description": "Minutes the timer was started with",
-                            },
-                            "start_seconds": {
-                                "type": "INTEGER",
-                                "description": "Seconds the timer was started with",
-                            },
-                            "name": {
-                                "type": "STRING",
-                                "description": "Name attached to the timer",
-                            },
-                            "area": {
-                                "type": "STRING",
-                                "description": "Area of the device used to start the timer",
-                            },
-                        },
-                    },
-                ),
-                types.FunctionDeclaration(
-                    name="ProxyAdjustTimer",
-                    description="Adjusts a timer. [NONE, name, area]",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "operation": {
-                                "type": "STRING",
-                                "enum": ["increase", "decrease"],
-                                "description": "Whether to increase or decrease the timer.",
-                            },
-                            "hours": {
-                                "type": "INTEGER",
-                                "description": "Number of hours",
-                            },
-                            "minutes": {
-                                "type": "INTEGER",
-                                "description": "Number of minutes",
-                            },
-                            "seconds": {
-                                "type": "INTEGER",
-                                "description": "Number of seconds",
-                            },
-                            "start_hours": {
-                                "type": "INTEGER",
-                                "description": "Hours the timer was started with",
-                            },
-                            "start_minutes": {
-                                "type": "INTEGER",
-                                "description": "Minutes the timer was started with",
-                            },
-                            "start_seconds": {
-                                "type": "INTEGER",
-                                "description": "Seconds the timer was started with",
-                            },
-                            "name": {
-                                "type": "STRING",
-                                "description": "Name attached to the timer",
-                            },
-                            "area": {
-                                "type": "STRING",
-                                "description": "Area of the device used to start the timer",
-                            },
-                        },
-                        "required": ["operation"],
-                    },
-                ),
-                types.FunctionDeclaration(
-                    name="ProxyPauseResumeTimer",
-                    description="Pauses a timer. [NONE, name, area]",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "action": {
-                                "type": "STRING",
-                                "enum": ["pause", "resume"],
-                                "description": "Whether to pause or resume the timer.",
-                            },
-                            "start_hours": {
-                                "type": "INTEGER",
-                                "description": "Hours the timer was started with",
-                            },
-                            "start_minutes": {
-                                "type": "INTEGER",
-                                "description": "Minutes the timer was started with",
-                            },
-                            "start_seconds": {
-                                "type": "INTEGER",
-                                "description": "Seconds the timer was started with",
-                            },
-                            "name": {
-                                "type": "STRING",
-                                "description": "Name attached to the timer",
-                            },
-                            "area": {
-                                "type": "STRING",
-                                "description": "Area of the device used to start the timer",
-                            },
-                        },
-                        "required": ["action"],
-                    },
-                ),
-                # Helper / Info Tools
-                # types.FunctionDeclaration(
-                #     name="GetDateTime", description="Returns current date and time."
-                # ),
-                types.FunctionDeclaration(
-                    name="GetLiveContext",
-                    description="Get real-time states (on/off, temp, etc) for answering status questions.",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "name": {"type": "STRING"},
-                            "entity_id": {"type": "STRING"},
-                            "area": {"type": "STRING"},
-                            "domain": {"type": "ARRAY", "items": {"type": "STRING"}},
-                            "device_class": {
-                                "type": "STRING",
-                                "enum": [
-                                    "tv",
-                                    "speaker",
-                                    "switch",
-                                    "light",
-                                    "fan",
-                                    "lock",
-                                    "cover",
-                                ],
-                            },
-                        },
-                    },
-                ),
-                types.FunctionDeclaration(
-                    name="HassIntentRaw",
-                    description="Sends a raw intent command to Home Assistant.",
-                    parameters_json_schema={
-                        "type": "OBJECT",
-                        "properties": {
-                            "name": {
-                                "type": "STRING",
-                                "description": "The name of the intent to send.",
-                                "example": "HassTurnOn",
-                            },
-                            "data": {
-                                "type": "OBJECT",
-                                "description": "A key-value map of parameters for the intent.",
-                                "example": {"entity_id": "light.living_room"},
-                            },
-                        },
-                        "required": ["name", "data"],
-                    },
-                ),
-            ]
-        )
-    ]
+    def _resolve_intent(self, tool_name, args):
+        """
+        Maps an intent-backed tool call to (intent_name, data) without firing it.
+        Returns None for tools that are not backed by an intent.
+        """
+        spec = registry.get(tool_name)
+        return spec.resolve_intent(args) if spec else None
@@ -0,0 +1,77 @@
+"""
+LiveConnectConfig objects shared between sessions.
+
+Building a config means wrapping the context in a system instruction and
+attaching the tool list; sessions with the same inputs reuse one object.
+"""
+from google.genai import types
+
+from metrics import metrics
+from tool_registry import registry
+
+DEFAULT_VOICE = "Aoede"
+BASE_INSTRUCTION = "You are a helpful and friendly AI assistant. Be concise."
+# Configs kept per (device profile, voice)
+MAX_CACHED_CONFIGS = 32
+
+
+def build_live_config(context: str, voice: str = DEFAULT_VOICE) -> types.LiveConnectConfig:
+    full_system_instruction = f"{BASE_INSTRUCTION}\n\n{context}"
+
+    return types.LiveConnectConfig(
+        response_modalities=[types.Modality.AUDIO],
+        tools=registry.tools,
+        system_instruction=types.Content(
+            parts=[types.Part.from_text(text=full_system_instruction)],
+            role="user",
+        ),
+        speech_config=types.SpeechConfig(
+            voice_config=types.VoiceConfig(
+                prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=voice)
+            )
+        ),
+        output_audio_transcription=types.AudioTranscriptionConfig(),
+        input_audio_transcription=types.AudioTranscriptionConfig(),
+        realtime_input_config=types.RealtimeInputConfig(
+            turn_coverage=types.TurnCoverage.TURN_INCLUDES_ALL_INPUT
+        ),
+    )
+
+
+class LiveConfigCache:
+    """
+    One built config per (device profile, voice), kept until the context
+    text or the tool registry version changes.
+    """
+
+    def __init__(self):
+        self._entries: dict[tuple, tuple[tuple, types.LiveConnectConfig]] = {}
+        self._hits = metrics.counter("live_config.hits")
+        self._misses = metrics.counter("live_config.misses")
+
+    def get(self, context: str, profile=None, voice=DEFAULT_VOICE) -> types.LiveConnectConfig:
+        """The config for these inputs; shared, so do not mutate it."""
+        key = (tuple(sorted((profile or {}).items())), voice)
+        version = (registry.version, context)
+        cached = self._entries.get(key)
+        # get_context returns the same string object while the context is
+        # unchanged, so the identity check usually settles it
+        if cached is not None and cached[0][0] == version[0] and (
+            cached[0][1] is context or cached[0][1] == context
+        ):
+            self._hits.inc()
+            return cached[1]
+
+        self._misses.inc()
+        config = build_live_config(context, voice)
+        self._entries.pop(key, None)
+        if len(self._entries) >= MAX_CACHED_CONFIGS:
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = (version, config)
+        return config
+
+    def clear(self):
+        self._entries.clear()
+
+
+live_configs = LiveConfigCache()
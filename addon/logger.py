@@ -1,7 +1,140 @@
+"""
+Logging for the add-on.
+
+Every record goes to a QueueHandler on the root logger. A QueueListener
+thread formats it and writes it to stderr, so a slow Supervisor log pipe
+never stalls the event loop. Pass arguments %-style
+(`logger.debug("Sent %d bytes", n)`) so that messages below the level are
+never formatted.
+
+Hot paths that can repeat a message on every packet use `log_every`.
+Sessions log through a `SessionLogger`, whose level can be raised or
+lowered for one session at runtime (see `set_session_level`).
+"""
+import atexit
 import logging
+import logging.handlers
+import queue
+import time
+
+from options import get_option
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+LOG_LEVEL = str(get_option("log_level", "info")).upper()
+# Repeats of a rate-limited message are dropped for this long
+RATE_LIMIT_SECONDS = 10.0
+# Rate-limit keys remembered before the oldest are forgotten
+RATE_LIMIT_KEYS = 1024
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records with their message merged but not formatted.
+    QueueHandler normally runs the full Formatter (timestamp, traceback)
+    before queueing, which is the work being moved off the loop. The
+    message itself is merged here, on the caller's thread, because callers
+    may change the objects they logged right after the call.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging():
+    root = logging.getLogger()
+    if any(isinstance(handler, _LocalQueueHandler) for handler in root.handlers):
+        return
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    root.handlers = [_LocalQueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+    listener.start()
+    # Write out whatever is still queued on exit
+    atexit.register(listener.stop)
+
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+_rate_limited: dict[object, list] = {}
+
+
+def log_every(log, level: int, key, msg: str, *args, interval: float = RATE_LIMIT_SECONDS):
+    """
+    Logs `msg` unless a message with the same `key` was logged in the last
+    `interval` seconds. The next message that gets through reports how many
+    were dropped.
+    """
+    if not log.isEnabledFor(level):
+        return
+    now = time.monotonic()
+    state = _rate_limited.get(key)
+    if state is not None and now - state[0] < interval:
+        state[1] += 1
+        return
+    if len(_rate_limited) >= RATE_LIMIT_KEYS:
+        _rate_limited.clear()
+    _rate_limited[key] = [now, 0]
+    if state is not None and state[1]:
+        msg += " (%d similar messages suppressed)"
+        args = (*args, state[1])
+    log.log(level, msg, *args)
+
+
+# --- Per-session levels ---
+
+# Session logs are filtered by SessionLogger, so the logger itself lets
+# everything through
+_session_logger = logging.getLogger("session")
+_session_logger.setLevel(logging.DEBUG)
+_session_levels: dict[str, int] = {}
+
+
+class SessionLogger(logging.LoggerAdapter):
+    """One session's log: prefixes its id and applies its own level, if set."""
+
+    def __init__(self, session_id: str):
+        super().__init__(_session_logger, {"session_id": session_id})
+        self.session_id = session_id
+
+    def process(self, msg, kwargs):
+        kwargs["extra"] = self.extra
+        return f"[{self.session_id}] {msg}", kwargs
+
+    def isEnabledFor(self, level):
+        return level >= _session_levels.get(self.session_id, logging.root.level)
+
+
+def parse_level(name) -> int:
+    level = logging.getLevelName(str(name).upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level {name!r}")
+    return level
+
+
+def set_level(name):
+    """Sets the add-on's log level."""
+    logging.getLogger().setLevel(parse_level(name))
+
+
+def set_session_level(session_id: str, name):
+    """Sets one session's log level; None goes back to the add-on's level."""
+    if name is None:
+        _session_levels.pop(session_id, None)
+    else:
+        _session_levels[session_id] = parse_level(name)
+
 
-# Logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
-logger = logging.getLogger(__name__)
\ No newline at end of file
+def log_levels() -> dict:
+    return {
+        "level": logging.getLevelName(logging.getLogger().getEffectiveLevel()),
+        "sessions": {
+            session_id: logging.getLevelName(level)
+            for session_id, level in _session_levels.items()
+        },
+    }
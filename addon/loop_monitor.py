@@ -0,0 +1,232 @@
+"""
+Event-loop health: scheduling lag, executor queue wait, GIL wait and slow
+callbacks.
+
+Every satellite's audio, the Gemini sockets and the resampling/VAD work
+handed to `to_thread` share one asyncio loop, so a stall here is a glitch
+on every device at once. The monitor measures:
+
+* loop.lag: how late a sleep on the loop wakes up (scheduling lag).
+* loop.executor_wait: how long a job waits for a free default-executor
+  thread, the pool `asyncio.to_thread` uses.
+* loop.gil_wait: how late a sleeping watchdog thread wakes up. Past the
+  OS timer slack this is time spent waiting for the GIL.
+* Slow callbacks: any callback or task step that runs longer than
+  `slow_callback_ms` is timed, counted and logged with what it was.
+
+Optionally (`loop_stack_sampler`), the watchdog thread samples the loop
+thread's stack while the loop is stalled, and aggregates the samples into
+collapsed stacks ("outer;inner;leaf" with counts) that flame graph tools
+read.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+
+from logger import log_every
+from metrics import metrics
+from options import get_option
+
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR_ENABLED = bool(get_option("loop_monitor", True))
+SLOW_CALLBACK_SECONDS = int(get_option("slow_callback_ms", 100)) / 1000
+STACK_SAMPLER_ENABLED = bool(get_option("loop_stack_sampler", False))
+
+LAG_INTERVAL_SECONDS = 0.25
+EXECUTOR_PROBE_INTERVAL_SECONDS = 1.0
+WATCHDOG_INTERVAL_SECONDS = 0.1
+# Stack sampling period while the loop is stalled
+SAMPLE_INTERVAL_SECONDS = 0.01
+STACK_DEPTH = 40
+SLOW_CALLBACK_HISTORY = 20
+HOT_STACKS = 20
+# Repeats of the same slow callback are logged at most this often
+SLOW_LOG_INTERVAL_SECONDS = 10.0
+
+
+def _handle_task(handle: asyncio.Handle) -> asyncio.Task | None:
+    task = getattr(getattr(handle, "_callback", None), "__self__", None)
+    return task if isinstance(task, asyncio.Task) else None
+
+
+def callback_name(handle: asyncio.Handle) -> str:
+    """What a loop callback runs: the task's coroutine for task steps."""
+    task = _handle_task(handle)
+    target = task.get_coro() if task is not None else getattr(handle, "_callback", None)
+    return getattr(target, "__qualname__", None) or repr(target)
+
+
+def describe_handle(handle: asyncio.Handle) -> str:
+    """callback_name, plus the task's name for task steps."""
+    task = _handle_task(handle)
+    if task is not None:
+        return f"Task {task.get_name()} ({callback_name(handle)})"
+    return callback_name(handle)
+
+
+def collapse_stack(frame) -> str:
+    """A frame's stack as "file:function;..." from the outermost call."""
+    stack = traceback.extract_stack(frame, limit=STACK_DEPTH)
+    return ";".join(f"{entry.filename.rsplit('/', 1)[-1]}:{entry.name}" for entry in stack)
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        slow_callback: float = SLOW_CALLBACK_SECONDS,
+        sample_stacks: bool = STACK_SAMPLER_ENABLED,
+    ):
+        self.slow_callback = slow_callback
+        self.sample_stacks = sample_stacks
+        self.slow_callbacks: deque[dict] = deque(maxlen=SLOW_CALLBACK_HISTORY)
+        self._original_run = None
+        # Filled by the watchdog thread, drained on the loop
+        self._gil_waits: deque[float] = deque(maxlen=1024)
+        self._stalls: deque[float] = deque(maxlen=1024)
+        self._stacks: Counter[str] = Counter()
+        self._stacks_lock = threading.Lock()
+        self._watchdog: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    async def run(self):
+        """Measures lag until cancelled; starts the watchdog thread."""
+        loop = asyncio.get_running_loop()
+        self._install_slow_callback_hook()
+        self._stopping.clear()
+        self._watchdog = threading.Thread(
+            target=self._watchdog_thread,
+            args=(loop, threading.get_ident()),
+            name="loop-watchdog",
+            daemon=True,
+        )
+        self._watchdog.start()
+        lag = metrics.latency("loop.lag")
+        probe_due = loop.time()
+        try:
+            while True:
+                expected = loop.time() + LAG_INTERVAL_SECONDS
+                await asyncio.sleep(LAG_INTERVAL_SECONDS)
+                lag.observe(max(0.0, loop.time() - expected))
+                self._drain_watchdog()
+                if loop.time() >= probe_due:
+                    probe_due = loop.time() + EXECUTOR_PROBE_INTERVAL_SECONDS
+                    await self._probe_executor(loop)
+        finally:
+            self._stopping.set()
+            self._uninstall_slow_callback_hook()
+
+    async def _probe_executor(self, loop: asyncio.AbstractEventLoop):
+        submitted = time.perf_counter()
+        started = await loop.run_in_executor(None, time.perf_counter)
+        metrics.latency("loop.executor_wait").observe(started - submitted)
+
+    def _drain_watchdog(self):
+        gil_wait = metrics.latency("loop.gil_wait")
+        while self._gil_waits:
+            gil_wait.observe(self._gil_waits.popleft())
+        while self._stalls:
+            metrics.latency("loop.stall").observe(self._stalls.popleft())
+
+    # --- Slow callbacks ---
+
+    def _install_slow_callback_hook(self):
+        """
+        Times every loop callback. asyncio's own slow-callback warning needs
+        debug mode, whose coroutine bookkeeping is far too costly to leave
+        on; this adds two clock reads per callback.
+        """
+        if self._original_run is not None:
+            return
+        original = self._original_run = asyncio.Handle._run
+        threshold = self.slow_callback
+        monitor = self
+
+        def _run(handle):
+            started = time.perf_counter()
+            original(handle)
+            elapsed = time.perf_counter() - started
+            if elapsed >= threshold:
+                monitor.record_slow_callback(handle, elapsed)
+
+        asyncio.Handle._run = _run
+
+    def _uninstall_slow_callback_hook(self):
+        if self._original_run is not None:
+            asyncio.Handle._run = self._original_run
+            self._original_run = None
+
+    def record_slow_callback(self, handle: asyncio.Handle, elapsed: float):
+        description = describe_handle(handle)
+        metrics.counter("loop.slow_callbacks").inc()
+        self.slow_callbacks.append(
+            {"time": time.time(), "ms": round(elapsed * 1000, 1), "callback": description}
+        )
+        # Keyed by what ran, not the task's name, so one coroutine in many
+        # tasks is one key
+        log_every(
+            logger, logging.WARNING, ("slow_callback", callback_name(handle)),
+            "Slow callback took %.0f ms: %s", elapsed * 1000, description,
+            interval=SLOW_LOG_INTERVAL_SECONDS,
+        )
+
+    # --- Watchdog thread ---
+
+    def _watchdog_thread(self, loop: asyncio.AbstractEventLoop, loop_thread: int):
+        while not self._stopping.is_set():
+            slept_at = time.perf_counter()
+            time.sleep(WATCHDOG_INTERVAL_SECONDS)
+            self._gil_waits.append(
+                max(0.0, time.perf_counter() - slept_at - WATCHDOG_INTERVAL_SECONDS)
+            )
+
+            ping = threading.Event()
+            pinged_at = time.perf_counter()
+            try:
+                loop.call_soon_threadsafe(ping.set)
+            except RuntimeError:
+                # Loop closed
+                return
+            if ping.wait(self.slow_callback):
+                continue
+
+            # The loop hasn't run a callback for a while: it's stalled
+            logged = False
+            while not ping.wait(SAMPLE_INTERVAL_SECONDS if self.sample_stacks else 0.1):
+                if self._stopping.is_set():
+                    return
+                if not self.sample_stacks:
+                    continue
+                frame = sys._current_frames().get(loop_thread)
+                if frame is None:
+                    continue
+                stack = collapse_stack(frame)
+                del frame
+                with self._stacks_lock:
+                    self._stacks[stack] += 1
+                if not logged:
+                    logged = True
+                    logger.warning(
+                        "Event loop stalled, in:\n  " + stack.replace(";", "\n  ")
+                    )
+            self._stalls.append(time.perf_counter() - pinged_at)
+
+    def hot_stacks(self) -> list[dict]:
+        with self._stacks_lock:
+            top = self._stacks.most_common(HOT_STACKS)
+        return [{"stack": stack, "samples": count} for stack, count in top]
+
+    def snapshot(self) -> dict:
+        return {
+            "slow_callback_ms": round(self.slow_callback * 1000),
+            "stack_sampler": self.sample_stacks,
+            "slow_callbacks": list(self.slow_callbacks),
+            "hot_stacks": self.hot_stacks(),
+        }
+
+
+loop_monitor = LoopMonitor()
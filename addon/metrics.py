@@ -0,0 +1,114 @@
+"""In-process counters for the add-on.
+
+Everything here runs on the single asyncio loop, so plain attributes are
+enough; no locking is needed.
+"""
+from collections import deque
+
+
+class Counter:
+    """A monotonically increasing count."""
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge:
+    """A value that is set rather than accumulated."""
+
+    def __init__(self):
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return self.value
+
+
+class Timer:
+    """Accumulates durations (seconds) with a count and total."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "avg_ms": round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+        }
+
+
+class LatencyStats(Timer):
+    """A Timer that also keeps recent samples for percentiles."""
+
+    def __init__(self, window=512):
+        super().__init__()
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        super().observe(seconds)
+        self.samples.append(seconds)
+
+    def percentile(self, pct) -> float | None:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self):
+        result = super().snapshot()
+        if self.samples:
+            for pct in (50, 90, 95, 99):
+                result[f"p{pct}_ms"] = round(self.percentile(pct) * 1000, 3)
+        return result
+
+
+class MetricsRegistry:
+    """Named metrics, created on first use."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name) -> Counter:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = Counter()
+        return metric
+
+    def gauge(self, name) -> Gauge:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = Gauge()
+        return metric
+
+    def timer(self, name) -> Timer:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = Timer()
+        return metric
+
+    def latency(self, name) -> LatencyStats:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = LatencyStats()
+        return metric
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in sorted(self._metrics.items())}
+
+
+metrics = MetricsRegistry()
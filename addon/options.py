@@ -0,0 +1,25 @@
+import json
+import os
+
+OPTIONS_PATH = "/data/options.json"
+
+_options = None
+
+
+def get_options() -> dict:
+    """Add-on options from the Supervisor, loaded once."""
+    global _options
+    if _options is None:
+        _options = {}
+        if os.path.exists(OPTIONS_PATH):
+            try:
+                with open(OPTIONS_PATH, "r") as f:
+                    _options = json.load(f)
+            except Exception:
+                pass
+    return _options
+
+
+def get_option(name, default=None):
+    value = get_options().get(name)
+    return default if value is None else value
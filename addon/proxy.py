@@ -1,14 +1,21 @@
 import asyncio
+import logging
 import os
 import socket
 import time
 from aiohttp import web
 
 from intent_tools import HomeAssistantClient
+from ha_stream import ContextStream
 from web import WebHandler
+from dashboard import Dashboard
+from tracing import tracer
+from transcripts import transcripts
+from loop_monitor import LOOP_MONITOR_ENABLED, loop_monitor
 from session import GeminiSession, GEMINI_API_KEY
-from logger import logger
-from audio import ESP_INPUT_RATE, WEB_INPUT_RATE
+from logger import log_every, logger
+from audio import ESP_INPUT_RATE, ESP_OUTPUT_RATE, WEB_INPUT_RATE
+from framing import FramedLink
 
 # Configuration
 UDP_IP = "0.0.0.0"
@@ -25,18 +32,24 @@ class AudioProxy:
         self.udp_sock.setblocking(False)
 
         self.ha_client = HomeAssistantClient()
+        # Pushed context, names and state changes from the custom component
+        self.context_stream = ContextStream(self.ha_client)
         self.web_handler = WebHandler(
             self
         )  # Note: WebHandler needs updates to work with sessions
+        self.dashboard = Dashboard(self)
 
         self.sessions = {}  # Map: (ip, port) -> GeminiSession
+        # Clients that negotiated framed audio; UDP devices keep theirs
+        # until they say hello again, web clients until they disconnect
+        self.links: dict[object, FramedLink] = {}
         self.running = True
 
         # Web clients are special, we might treat them as a specific "virtual" session later
         self.web_clients = set()
         self.WEB_INPUT_RATE = WEB_INPUT_RATE
 
-        logger.info(f"Listening on UDP {UDP_IP}:{UDP_PORT}")
+        logger.info("Listening on UDP %s:%s", UDP_IP, UDP_PORT)
 
     async def udp_listener_task(self):
         loop = asyncio.get_running_loop()
@@ -46,20 +59,37 @@ class AudioProxy:
             try:
                 data, addr = await loop.sock_recvfrom(self.udp_sock, 4096)
 
-                session = self.get_session_for_client(addr, "bridge")
-                await session.process_incoming_audio(data)
+                hello = FramedLink.from_hello(f"{addr[0]}:{addr[1]}", data)
+                if hello is not None:
+                    logger.info("%s negotiated framed audio (%s Hz)", addr, hello.rate)
+                    self.links[addr] = hello
+                    await loop.sock_sendto(
+                        self.udp_sock,
+                        hello.hello_reply(ESP_OUTPUT_RATE),
+                        (addr[0], ESP_RESPONSE_PORT),
+                    )
+                    continue
+
+                link = self.links.get(addr)
+                session = self.get_session_for_client(
+                    addr, "bridge", input_rate=link.rate if link else None
+                )
+                for payload in link.receive(data) if link else (data,):
+                    await session.process_incoming_audio(payload)
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"UDP Receive Error: {e}")
+                log_every(logger, logging.ERROR, "udp_receive", "UDP Receive Error: %s", e)
                 await asyncio.sleep(0.1)
 
-    def get_session_for_client(self, client_addr, mode="bridge", token=None):
+    def get_session_for_client(self, client_addr, mode="bridge", token=None, device_id=None, input_rate=None, client_ip=None, device_key=None):
         session = self.sessions.get(client_addr)
 
         if not session or not session.running:
-            logger.info(f"Creating new session for {client_addr} in '{mode}' mode")
+            logger.info("Creating new session for %s in '%s' mode", client_addr, mode)
+            if link := self.links.get(client_addr):
+                link.reset()
 
             async def process_return_audio(chunk: bytes):
                 try:
@@ -68,21 +98,38 @@ class AudioProxy:
                         target_addr = (client_addr[0], ESP_RESPONSE_PORT)
                         loop = asyncio.get_running_loop()
                         max_size = 1024
+                        link = self.links.get(client_addr)
                         for i in range(0, len(chunk), max_size):
                             sub_chunk = chunk[i : i + max_size]
+                            if link:
+                                sub_chunk = link.wrap(sub_chunk, ESP_OUTPUT_RATE)
                             await loop.sock_sendto(self.udp_sock, sub_chunk, target_addr)
                     elif client_addr in self.web_clients: # Web client
                         if not client_addr.closed:
+                            if link := self.links.get(client_addr):
+                                chunk = link.wrap(chunk, ESP_OUTPUT_RATE)
                             await client_addr.send_bytes(chunk)
                         else:
-                            logger.warning(f"Attempted to send audio to closed WebSocket {client_addr}")
+                            log_every(
+                                logger, logging.WARNING, ("closed_ws", client_addr),
+                                "Attempted to send audio to closed WebSocket %s", client_addr,
+                            )
                             # Trigger cleanup if WebSocket is closed
                             self.remove_session_for_client(client_addr)
                 except Exception as e:
-                    logger.error(f"Error sending return audio: {e}")
+                    log_every(
+                        logger, logging.ERROR, ("return_audio", client_addr),
+                        "Error sending return audio: %s", e,
+                    )
                     if not isinstance(client_addr, tuple):
                         self.remove_session_for_client(client_addr)
 
+            async def process_event(event: dict):
+                try:
+                    if not client_addr.closed:
+                        await client_addr.send_json(event)
+                except Exception as e:
+                    logger.error("Error sending event: %s", e)
 
             session = GeminiSession(
                 client_addr,
@@ -90,21 +137,27 @@ class AudioProxy:
                 process_return_audio,
                 mode=mode,
                 token=token,
-                input_rate=ESP_INPUT_RATE if isinstance(client_addr, tuple) else WEB_INPUT_RATE
+                input_rate=input_rate or (ESP_INPUT_RATE if isinstance(client_addr, tuple) else WEB_INPUT_RATE),
+                device_id=device_id,
+                client_ip=client_ip,
+                device_key=device_key,
+                send_event=None if isinstance(client_addr, tuple) else process_event,
             )
             self.sessions[client_addr] = session
             session.task = asyncio.create_task(session.run())
         else:
-            logger.debug(f"Using existing session for {client_addr}")
+            logger.debug("Using existing session for %s", client_addr)
             session.update_activity()
 
         return session
 
     def remove_session_for_client(self, client_addr):
         if client_addr in self.sessions:
-            logger.info(f"Removing session for {client_addr}")
+            logger.info("Removing session for %s", client_addr)
             session = self.sessions.pop(client_addr)
             session.stop()
+            if not isinstance(client_addr, tuple):
+                self.links.pop(client_addr, None)
             
             # If it's a web client, also remove from web_clients set
             if client_addr in self.web_clients:
@@ -119,7 +172,7 @@ class AudioProxy:
             for addr in list(self.sessions.keys()):
                 sess = self.sessions[addr]
                 if now - sess.last_activity > SESSION_TIMEOUT_SECONDS:
-                    logger.info(f"Session {sess.id} timed out.")
+                    logger.info("Session %s timed out.", sess.id)
                     sess.running = False
                     if sess.task:
                         sess.task.cancel()
@@ -131,7 +184,12 @@ class AudioProxy:
         tasks = [
             asyncio.create_task(self.udp_listener_task()),
             asyncio.create_task(self.cleanup_task()),
+            asyncio.create_task(self.context_stream.run()),
+            asyncio.create_task(tracer.run()),
+            asyncio.create_task(transcripts.run()),
         ]
+        if LOOP_MONITOR_ENABLED:
+            tasks.append(asyncio.create_task(loop_monitor.run()))
 
         # Web Interface Setup
         app = web.Application()
@@ -141,9 +199,15 @@ class AudioProxy:
                 web.get("/ws", self.web_handler.websocket_handler),
                 web.post("/tool", self.web_handler.tool_test_handler),
                 web.get("/tools", self.web_handler.tool_list_handler),
+                web.post("/tools/reload", self.web_handler.tool_reload_handler),
                 web.get("/entities", self.web_handler.entity_list_handler),
                 web.post("/entities", self.web_handler.entities_handler),
                 web.post("/session", self.web_handler.session_handler),
+                web.get("/metrics", self.web_handler.metrics_handler),
+                web.get("/transcripts", self.web_handler.transcripts_handler),
+                web.get("/logging", self.web_handler.log_levels_handler),
+                web.post("/logging", self.web_handler.set_log_level_handler),
+                web.get("/dashboard/ws", self.dashboard.websocket_handler),
             ]
         )
         runner = web.AppRunner(app)
@@ -151,7 +215,7 @@ class AudioProxy:
         site = web.TCPSite(runner, "0.0.0.0", UDP_PORT)
         await site.start()
 
-        logger.info(f"Web Interface available at http://{UDP_IP}:{UDP_PORT}")
+        logger.info("Web Interface available at http://%s:%s", UDP_IP, UDP_PORT)
 
         try:
             # Keep main loop alive
@@ -0,0 +1,196 @@
+"""
+Opt-in session recordings for reproducing misbehaving rooms.
+
+With `record_sessions` on, each session writes one append-only file under
+/data/recordings: its raw inbound audio, the audio sent back to the device,
+Gemini's audio and events, and tool calls with their results, each stamped
+with nanoseconds since the session started. benchmarks/replay_session.py
+plays a recording back through GeminiSession against a local fake Live
+server.
+
+The file is memory-mapped and grown in large steps, so recording a packet
+is a copy into the page cache, with no write() call. A file starts with
+MAGIC, then records:
+
+    kind u8 | length u32 | at_ns u64 | payload
+
+Big-endian. Kind 0 ends the file: the mapped tail is zero-filled, so a
+recording cut short by a crash still reads back up to the last complete
+record.
+"""
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import time
+from dataclasses import dataclass
+from typing import Iterator
+
+from options import get_option
+
+logger = logging.getLogger(__name__)
+
+RECORDINGS_DIR = "/data/recordings"
+RECORDING_SUFFIX = ".glrec"
+RECORDING_ENABLED = bool(get_option("record_sessions", False))
+RECORD_MAX_BYTES = int(get_option("record_max_mb", 200)) * 1024 * 1024
+# Oldest recordings are deleted beyond this many
+RECORDINGS_KEPT = 20
+# The mapping grows this much at a time
+GROW_BYTES = 4 * 1024 * 1024
+
+MAGIC = b"GLREC1\n\0"
+RECORD = struct.Struct("!BIQ")
+
+KIND_END = 0
+KIND_META = 1
+KIND_AUDIO_IN = 2
+KIND_AUDIO_OUT = 3
+KIND_MODEL_AUDIO = 4
+KIND_EVENT = 5
+KIND_TOOL_RESULT = 6
+
+
+@dataclass(frozen=True, slots=True)
+class Record:
+    kind: int
+    at_ns: int
+    payload: bytes
+
+    def json(self) -> dict:
+        return json.loads(self.payload)
+
+
+class SessionRecorder:
+    """Appends one session's records to a memory-mapped file."""
+
+    def __init__(self, path: str, meta: dict, max_bytes: int = RECORD_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.started = time.monotonic_ns()
+        self.full = False
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.ftruncate(self._fd, GROW_BYTES)
+        self._map = mmap.mmap(self._fd, GROW_BYTES)
+        self._map[: len(MAGIC)] = MAGIC
+        self._pos = len(MAGIC)
+        self._append(KIND_META, _encode(meta))
+
+    def audio_in(self, data: bytes):
+        self._append(KIND_AUDIO_IN, data)
+
+    def audio_out(self, data: bytes):
+        self._append(KIND_AUDIO_OUT, data)
+
+    def model_audio(self, data: bytes):
+        self._append(KIND_MODEL_AUDIO, data)
+
+    def event(self, type: str, **fields):
+        self._append(KIND_EVENT, _encode({"type": type, **fields}))
+
+    def tool_result(self, calls: list[dict], results: list, ms: float):
+        self._append(KIND_TOOL_RESULT, _encode({"calls": calls, "results": results, "ms": ms}))
+
+    def _append(self, kind: int, payload: bytes):
+        if self._map is None or self.full:
+            return
+        end = self._pos + RECORD.size + len(payload)
+        if end > self.max_bytes:
+            self.full = True
+            logger.warning("Recording %s reached its size limit; stopped", self.path)
+            return
+        if end > len(self._map):
+            self._map.resize(max(end, len(self._map) + GROW_BYTES))
+        # Payload before header: a record only exists once its kind is set
+        self._map[self._pos + RECORD.size : end] = payload
+        self._map[self._pos : self._pos + RECORD.size] = RECORD.pack(
+            kind, len(payload), time.monotonic_ns() - self.started
+        )
+        self._pos = end
+
+    def close(self):
+        if self._map is None:
+            return
+        self._map.flush()
+        self._map.close()
+        self._map = None
+        # Drop the unused zero tail
+        os.ftruncate(self._fd, self._pos)
+        os.close(self._fd)
+        logger.info("Saved recording %s (%d bytes)", self.path, self._pos)
+
+
+class _NoRecorder:
+    """Stands in for a SessionRecorder when recording is off."""
+
+    __slots__ = ()
+
+    def audio_in(self, data: bytes):
+        pass
+
+    def audio_out(self, data: bytes):
+        pass
+
+    def model_audio(self, data: bytes):
+        pass
+
+    def event(self, type: str, **fields):
+        pass
+
+    def tool_result(self, calls: list[dict], results: list, ms: float):
+        pass
+
+    def close(self):
+        pass
+
+
+NO_RECORDER = _NoRecorder()
+
+
+def _encode(value: dict) -> bytes:
+    return json.dumps(value, default=str).encode()
+
+
+def start_recording(session_id: str, meta: dict) -> SessionRecorder | _NoRecorder:
+    """A recorder for a new session, or NO_RECORDER if recording is off."""
+    if not RECORDING_ENABLED:
+        return NO_RECORDER
+    try:
+        os.makedirs(RECORDINGS_DIR, exist_ok=True)
+        _prune_recordings()
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", session_id)[:64]
+        path = os.path.join(
+            RECORDINGS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}{RECORDING_SUFFIX}"
+        )
+        return SessionRecorder(path, {"session_id": session_id, "started": time.time(), **meta})
+    except OSError as e:
+        logger.error("Could not start recording for %s: %s", session_id, e)
+        return NO_RECORDER
+
+
+def _prune_recordings():
+    recordings = sorted(
+        os.path.join(RECORDINGS_DIR, name)
+        for name in os.listdir(RECORDINGS_DIR)
+        if name.endswith(RECORDING_SUFFIX)
+    )
+    for path in recordings[: max(0, len(recordings) - RECORDINGS_KEPT + 1)]:
+        os.remove(path)
+
+
+def read_recording(path: str) -> Iterator[Record]:
+    """The records in a recording, in the order they were written."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a session recording")
+    pos = len(MAGIC)
+    while pos + RECORD.size <= len(data):
+        kind, length, at_ns = RECORD.unpack_from(data, pos)
+        if kind == KIND_END or pos + RECORD.size + length > len(data):
+            return
+        start = pos + RECORD.size
+        yield Record(kind, at_ns, data[start : start + length])
+        pos = start + length
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import time
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Fails fast while Home Assistant looks unhealthy.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    rejects calls for `reset_timeout` seconds, then lets a single trial call
+    through (half-open). A success closes it again.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=15.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        # When the half-open trial call was let through
+        self._trial_started: float | None = None
+
+        self._rejections = metrics.counter("ha_breaker.rejections")
+        self._trips = metrics.counter("ha_breaker.trips")
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open":
+            now = time.monotonic()
+            # A trial that never reported back must not wedge the breaker
+            if self._trial_started is None or now - self._trial_started >= self.reset_timeout:
+                self._trial_started = now
+                return True
+        self._rejections.inc()
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_started = None
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self._trips.inc()
+                logger.warning("Home Assistant circuit breaker opened")
+            self.opened_at = time.monotonic()
+
+
+async def run_with_deadline(make_call, deadline, hedge_after=None, keep_running=False):
+    """
+    Awaits `make_call()` for at most `deadline` seconds.
+
+    With `hedge_after`, a second identical call is started if the first has
+    not finished by then, and whichever finishes first wins. On timeout the
+    calls are cancelled, unless `keep_running` is set (for writes that Home
+    Assistant may still complete), and asyncio.TimeoutError is raised.
+    """
+    loop = asyncio.get_running_loop()
+    expires_at = loop.time() + deadline
+    tasks = [asyncio.ensure_future(make_call())]
+
+    try:
+        if hedge_after is not None and hedge_after < deadline:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                metrics.counter("tool.hedged").inc()
+                tasks.append(asyncio.ensure_future(make_call()))
+
+        while tasks:
+            remaining = expires_at - loop.time()
+            if remaining <= 0:
+                break
+            done, _ = await asyncio.wait(
+                tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                tasks.remove(task)
+                if task.exception() is None:
+                    return task.result()
+                if not tasks:
+                    raise task.exception()  # type: ignore
+    finally:
+        for task in tasks:
+            if keep_running:
+                task.add_done_callback(_log_late_result)
+            else:
+                task.cancel()
+
+    raise asyncio.TimeoutError()
+
+
+def _log_late_result(task: asyncio.Task):
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        logger.error("Late tool call failed: %s", task.exception())
+    else:
+        logger.info("Late tool call finished: %s", task.result())
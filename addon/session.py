@@ -1,15 +1,26 @@
 import asyncio
+import logging
 from typing import Awaitable, Callable
 import os
 import time
 from google import genai
 from google.genai import types, live
 
-from logger import logger
+from logger import SessionLogger, log_every
 from audio import ESP_INPUT_RATE, ESP_OUTPUT_RATE, GEMINI_INPUT_RATE, GEMINI_OUTPUT_RATE, resample_audio
 from vad import VAD_CHUNK_SIZE_BYTES, VADWrapper
-from intent_tools import get_intent_tools, IntentToolHandler
+from intent_tools import IntentToolHandler
+from fast_path import FastPath
+from metrics import metrics
+from options import get_option
+from live_config import DEFAULT_VOICE, live_configs
 from device_context import fetch_context_via_http
+from context import add_context_listener, device_profile, profile_key
+from context_diff import diff_context
+from session_stats import SessionStats, cpu_timed
+from tracing import SPAN_KIND_CLIENT, TraceContext, tracer
+from recorder import start_recording
+from transcripts import Turn, transcripts
 
 # Configuration
 UDP_IP = "0.0.0.0"
@@ -18,6 +29,13 @@ ESP_RESPONSE_PORT = 7001
 
 GEMINI_MODEL = "gemini-2.5-flash-native-audio-preview-12-2025"
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+# Speculatively fire simple commands from the input transcription
+FAST_PATH_ENABLED = bool(get_option("fast_path", False))
+VOICE_NAME = get_option("voice", DEFAULT_VOICE)
+# Context changes up to this size are sent into running sessions; larger
+# ones (or header changes) reconnect with a fresh system instruction
+CONTEXT_DELTA_MAX_CHARS = int(get_option("context_delta_max_chars", 2000))
+
 
 if not GEMINI_API_KEY and os.path.exists("/data/options.json"):
     try:
@@ -28,11 +46,17 @@ if not GEMINI_API_KEY and os.path.exists("/data/options.json"):
     except Exception: pass
 
 
+class ContextReload(Exception):
+    """Raised inside a session's task group to reconnect with new context."""
+
+
 class GeminiSession:
-    def __init__(self, address, proxy_server, send_return_audio: Callable[[bytes], Awaitable[None]], mode="bridge", token=None, input_rate=ESP_INPUT_RATE):
+    def __init__(self, address, proxy_server, send_return_audio: Callable[[bytes], Awaitable[None]], mode="bridge", token=None, input_rate=ESP_INPUT_RATE, device_id=None, client_ip=None, device_key=None, send_event: Callable[[dict], Awaitable[None]] | None = None):
         self.address = address
         self.proxy = proxy_server
         self.send_return_audio = send_return_audio
+        # Control messages for clients that take them (web clients)
+        self.send_event = send_event
         self.mode = mode
         self.token = token
         self.input_rate = input_rate
@@ -41,8 +65,30 @@ class GeminiSession:
             self.id = f"{address[0]}:{address[1]}"
         else:
             self.id = str(address) # Safe for WS objects
+        self.log = SessionLogger(self.id)
 
-        logger.info(f"[{self.id}] Initializing Session for {address} in '{self.mode}' mode")
+        self.log.info("Initializing Session for %s in '%s' mode", address, self.mode)
+
+        # Satellites are matched to a context profile by device_id, else IP
+        if isinstance(address, tuple):
+            client_ip = address[0]
+        self.context_profile = device_profile(device_id or client_ip)
+        # Conversation history is kept per device, across its sessions.
+        # Browsers share the ingress proxy's IP, so a web session only has
+        # history under the key the web handler passes in
+        self.device_key: str | None = (
+            device_id or client_ip if isinstance(address, tuple) else device_key
+        )
+        # The context the model has seen: its system instruction plus any
+        # deltas sent since, and the newest pushed one not yet applied
+        self.context_text: str | None = None
+        self._pending_context: str | None = None
+        self._reload = asyncio.Event()
+        self._reloading = False
+        # Context updates in flight, held until they finish
+        self._context_tasks: set[asyncio.Task] = set()
+        self.live_session: live.AsyncSession | None = None
+        self.connections = 0
 
         self.audio_queue_mic = asyncio.Queue()
         self.audio_queue_speaker: asyncio.Queue[bytes] = asyncio.Queue()
@@ -51,13 +97,43 @@ class GeminiSession:
 
         api_key_to_use = self.token if self.mode == "direct" and self.token else GEMINI_API_KEY
         if not api_key_to_use:
-            logger.error(f"[{self.id}] Session cannot start: No API key or token provided.")
+            self.log.error("Session cannot start: No API key or token provided.")
             raise ValueError("API key or token required.")
 
         self.client = genai.Client(
             api_key=api_key_to_use, http_options={"api_version": "v1alpha"}
         )
-        self.tool_handler = IntentToolHandler(self.proxy.ha_client)
+        self.fast_path = FastPath(self.proxy.ha_client) if FAST_PATH_ENABLED else None
+        self.tool_handler = IntentToolHandler(self.proxy.ha_client, self.fast_path)
+        # The current utterance as the fast path sees it; only built when
+        # the fast path is on
+        self.input_transcript = ""
+        # The current utterance and reply. They are logged and stored whole,
+        # once each; fragments only at debug
+        self.user_transcript = ""
+        self.output_transcript = ""
+        # Wall-clock start of the utterance and reply being transcribed
+        self._input_started: float | None = None
+        self._output_started: float | None = None
+        self.started_at = time.monotonic()
+        self.first_audio_at: float | None = None
+        # When the user's speech was last transcribed; the model's reply
+        # latency is measured from here
+        self.last_input_at: float | None = None
+        # Latest playback report from the client (see record_playback_stats)
+        self.playback: dict | None = None
+        self._reported_underruns = 0
+        self.stats = SessionStats()
+        self.trace = TraceContext(self.id)
+        self.recorder = start_recording(
+            self.id,
+            {
+                "mode": self.mode,
+                "input_rate": self.input_rate,
+                "model": GEMINI_MODEL,
+                "context_profile": self.context_profile,
+            },
+        )
 
         self.ai_is_speaking = False
         self.last_activity = time.time()
@@ -73,17 +149,185 @@ class GeminiSession:
         if self.task:
             self.task.cancel()
 
+    def _end_session(self):
+        """Called when a session task exits; ends the session unless reconnecting."""
+        if self.task and not self._reloading:
+            self.task.cancel()
+
+    def on_context_changed(self, key: str, text: str):
+        """Context listener: queues a pushed context for this session's profile."""
+        if key != profile_key(self.context_profile) or self.context_text is None:
+            return
+        self._pending_context = text
+        # Never talk over the model; a pending change is applied at turn end
+        if self.live_session is not None and not self.ai_is_speaking:
+            task = asyncio.create_task(self.apply_pending_context(self.live_session))
+            self._context_tasks.add(task)
+            task.add_done_callback(self._context_task_done)
+
+    def _context_task_done(self, task: asyncio.Task):
+        self._context_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.log.error("Context update failed: %s", task.exception())
+
+    async def apply_pending_context(self, session: live.AsyncSession):
+        """
+        Sends the difference between the context the model has and the
+        pending one as client content, or reconnects if it is too large.
+        """
+        text, self._pending_context = self._pending_context, None
+        if text is None or self.context_text is None:
+            return
+        delta = diff_context(self.context_text, text)
+        if delta == "":
+            return
+        if delta is None or len(delta) > CONTEXT_DELTA_MAX_CHARS:
+            self.log.info("Context changed too much for a delta; reconnecting")
+            self._reload.set()
+            return
+
+        self.context_text = text
+        try:
+            with tracer.span(self.trace, "context.update", SPAN_KIND_CLIENT, chars=len(delta)):
+                await session.send_client_content(
+                    turns=types.Content(role="user", parts=[types.Part(text=delta)]),
+                    turn_complete=False,
+                )
+        except Exception as e:
+            self.log.error("Context update failed: %s", e)
+            self._reload.set()
+            return
+        metrics.counter("session.context_deltas").inc()
+        self.log.info("Sent %d char context update", len(delta))
+
+    def record_playback_stats(self, stats: dict):
+        """Takes a client's jitter buffer report: depth, target, jitter and underruns."""
+        self.playback = stats
+        metrics.gauge("playback.depth_ms").set(stats.get("depth_ms", 0))
+        metrics.gauge("playback.target_ms").set(stats.get("target_ms", 0))
+        metrics.gauge("playback.jitter_ms").set(stats.get("jitter_ms", 0))
+        underruns = int(stats.get("underruns", 0))
+        if underruns > self._reported_underruns:
+            metrics.counter("playback.underruns").inc(underruns - self._reported_underruns)
+        self._reported_underruns = underruns
+
+    def _record_response_latency(self):
+        """
+        On the first audio of a model turn: time since the user was last
+        heard, plus the client's buffer depth when it reports one (the
+        audio is heard that much later than it is sent).
+        """
+        turn = self.stats.start_turn()
+        turn.first_audio_at = time.monotonic()
+        if self.last_input_at is None:
+            return
+        response = time.monotonic() - self.last_input_at
+        self.last_input_at = None
+        turn.response_ms = response * 1000
+        metrics.latency("session.response").observe(response)
+        attributes = {}
+        if self.playback is not None:
+            depth = self.playback.get("depth_ms", 0) / 1000
+            metrics.latency("session.end_to_end").observe(response + depth)
+            attributes["playback_depth_ms"] = round(depth * 1000)
+        now = time.time_ns()
+        tracer.record(self.trace, "gemini.response", now - int(response * 1e9), now, attributes)
+
+    def _finish_input(self, speculate: bool = True):
+        """
+        Ends the user's utterance: logs and stores it and, unless
+        `speculate` is False, hands it to the fast path.
+        """
+        now = time.time()
+        if self.user_transcript:
+            self.log.info("Transcript (Input): %s", self.user_transcript)
+            if self.device_key is not None:
+                transcripts.add(
+                    Turn(
+                        self.device_key, self.id, "user", self.user_transcript,
+                        self._input_started or now, now,
+                    )
+                )
+            self.user_transcript = ""
+        self._input_started = None
+        if self.input_transcript:
+            if speculate:
+                self.fast_path.on_transcript(self.input_transcript)
+            self.input_transcript = ""
+
+    def _finish_output(self, interrupted: bool = False):
+        """Ends the model's reply: logs and stores it."""
+        now = time.time()
+        if self.output_transcript:
+            self.log.info("Transcript (Output): %s", self.output_transcript)
+            if self.device_key is not None:
+                transcripts.add(
+                    Turn(
+                        self.device_key, self.id, "model", self.output_transcript,
+                        self._output_started or now, now, interrupted,
+                    )
+                )
+            self.output_transcript = ""
+        self._output_started = None
+
+    async def send_recap(self, session: live.AsyncSession):
+        """
+        Tells a fresh connection what was said recently on this device,
+        since the model starts every connection without it.
+        """
+        if self.device_key is None:
+            return
+        recap = transcripts.recap(self.device_key)
+        if recap is None:
+            return
+        try:
+            with tracer.span(self.trace, "context.recap", SPAN_KIND_CLIENT, chars=len(recap)):
+                await session.send_client_content(
+                    turns=types.Content(role="user", parts=[types.Part(text=recap)]),
+                    turn_complete=False,
+                )
+        except Exception as e:
+            self.log.warning("Could not send conversation recap: %s", e)
+            return
+        metrics.counter("session.recaps").inc()
+        self.log.info("Sent %d char conversation recap", len(recap))
+
+    async def interrupt_playback(self):
+        """Drops queued output audio and tells the client to flush its buffer."""
+        now = time.time_ns()
+        tracer.record(
+            self.trace, "gemini.interrupted", now, now,
+            {"dropped_chunks": self.audio_queue_speaker.qsize()},
+        )
+        self.ai_is_speaking = False
+        while not self.audio_queue_speaker.empty():
+            self.audio_queue_speaker.get_nowait()
+        if self.send_event:
+            await self.send_event({"type": "interrupted"})
+
+    async def reload_watch_task(self):
+        await self._reload.wait()
+        self._reloading = True
+        raise ContextReload()
+
     async def process_incoming_audio(self, raw_audio):
         self.update_activity()
+        self.stats.mic_packets += 1
+        self.stats.mic_bytes += len(raw_audio)
+        self.recorder.audio_in(raw_audio)
+        with tracer.audio_span(self.trace, "audio.in", bytes=len(raw_audio)) as span:
+            await self._process_incoming_audio(raw_audio, span)
 
+    async def _process_incoming_audio(self, raw_audio, span):
         # 1. Resample
-        audio_16k = (
-            raw_audio
-            if self.input_rate == GEMINI_INPUT_RATE
-            else await asyncio.to_thread(
-                resample_audio, raw_audio, self.input_rate, GEMINI_INPUT_RATE
+        if self.input_rate == GEMINI_INPUT_RATE:
+            audio_16k = raw_audio
+        else:
+            audio_16k, cpu = await asyncio.to_thread(
+                cpu_timed, resample_audio, raw_audio, self.input_rate, GEMINI_INPUT_RATE
             )
-        )
+            self.stats.resample_cpu += cpu
+            span.set("resample_cpu_ms", round(cpu * 1000, 3))
 
         # 2. VAD Buffering
         self.vad_buffer.extend(audio_16k)
@@ -94,100 +338,135 @@ class GeminiSession:
             del self.vad_buffer[:VAD_CHUNK_SIZE_BYTES]
 
             if self.ai_is_speaking:
-                prob = await asyncio.to_thread(self.vad.is_speech, chunk)
+                prob, cpu = await asyncio.to_thread(cpu_timed, self.vad.is_speech, chunk)
+                self.stats.vad_cpu += cpu
+                self.stats.vad_chunks += 1
+                span.set("vad_probability", round(float(prob), 3))
                 if prob > 0.8:
-                    logger.debug(f"[{self.id}] Barge-in detected!")
+                    self.stats.vad_speech += 1
+                    self.log.debug("Barge-in detected!")
                     await self.audio_queue_mic.put(chunk)
             else:
                 await self.audio_queue_mic.put(chunk)
 
     async def run(self):
         """Main lifecycle for this specific session connection."""
-        logger.info(f"[{self.id}] Starting Gemini Session")
-
-        # Determine Context based on IP (Optional: You can add a map here)
-        # e.g. "You are in the Kitchen" if self.address[0] == "192.168.1.50"
-        context = await fetch_context_via_http()
-        base_instruction = "You are a helpful and friendly AI assistant. Be concise."
-        full_system_instruction = f"{base_instruction}\n\n{context}"
-
-        config = types.LiveConnectConfig(
-            response_modalities=[types.Modality.AUDIO],
-            tools=get_intent_tools(),
-            system_instruction=types.Content(
-                parts=[types.Part.from_text(text=full_system_instruction)],
-                role="user",
-            ),
-            speech_config=types.SpeechConfig(
-                voice_config=types.VoiceConfig(
-                    prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name="Aoede")
-                )
-            ),
-            output_audio_transcription=types.AudioTranscriptionConfig(),
-            input_audio_transcription=types.AudioTranscriptionConfig(),
-            realtime_input_config=types.RealtimeInputConfig(
-                turn_coverage=types.TurnCoverage.TURN_INCLUDES_ALL_INPUT
-            ),
-        )
+        self.log.info("Starting Gemini Session")
+        remove_listener = add_context_listener(self.on_context_changed)
 
         try:
+            while await self._connect_once():
+                self.log.info("Reconnecting with updated context")
+                metrics.counter("session.context_reconnects").inc()
+
+        except asyncio.CancelledError:
+            self.log.info("Session cancelled")
+        except Exception as e:
+            self.log.error("Session Error: %s", e)
+        finally:
+            remove_listener()
+            self.recorder.close()
+            self.live_session = None
+            self.running = False
+            # Remove self from proxy registry
+            if self.address in self.proxy.sessions:
+                del self.proxy.sessions[self.address]
+            self.log.info("Session Closed")
+
+    async def _connect_once(self) -> bool:
+        """Runs one Live connection; True if it ended to reload the context."""
+        self._reload.clear()
+        self._reloading = False
+        # Scoped to this satellite's areas when it has a device profile
+        context = await fetch_context_via_http(self.context_profile)
+        config = live_configs.get(context, self.context_profile, VOICE_NAME)
+        self.context_text = context
+        self._pending_context = None
+
+        try:
+            connecting = time.time_ns()
             async with self.client.aio.live.connect(
                 model=GEMINI_MODEL, config=config
             ) as session:
-                logger.info(f"[{self.id}] Connected to API")
+                self.log.info("Connected to API")
+                tracer.record(
+                    self.trace, "gemini.connect", connecting, time.time_ns(),
+                    {"connection": self.connections}, SPAN_KIND_CLIENT,
+                )
+                if not self.connections:
+                    metrics.latency("session.setup").observe(
+                        time.monotonic() - self.started_at
+                    )
+                self.connections += 1
+                self.live_session = session
+                self.recorder.event("connect", connection=self.connections, context=context)
+                await self.send_recap(session)
 
                 async with asyncio.TaskGroup() as tg:
                     tg.create_task(self.sender_task(session))
                     tg.create_task(self.receiver_task(session))
                     tg.create_task(self.speaker_output_task())
-
-        except asyncio.CancelledError:
-            logger.info(f"[{self.id}] Session cancelled")
-        except Exception as e:
-            logger.error(f"[{self.id}] Session Error: {e}")
+                    tg.create_task(self.reload_watch_task())
+        except* ContextReload:
+            pass
         finally:
-            self.running = False
-            # Remove self from proxy registry
-            if self.address in self.proxy.sessions:
-                del self.proxy.sessions[self.address]
-            logger.info(f"[{self.id}] Session Closed")
+            self.live_session = None
+        return self._reloading
 
     async def sender_task(self, session: live.AsyncSession):
         while self.running:
             try:
                 chunk = await self.audio_queue_mic.get()
-                await session.send_realtime_input(
-                    audio={
-                        "data": chunk,
-                        "mime_type": f"audio/pcm;rate={GEMINI_INPUT_RATE}",
-                    }
-                )
+                with tracer.audio_span(
+                    self.trace, "gemini.send", SPAN_KIND_CLIENT,
+                    bytes=len(chunk), queued=self.audio_queue_mic.qsize(),
+                ):
+                    await session.send_realtime_input(
+                        audio={
+                            "data": chunk,
+                            "mime_type": f"audio/pcm;rate={GEMINI_INPUT_RATE}",
+                        }
+                    )
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"[{self.id}] Send Error: {e}")
+                self.log.error("Send Error: %s", e)
                 break
-        if self.task:
-          self.task.cancel()
+        self._end_session()
 
     async def receiver_task(self, session: live.AsyncSession):
         while self.running:
             try:
                 async for response in session.receive():
                     if response.tool_call:
-                        function_responses = []
                         function_calls = response.tool_call.function_calls or []
-                        for call in function_calls:
-                            result = await self.tool_handler.handle_tool_call(
-                                call.name, call.args
+                        calls = [
+                            {"id": call.id, "name": call.name, "args": call.args}
+                            for call in function_calls
+                        ]
+                        self.recorder.event("tool_call", calls=calls)
+                        # All calls from one tool_call go to HA in a single batch
+                        started = time.monotonic()
+                        with tracer.span(
+                            self.trace, "tool.dispatch", SPAN_KIND_CLIENT,
+                            tools=[call.name for call in function_calls],
+                        ):
+                            results = await self.tool_handler.handle_tool_calls(
+                                [(call.name, call.args) for call in function_calls]
                             )
-                            function_responses.append(
-                                types.FunctionResponse(
-                                    name=call.name,
-                                    id=call.id,
-                                    response={"result": result},
-                                )
+                        elapsed_ms = (time.monotonic() - started) * 1000
+                        self.stats.start_turn().tool_calls.append(
+                            ([call.name for call in function_calls], elapsed_ms)
+                        )
+                        self.recorder.tool_result(calls, results, elapsed_ms)
+                        function_responses = [
+                            types.FunctionResponse(
+                                name=call.name,
+                                id=call.id,
+                                response={"result": result},
                             )
+                            for call, result in zip(function_calls, results)
+                        ]
                         if function_responses:
                             await session.send_tool_response(
                                 function_responses=function_responses
@@ -199,35 +478,86 @@ class GeminiSession:
                             turn_parts = server_content.model_turn.parts or []
                             for part in turn_parts:
                                 if part.inline_data:
+                                    if not self.ai_is_speaking:
+                                        self._record_response_latency()
                                     self.ai_is_speaking = True
+                                    if self.first_audio_at is None:
+                                        self.first_audio_at = time.monotonic()
+                                        metrics.latency("session.first_audio").observe(
+                                            self.first_audio_at - self.started_at
+                                        )
                                     audio_24k = part.inline_data.data
-                                    audio_48k = await asyncio.to_thread(
-                                        resample_audio,
-                                        audio_24k,
-                                        GEMINI_OUTPUT_RATE,
-                                        ESP_OUTPUT_RATE,
-                                    )
+                                    self.recorder.model_audio(audio_24k)
+                                    with tracer.audio_span(
+                                        self.trace, "audio.out.resample", bytes=len(audio_24k)
+                                    ):
+                                        audio_48k, cpu = await asyncio.to_thread(
+                                            cpu_timed,
+                                            resample_audio,
+                                            audio_24k,
+                                            GEMINI_OUTPUT_RATE,
+                                            ESP_OUTPUT_RATE,
+                                        )
+                                    self.stats.resample_cpu += cpu
+                                    self.stats.start_turn().audio_bytes += len(audio_24k)
                                     await self.audio_queue_speaker.put(audio_48k)
 
+                        if server_content.interrupted:
+                            self.recorder.event("interrupted")
+                            self._finish_output(interrupted=True)
+                            await self.interrupt_playback()
+
                         if server_content.turn_complete:
+                            self.recorder.event("turn_complete")
+                            # Without a finished transcription the model has
+                            # already answered, too late to get ahead of it
+                            self._finish_input(speculate=False)
+                            self._finish_output()
                             self.ai_is_speaking = False
+                            self.stats.end_turn(GEMINI_OUTPUT_RATE * 2)
+                            tracer.end_turn(self.trace, connection=self.connections)
+                            if self.fast_path:
+                                self.fast_path.end_turn()
+                            if self._pending_context is not None:
+                                await self.apply_pending_context(session)
 
                         if server_content.output_transcription:
-                            logger.info(
-                                f"Transcript (Output): {server_content.output_transcription.text}"
+                            self.recorder.event(
+                                "output_transcription",
+                                text=server_content.output_transcription.text,
+                            )
+                            self.log.debug(
+                                "Transcript fragment (Output): %s",
+                                server_content.output_transcription.text,
+                            )
+                            if self._output_started is None:
+                                self._output_started = time.time()
+                            self.output_transcript += (
+                                server_content.output_transcription.text or ""
                             )
                         if server_content.input_transcription:
-                            logger.info(
-                                f"Transcript (Input): {server_content.input_transcription.text}"
+                            transcription = server_content.input_transcription
+                            self.recorder.event(
+                                "input_transcription",
+                                text=transcription.text,
+                                finished=bool(transcription.finished),
                             )
+                            self.last_input_at = time.monotonic()
+                            self.log.debug("Transcript fragment (Input): %s", transcription.text)
+                            if self._input_started is None:
+                                self._input_started = time.time()
+                            self.user_transcript += transcription.text or ""
+                            if self.fast_path:
+                                self.input_transcript += transcription.text or ""
+                            if transcription.finished:
+                                self._finish_input()
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"[{self.id}] Receive Error: {e}")
+                self.log.error("Receive Error: %s", e)
                 break
-        if self.task:
-          self.task.cancel()
+        self._end_session()
 
     async def speaker_output_task(self):
         """Sends audio back to the specific UDP address for this session."""
@@ -235,7 +565,14 @@ class GeminiSession:
         while self.running:
             try:
                 chunk = await self.audio_queue_speaker.get()
-                await self.send_return_audio(chunk)
+                with tracer.audio_span(
+                    self.trace, "audio.out", bytes=len(chunk),
+                    queued=self.audio_queue_speaker.qsize(),
+                ):
+                    await self.send_return_audio(chunk)
+                self.recorder.audio_out(chunk)
+                self.stats.speaker_chunks += 1
+                self.stats.speaker_bytes += len(chunk)
 
                 # # Send back to specific ESP address
                 # target_addr = (self.address[0], ESP_RESPONSE_PORT)
@@ -248,6 +585,5 @@ class GeminiSession:
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"[{self.id}] UDP Send Error: {e}")
-        if self.task:
-          self.task.cancel()
+                log_every(self.log, logging.ERROR, ("send", self.id), "UDP Send Error: %s", e)
+        self._end_session()
@@ -0,0 +1,110 @@
+"""Per-session counters sampled by the live dashboard.
+
+Updating them is a few integer additions on the hot path; rates and CPU
+percentages are only derived when the dashboard takes a sample.
+"""
+import time
+from collections import deque
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+# Completed turns kept per session
+TURN_HISTORY = 10
+
+
+def cpu_timed(func: Callable[..., T], *args) -> tuple[T, float]:
+    """Runs `func` and returns its result and the CPU seconds its thread used."""
+    started = time.thread_time()
+    result = func(*args)
+    return result, time.thread_time() - started
+
+
+class Turn:
+    """Latency breakdown of one model turn."""
+
+    __slots__ = ("started", "response_ms", "first_audio_at", "tool_calls", "audio_bytes")
+
+    def __init__(self, started: float, response_ms: float | None = None):
+        self.started = started
+        # From the user's last transcribed speech to the first reply audio
+        self.response_ms = response_ms
+        self.first_audio_at: float | None = None
+        # (tool names, batch milliseconds) per tool call batch
+        self.tool_calls: list[tuple[list[str], float]] = []
+        self.audio_bytes = 0
+
+    def to_dict(self, ended: float, bytes_per_second: int) -> dict:
+        return {
+            "response_ms": _ms(self.response_ms),
+            "first_audio_ms": _ms(
+                (self.first_audio_at - self.started) * 1000 if self.first_audio_at else None
+            ),
+            "tool_ms": _ms(sum(ms for _, ms in self.tool_calls)),
+            "tools": [{"names": names, "ms": _ms(ms)} for names, ms in self.tool_calls],
+            "duration_ms": _ms((ended - self.started) * 1000),
+            "audio_ms": _ms(self.audio_bytes * 1000 / bytes_per_second),
+        }
+
+
+def _ms(value: float | None) -> float | None:
+    return None if value is None else round(value, 1)
+
+
+class SessionStats:
+    """Traffic, VAD and CPU counters for one session, plus recent turns."""
+
+    def __init__(self):
+        self.mic_packets = 0
+        self.mic_bytes = 0
+        self.speaker_chunks = 0
+        self.speaker_bytes = 0
+        self.vad_chunks = 0
+        self.vad_speech = 0
+        self.resample_cpu = 0.0
+        self.vad_cpu = 0.0
+        self.turn: Turn | None = None
+        self.turns: deque[dict] = deque(maxlen=TURN_HISTORY)
+        # Totals at the previous sample, for rates
+        self._sampled_at = time.monotonic()
+        self._sampled: tuple[int, int, float, float] = (0, 0, 0.0, 0.0)
+
+    def start_turn(self, response_ms: float | None = None) -> Turn:
+        if self.turn is None:
+            self.turn = Turn(time.monotonic(), response_ms)
+        return self.turn
+
+    def end_turn(self, bytes_per_second: int):
+        if self.turn is not None:
+            self.turns.append(self.turn.to_dict(time.monotonic(), bytes_per_second))
+            self.turn = None
+
+    def sample(self) -> dict:
+        """Rates and CPU use since the previous sample."""
+        now = time.monotonic()
+        elapsed = max(now - self._sampled_at, 1e-6)
+        mic, speaker, resample_cpu, vad_cpu = self._sampled
+        rates = {
+            "mic_pps": round((self.mic_packets - mic) / elapsed, 1),
+            "speaker_pps": round((self.speaker_chunks - speaker) / elapsed, 1),
+            "resample_cpu_pct": round((self.resample_cpu - resample_cpu) * 100 / elapsed, 2),
+            "vad_cpu_pct": round((self.vad_cpu - vad_cpu) * 100 / elapsed, 2),
+        }
+        self._sampled_at = now
+        self._sampled = (
+            self.mic_packets,
+            self.speaker_chunks,
+            self.resample_cpu,
+            self.vad_cpu,
+        )
+        return {
+            **rates,
+            "mic_packets": self.mic_packets,
+            "mic_bytes": self.mic_bytes,
+            "speaker_chunks": self.speaker_chunks,
+            "speaker_bytes": self.speaker_bytes,
+            "vad_speech_ratio": (
+                round(self.vad_speech / self.vad_chunks, 3) if self.vad_chunks else None
+            ),
+            "turns": list(self.turns),
+        }
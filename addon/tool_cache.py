@@ -0,0 +1,129 @@
+import json
+import time
+
+from metrics import metrics
+from tool_registry import registry
+
+# Argument keys whose string values are matched case-insensitively by HA.
+_CASE_INSENSITIVE_KEYS = {"name", "area", "floor"}
+
+_MISS = object()
+
+
+def normalize_args(args) -> str:
+    """Stable cache key for a tool's arguments."""
+    normalized = {}
+    for key, value in (args or {}).items():
+        if value is None:
+            continue
+        if key in _CASE_INSENSITIVE_KEYS and isinstance(value, str):
+            value = value.strip().lower()
+        elif isinstance(value, list):
+            value = sorted(value, key=str)
+        normalized[key] = value
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "entity_ids", "fetch_seconds")
+
+    def __init__(self, value, expires_at, entity_ids, fetch_seconds):
+        self.value = value
+        self.expires_at = expires_at
+        # None means the result depends on every entity (e.g. a full state dump).
+        self.entity_ids = entity_ids
+        self.fetch_seconds = fetch_seconds
+
+
+class ToolResultCache:
+    """
+    Read-through cache for read-only tool results.
+
+    Entries are keyed by tool name plus normalized arguments, expire after the
+    tool's declared `cache_ttl`, and are dropped early when an entity they
+    depend on changes.
+    """
+
+    MISS = _MISS
+
+    def __init__(self):
+        self._entries: dict[tuple[str, str], _Entry] = {}
+
+        self._hits = metrics.counter("tool_cache.hits")
+        self._misses = metrics.counter("tool_cache.misses")
+        self._invalidations = metrics.counter("tool_cache.invalidations")
+        self._saved = metrics.timer("tool_cache.saved_latency")
+
+    def is_cacheable(self, tool_name) -> bool:
+        spec = registry.get(tool_name)
+        return bool(spec and spec.read_only and spec.cache_ttl)
+
+    def get(self, tool_name, args):
+        """Returns the cached result, or `ToolResultCache.MISS`."""
+        if not self.is_cacheable(tool_name):
+            return _MISS
+
+        key = (tool_name, normalize_args(args))
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self._misses.inc()
+            return _MISS
+
+        self._hits.inc()
+        self._saved.observe(entry.fetch_seconds)
+        return entry.value
+
+    def put(self, tool_name, args, value, fetch_seconds, entity_ids=None):
+        spec = registry.get(tool_name)
+        # Empty results and errors are usually HA being unreachable
+        if not self.is_cacheable(tool_name) or not value:
+            return
+        if isinstance(value, str) and value.startswith("Error"):
+            return
+        if spec.stateless:
+            entity_ids = frozenset()
+        elif entity_ids is not None:
+            entity_ids = frozenset(entity_ids)
+
+        key = (tool_name, normalize_args(args))
+        self._entries[key] = _Entry(
+            value,
+            time.monotonic() + spec.cache_ttl,
+            entity_ids,
+            fetch_seconds,
+        )
+
+    def invalidate_entities(self, entity_ids=None):
+        """
+        Drops entries that depend on the given entities.
+        With no entity ids, every entity-dependent entry is dropped.
+        """
+        changed = set(entity_ids or ())
+        stale = []
+        for key, entry in self._entries.items():
+            if entry.entity_ids is not None and not entry.entity_ids:
+                continue  # Does not depend on entity state
+            if not changed or entry.entity_ids is None or entry.entity_ids & changed:
+                stale.append(key)
+
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self._invalidations.inc(len(stale))
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        hits = self._hits.value
+        total = hits + self._misses.value
+        return {
+            "entries": len(self._entries),
+            "hits": hits,
+            "misses": self._misses.value,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "invalidations": self._invalidations.value,
+            "saved_latency_ms": round(self._saved.total * 1000, 3),
+        }
@@ -0,0 +1,593 @@
+"""
+Declarations for every tool the add-on exposes to Gemini.
+
+Each ToolSpec holds a tool's schema together with how its arguments become an
+intent (or which handler answers it). The registry in tool_registry.py loads
+TOOLS from this module, so editing it and calling registry.reload() takes
+effect without restarting the add-on.
+"""
+import datetime
+import logging
+
+from tool_registry import ToolSpec
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_proxy_set_state(args):
+    """Maps generic state changes to HassTurnOn/Off intents."""
+    state = args.get("state")
+    data = {k: v for k, v in args.items() if k != "state"}
+
+    intent_name = "HassTurnOn"  # Default
+
+    # Map generic 'state' to Intent + inferred slots if necessary
+    if state == "on":
+        intent_name = "HassTurnOn"
+    elif state == "off":
+        intent_name = "HassTurnOff"
+    elif state == "open":
+        intent_name = "HassTurnOn"
+        # Explicitly helps HA infer it's a cover if no device_class provided
+        if "device_class" not in data and "domain" not in data:
+            data["domain"] = "cover"
+    elif state == "close":
+        intent_name = "HassTurnOff"
+        if "device_class" not in data and "domain" not in data:
+            data["domain"] = "cover"
+    elif state == "lock":
+        # In HA Intent Land: 'Turning On' a lock usually means engaging it (Locking)
+        intent_name = "HassTurnOn"
+        if "device_class" not in data:
+            data["device_class"] = "lock"
+    elif state == "unlock":
+        # 'Turning Off' a lock usually means disengaging it (Unlocking)
+        intent_name = "HassTurnOff"
+        if "device_class" not in data:
+            data["device_class"] = "lock"
+
+    return intent_name, data
+
+
+def resolve_proxy_media_control(args):
+    """Maps media commands to specific media intents."""
+    command = args.get("command")
+    data = {k: v for k, v in args.items() if k != "command"}
+
+    if command == "play":
+        intent_name = "HassMediaUnpause"  # Resume/Play
+    elif command == "pause":
+        intent_name = "HassMediaPause"
+    elif command == "next":
+        intent_name = "HassMediaNext"
+    elif command == "previous":
+        intent_name = "HassMediaPrevious"
+    elif command == "stop":
+        # intents.yaml does not have HassMediaStop.
+        # HassTurnOff is the standard equivalent for stopping media devices.
+        intent_name = "HassTurnOff"
+        if "domain" not in data:
+            data["domain"] = "media_player"
+    else:
+        raise ValueError("Unknown media command")
+
+    return intent_name, data
+
+
+def resolve_proxy_control_volume(args):
+    """Maps volume tools to Absolute or Relative volume intents."""
+    mode = args.get("mode")
+    level = args.get("level")
+    data = {k: v for k, v in args.items() if k not in ["mode", "level"]}
+
+    if mode == "set":
+        data["volume_level"] = level
+        return "HassSetVolume", data
+    elif mode in ["increase", "decrease"]:
+        # HassSetVolumeRelative takes 'volume_step' (percentage) NOT 'level'
+        # Note: The tool uses 'level' for both, but intents.yaml expects 'volume_step'
+
+        # Check if level is provided, otherwise default to a reasonable step
+        step = level if level else 10
+
+        if mode == "decrease":
+            step = -abs(step)  # Ensure negative
+        else:
+            step = abs(step)
+
+        data["volume_step"] = step
+        return "HassSetVolumeRelative", data
+
+    raise ValueError("Invalid volume mode")
+
+
+async def handle_get_live_context(ha, args):
+    """Helper to get state data for answering questions (Not an intent)."""
+    # Logic reused from tools.py to support 'GetLiveContext'
+    payload = args or {}
+
+    # Name resolution
+    if "name" in payload and "entity_id" not in payload:
+        eid = ha.entities.get(payload["name"].lower())
+        if eid:
+            payload["entity_id"] = eid
+        elif "." in payload["name"]:
+            payload["entity_id"] = payload["name"]
+
+    if "entity_id" in payload:
+        return await ha.get_state(payload["entity_id"])
+
+    # Fallback: Return summary of all states
+    states = (await ha.get_states()) or []
+    summary = []
+    for s in states:
+        summary.append(f"{s['entity_id']}: {s['state']}")
+    logger.info("GetLiveContext returning %d states", len(summary))
+    return "\n".join(summary)
+
+
+async def handle_todo_get_items(ha, args):
+    """Returns the items of a todo list via the todo.get_items service."""
+    eid = args.get("entity_id")
+    if not eid and "name" in args:
+        name = args["name"]
+        eid = ha.entities.get(name.lower()) or (name if "." in name else None)
+    if not eid:
+        return "Error: Could not resolve todo list"
+    args["entity_id"] = eid
+
+    data = {"entity_id": eid}
+    if args.get("status"):
+        data["status"] = args["status"]
+
+    response = await ha.call_service(
+        "todo", "get_items", data, return_response=True
+    )
+    if response is None:
+        return None
+    return response.get(eid, response)
+
+
+
+def resolve_intent_raw(args):
+    return args.get("name"), args.get("data")
+
+
+def resolve_set_mute(args):
+    intent = "HassMediaPlayerMute" if args.get("mute") else "HassMediaPlayerUnmute"
+    # Filter args to valid slots (name, area)
+    data = {k: v for k, v in args.items() if k in ["name", "area"]}
+    return intent, data
+
+
+def resolve_adjust_timer(args):
+    operation = args.pop("operation")
+    intent = "HassIncreaseTimer" if operation == "increase" else "HassDecreaseTimer"
+    return intent, args
+
+
+def resolve_pause_resume_timer(args):
+    action = args.pop("action")
+    intent = "HassPauseTimer" if action == "pause" else "HassUnpauseTimer"
+    return intent, args
+
+
+async def handle_get_date_time(ha, args):
+    return datetime.datetime.now().isoformat()
+
+
+TOOLS = [
+    ToolSpec(
+        name="ProxySetState",
+        description="Changes the state of a device. Use this to turn things on/off, lock/unlock locks, or open/close covers. [name, area, area+name, area+domain, area+device_class, device_class+domain]",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "state": {
+                    "type": "STRING",
+                    "enum": [
+                        "on",
+                        "off",
+                        "lock",
+                        "unlock",
+                        "open",
+                        "close",
+                    ],
+                    # "description": "The desired state. Use 'on' for activating, 'lock' for locks, 'open' for covers."
+                },
+                "name": {"type": "STRING"},
+                "entity_id": {"type": "STRING"},
+                "area": {"type": "STRING"},
+                "device_class": {
+                    "type": "STRING",
+                    "enum": [
+                        "tv",
+                        "speaker",
+                        "switch",
+                        "light",
+                        "fan",
+                        "lock",
+                        "cover",
+                    ],
+                    "default": "light",
+                },
+            },
+            "required": ["state"],
+        },
+        resolve=resolve_proxy_set_state,
+        idempotent=True,
+    ),
+    ToolSpec(
+        name="HassLightSet",
+        description="Sets the brightness or color of a light. [name+brightness, name+color, brightness, area+brightness, color, area+color]",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "brightness": {
+                    "type": "INTEGER",
+                    "description": "0 to 100",
+                },
+                "color": {
+                    "type": "STRING",
+                    "description": "Color name or RGB value",
+                },
+                # "temperature": {
+                #     "type": "INTEGER",
+                #     "description": "Kelvin value",
+                # },
+                "name": {"type": "STRING"},
+                "entity_id": {"type": "STRING"},
+                "area": {"type": "STRING"},
+            },
+        },
+        intent="HassLightSet",
+        idempotent=True,
+    ),
+    ToolSpec(
+        name="HassFanSetSpeed",
+        description="Sets a fan's speed percentage. [name, area]",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "percentage": {"type": "INTEGER"},
+                "name": {"type": "STRING"},
+                "entity_id": {"type": "STRING"},
+                "area": {"type": "STRING"},
+            },
+            "required": ["percentage"],
+        },
+        intent="HassFanSetSpeed",
+        idempotent=True,
+    ),
+    # Media
+    ToolSpec(
+        name="HassMediaSearchAndPlay",
+        description="Searches for media and plays it. [NONE, area, name, name+area]",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "search_query": {"type": "STRING"},
+                "media_class": {
+                    "type": "STRING",
+                    "enum": [
+                        "music",
+                        "tv_show",
+                        "movie",
+                        "podcast",
+                        "video",
+                    ],
+                },
+                "name": {"type": "STRING"},
+                "entity_id": {"type": "STRING"},
+                "area": {"type": "STRING"},
+            },
+            "required": ["search_query"],
+        },
+        intent="HassMediaSearchAndPlay",
+    ),
+    ToolSpec(
+        name="ProxyMediaControl",
+        description="Controls media playback (pause, resume, skip). [NONE, area, name]",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "command": {
+                    "type": "STRING",
+                    "enum": ["play", "pause", "next", "previous", "stop"],
+                    "description": "The playback command to issue.",
+                },
+                "name": {"type": "STRING"},
+                "entity_id": {"type": "STRING"},
+                "area": {"type": "STRING"},
+            },
+            "required": ["command"],
+        },
+        resolve=resolve_proxy_media_control,
+    ),
+    ToolSpec(
+        name="ProxyControlVolume",
+        description="Sets or adjusts the volume of a media player. For mode 'set': [NONE, name]. For mode 'increase'/'decrease': [NONE, area, name].",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "mode": {
+                    "type": "STRING",
+                    "enum": ["set", "increase", "decrease"],
+                    "description": "Use 'set' for a specific percentage, 'increase'/'decrease' for relative adjustments.",
+                },
+                "level": {
+                    "type": "INTEGER",
+                    "description": "The target volume percentage (0-100) or the step amount to change by.",
+                },
+                "name": {"type": "STRING"},
+                "entity_id": {"type": "STRING"},
+                "area": {"type": "STRING"},
+            },
+            "required": ["mode", "level"],
+        },
+        resolve=resolve_proxy_control_volume,
+    ),
+    ToolSpec(
+        name="ProxySetMute",
+        description="Mutes or unmutes a media player. [NONE, name]",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "mute": {
+                    "type": "BOOLEAN",
+                    "description": "True to mute, False to unmute.",
+                },
+                "name": {"type": "STRING"},
+                "entity_id": {"type": "STRING"},
+                "area": {"type": "STRING"},
+            },
+            "required": ["mute"],
+        },
+        resolve=resolve_set_mute,
+        idempotent=True,
+    ),
+    ToolSpec(
+        name="HassBroadcast",
+        description="Broadcast a message via TTS.",
+        parameters={
+            "type": "OBJECT",
+            "properties": {"message": {"type": "STRING"}},
+            "required": ["message"],
+        },
+        intent="HassBroadcast",
+    ),
+    # Timers
+    ToolSpec(
+        name="HassStartTimer",
+        description="Starts a timer. [hours, minutes, seconds, hours+minutes, hours+seconds, minutes+seconds, hours+minutes+seconds]",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "hours": {
+                    "type": "INTEGER",
+                    "description": "Number of hours",
+                },
+                "minutes": {
+                    "type": "INTEGER",
+                    "description": "Number of minutes",
+                },
+                "seconds": {
+                    "type": "INTEGER",
+                    "description": "Number of seconds",
+                },
+                "name": {
+                    "type": "STRING",
+                    "description": "Name attached to the timer",
+                },
+                "conversation_command": {
+                    "type": "STRING",
+                    "description": "Command to execute when timer finishes",
+                },
+            },
+        },
+        intent="HassStartTimer",
+    ),
+    ToolSpec(
+        name="HassCancelAllTimers",
+        description="Cancels all active timers in an area. [NONE, area]",
+        parameters={
+            "type": "OBJECT",
+            "properties": {"area": {"type": "STRING"}},
+        },
+        intent="HassCancelAllTimers",
+        idempotent=True,
+    ),
+    ToolSpec(
+        name="HassCancelTimer",
+        description="Cancels a timer. [NONE, name, area]",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "start_hours": {
+                    "type": "INTEGER",
+                    "description": "Hours the timer was started with",
+                },
+                "start_minutes": {
+                    "type": "INTEGER",
+                    "description": "Minutes the timer was started with",
+                },
+                "start_seconds": {
+                    "type": "INTEGER",
+                    "description": "Seconds the timer was started with",
+                },
+                "name": {
+                    "type": "STRING",
+                    "description": "Name attached to the timer",
+                },
+                "area": {
+                    "type": "STRING",
+                    "description": "Area of the device used to start the timer",
+                },
+            },
+        },
+        intent="HassCancelTimer",
+    ),
+    ToolSpec(
+        name="ProxyAdjustTimer",
+        description="Adjusts a timer. [NONE, name, area]",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "operation": {
+                    "type": "STRING",
+                    "enum": ["increase", "decrease"],
+                    "description": "Whether to increase or decrease the timer.",
+                },
+                "hours": {
+                    "type": "INTEGER",
+                    "description": "Number of hours",
+                },
+                "minutes": {
+                    "type": "INTEGER",
+                    "description": "Number of minutes",
+                },
+                "seconds": {
+                    "type": "INTEGER",
+                    "description": "Number of seconds",
+                },
+                "start_hours": {
+                    "type": "INTEGER",
+                    "description": "Hours the timer was started with",
+                },
+                "start_minutes": {
+                    "type": "INTEGER",
+                    "description": "Minutes the timer was started with",
+                },
+                "start_seconds": {
+                    "type": "INTEGER",
+                    "description": "Seconds the timer was started with",
+                },
+                "name": {
+                    "type": "STRING",
+                    "description": "Name attached to the timer",
+                },
+                "area": {
+                    "type": "STRING",
+                    "description": "Area of the device used to start the timer",
+                },
+            },
+            "required": ["operation"],
+        },
+        resolve=resolve_adjust_timer,
+    ),
+    ToolSpec(
+        name="ProxyPauseResumeTimer",
+        description="Pauses a timer. [NONE, name, area]",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "action": {
+                    "type": "STRING",
+                    "enum": ["pause", "resume"],
+                    "description": "Whether to pause or resume the timer.",
+                },
+                "start_hours": {
+                    "type": "INTEGER",
+                    "description": "Hours the timer was started with",
+                },
+                "start_minutes": {
+                    "type": "INTEGER",
+                    "description": "Minutes the timer was started with",
+                },
+                "start_seconds": {
+                    "type": "INTEGER",
+                    "description": "Seconds the timer was started with",
+                },
+                "name": {
+                    "type": "STRING",
+                    "description": "Name attached to the timer",
+                },
+                "area": {
+                    "type": "STRING",
+                    "description": "Area of the device used to start the timer",
+                },
+            },
+            "required": ["action"],
+        },
+        resolve=resolve_pause_resume_timer,
+        idempotent=True,
+    ),
+    # Helper / Info Tools
+    ToolSpec(
+        name="todo_get_items",
+        description="Get items from a todo list. [name]",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "name": {"type": "STRING"},
+                "entity_id": {"type": "STRING"},
+                "status": {
+                    "type": "STRING",
+                    "enum": ["needs_action", "completed"],
+                },
+            },
+        },
+        handler=handle_todo_get_items,
+        read_only=True,
+        cache_ttl=10.0,
+    ),
+    # Handled but not declared to the model
+    ToolSpec(
+        name="GetDateTime",
+        description="Returns current date and time.",
+        handler=handle_get_date_time,
+        read_only=True,
+        cache_ttl=1.0,
+        stateless=True,
+        declared=False,
+    ),
+    ToolSpec(
+        name="GetLiveContext",
+        description="Get real-time states (on/off, temp, etc) for answering status questions.",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "name": {"type": "STRING"},
+                "entity_id": {"type": "STRING"},
+                "area": {"type": "STRING"},
+                "domain": {"type": "ARRAY", "items": {"type": "STRING"}},
+                "device_class": {
+                    "type": "STRING",
+                    "enum": [
+                        "tv",
+                        "speaker",
+                        "switch",
+                        "light",
+                        "fan",
+                        "lock",
+                        "cover",
+                    ],
+                },
+            },
+        },
+        handler=handle_get_live_context,
+        read_only=True,
+        cache_ttl=5.0,
+    ),
+    ToolSpec(
+        name="HassIntentRaw",
+        description="Sends a raw intent command to Home Assistant.",
+        parameters={
+            "type": "OBJECT",
+            "properties": {
+                "name": {
+                    "type": "STRING",
+                    "description": "The name of the intent to send.",
+                    "example": "HassTurnOn",
+                },
+                "data": {
+                    "type": "OBJECT",
+                    "description": "A key-value map of parameters for the intent.",
+                    "example": {"entity_id": "light.living_room"},
+                },
+            },
+            "required": ["name", "data"],
+        },
+        resolve=resolve_intent_raw,
+    ),
+]
@@ -0,0 +1,161 @@
+import hashlib
+import importlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """A tool's schema, argument normalization and handler, declared once."""
+
+    name: str
+    description: str
+    parameters: dict | None = None
+    # Intent fired with the call's args as its slots
+    intent: str | None = None
+    # Normalizes args into (intent_name, data) when the mapping is not 1:1
+    resolve: Callable[[dict], tuple[str, dict]] | None = None
+    # Answers the call directly instead of firing an intent: fn(ha_client, args)
+    handler: Callable[[Any, dict], Awaitable[Any]] | None = None
+    read_only: bool = False
+    idempotent: bool = False
+    # Seconds a read-only result may be served from the tool cache
+    cache_ttl: float | None = None
+    # Result does not depend on any entity's state
+    stateless: bool = False
+    # Whether the tool is offered to the model
+    declared: bool = True
+
+    def resolve_intent(self, args) -> tuple[str, dict] | None:
+        """Maps args to (intent_name, data), or None if not intent-backed."""
+        if self.resolve:
+            return self.resolve(args)
+        if self.intent:
+            return self.intent, args
+        return None
+
+    def declaration(self) -> types.FunctionDeclaration:
+        return types.FunctionDeclaration(
+            name=self.name,
+            description=self.description,
+            parameters_json_schema=self.parameters,
+        )
+
+
+class ToolRegistry:
+    """
+    Name -> ToolSpec table with the Gemini tool list built once per load.
+
+    Tool definitions live in tool_definitions.py; reload() re-imports that
+    module and swaps in the new table, bumping `version`.
+    """
+
+    def __init__(self):
+        self._specs: dict[str, ToolSpec] = {}
+        self._tools: list[types.Tool] = []
+        self._loaded = False
+        self._version = 0
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def load(self, reload=False):
+        import tool_definitions
+
+        if reload:
+            tool_definitions = importlib.reload(tool_definitions)
+        self._install(tool_definitions.TOOLS)
+
+    def reload(self):
+        """Re-reads tool_definitions.py without restarting the add-on."""
+        self.load(reload=True)
+        logger.info(
+            "Reloaded %d tools (version %d, digest %s)", len(self._specs), self.version, self.digest
+        )
+
+    def register(self, spec: ToolSpec):
+        """Adds or replaces a single tool."""
+        self._ensure_loaded()
+        specs = {**self._specs, spec.name: spec}
+        self._install(specs.values())
+
+    def unregister(self, name: str):
+        self._ensure_loaded()
+        self._install(spec for spec in self._specs.values() if spec.name != name)
+
+    def _install(self, specs):
+        table = {}
+        for spec in specs:
+            if spec.name in table:
+                raise ValueError(f"Duplicate tool: {spec.name}")
+            table[spec.name] = spec
+
+        tools = [
+            types.Tool(
+                function_declarations=[
+                    spec.declaration() for spec in table.values() if spec.declared
+                ]
+            )
+        ]
+
+        # Swap both together so readers never see a half-built registry
+        self._specs, self._tools = table, tools
+        self._loaded = True
+        self._version += 1
+
+    @property
+    def digest(self) -> str:
+        """tools_digest of the declared tools; matches the custom component's TOOLS_VERSION."""
+        self._ensure_loaded()
+        return tools_digest(spec for spec in self._specs.values() if spec.declared)
+
+    @property
+    def version(self) -> int:
+        """Bumped on every load or change to the tool table."""
+        self._ensure_loaded()
+        return self._version
+
+    def get(self, name) -> ToolSpec | None:
+        self._ensure_loaded()
+        return self._specs.get(name)
+
+    @property
+    def specs(self) -> list[ToolSpec]:
+        self._ensure_loaded()
+        return list(self._specs.values())
+
+    @property
+    def tools(self) -> types.ToolListUnion:
+        """The cached Gemini tool list; do not mutate."""
+        self._ensure_loaded()
+        return self._tools
+
+
+def tools_digest(specs) -> str:
+    """
+    A short hash of the tools' schemas and flags. The custom component
+    (custom_components/gemini_tool_bridge/intent_tools.py) computes the same
+    digest over its copy of the table; keep the two functions identical.
+    """
+    canonical = [
+        {
+            "name": spec.name,
+            "description": spec.description,
+            "parameters": spec.parameters,
+            "read_only": spec.read_only,
+            "idempotent": spec.idempotent,
+        }
+        for spec in sorted(specs, key=lambda spec: spec.name)
+    ]
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(encoded).hexdigest()[:12]
+
+
+registry = ToolRegistry()
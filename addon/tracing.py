@@ -0,0 +1,300 @@
+"""
+Tracing spans for the audio path, written to a rotating local JSONL file.
+
+Each line is one OTLP/JSON ExportTraceServiceRequest, the format the
+OpenTelemetry Collector's `otlpjsonfile` receiver reads. Every model turn of
+a session is one trace: a root "turn" span from the end of the previous
+turn to turn_complete, with the work done for it (tool dispatch, first
+audio, sampled audio packets) as children. Spans carry `session.id` and
+`turn` attributes.
+
+Finishing a span only appends a tuple to an in-memory buffer; encoding and
+file writes happen in a worker thread every few seconds. Per-packet audio
+spans are sampled (one in `trace_audio_sample`), so the overhead stays flat
+however many satellites are streaming.
+"""
+import asyncio
+import json
+import logging
+import logging.handlers
+import os
+import random
+import time
+
+from metrics import metrics
+from options import get_option
+
+logger = logging.getLogger(__name__)
+
+TRACE_PATH = "/data/traces.jsonl"
+TRACE_MAX_BYTES = 10 * 1024 * 1024
+TRACE_BACKUPS = 3
+FLUSH_INTERVAL_SECONDS = 2.0
+# Spans held between flushes; beyond this they are dropped and counted
+MAX_BUFFERED_SPANS = 20000
+SERVICE_NAME = "gemini_live_proxy"
+
+TRACING_ENABLED = bool(get_option("tracing", True))
+# Record one in this many per-packet audio spans; 0 records none
+TRACE_AUDIO_SAMPLE = int(get_option("trace_audio_sample", 50))
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class TraceContext:
+    """Trace state for one session: the current turn's trace and root span."""
+
+    __slots__ = ("session_id", "turn", "trace_id", "root_span_id", "turn_started", "_packets")
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.turn = 0
+        self._packets = 0
+        self._start_turn()
+
+    def _start_turn(self):
+        self.trace_id = _new_id(128)
+        self.root_span_id = _new_id(64)
+        self.turn_started = time.time_ns()
+
+    def sample_packet(self) -> bool:
+        """Whether this audio packet gets a span."""
+        if not TRACE_AUDIO_SAMPLE:
+            return False
+        self._packets += 1
+        return self._packets % TRACE_AUDIO_SAMPLE == 0
+
+
+class Span:
+    """A span being timed; use as a context manager, or call end()."""
+
+    __slots__ = ("tracer", "context", "name", "kind", "start", "attributes", "error")
+
+    def __init__(self, tracer: "Tracer", context: TraceContext, name: str, kind: int, attributes: dict):
+        self.tracer = tracer
+        self.context = context
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.attributes = attributes
+        self.error: str | None = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self):
+        self.tracer.record(
+            self.context, self.name, self.start, time.time_ns(), self.attributes, self.kind, self.error
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None and not isinstance(exc, asyncio.CancelledError):
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.end()
+        return False
+
+
+class _NoSpan:
+    """Stands in for a Span when tracing is off or the packet isn't sampled."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    def __init__(self, enabled: bool = TRACING_ENABLED, path: str = TRACE_PATH):
+        self.enabled = enabled
+        self.path = path
+        self._buffer: list[tuple] = []
+        self._export_logger: logging.Logger | None = None
+        self._dropped = metrics.counter("tracing.dropped")
+        self._exported = metrics.counter("tracing.exported")
+
+    def span(self, context: TraceContext, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+        if not self.enabled:
+            return NO_SPAN
+        return Span(self, context, name, kind, attributes)
+
+    def audio_span(
+        self, context: TraceContext, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes
+    ):
+        """A span for a per-packet step, only for sampled packets."""
+        if not self.enabled or not context.sample_packet():
+            return NO_SPAN
+        return Span(self, context, name, kind, attributes)
+
+    def record(
+        self,
+        context: TraceContext,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        attributes: dict | None = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        error: str | None = None,
+    ):
+        if not self.enabled:
+            return
+        if len(self._buffer) >= MAX_BUFFERED_SPANS:
+            self._dropped.inc()
+            return
+        self._buffer.append(
+            (
+                context.trace_id,
+                _new_id(64),
+                context.root_span_id,
+                name,
+                kind,
+                start_ns,
+                end_ns,
+                context.session_id,
+                context.turn,
+                attributes,
+                error,
+            )
+        )
+
+    def end_turn(self, context: TraceContext, **attributes):
+        """Records the turn's root span and starts the next turn's trace."""
+        if self.enabled:
+            self._buffer.append(
+                (
+                    context.trace_id,
+                    context.root_span_id,
+                    None,
+                    "turn",
+                    SPAN_KIND_INTERNAL,
+                    context.turn_started,
+                    time.time_ns(),
+                    context.session_id,
+                    context.turn,
+                    attributes,
+                    None,
+                )
+            )
+        context.turn += 1
+        context._start_turn()
+
+    async def run(self):
+        """Flushes buffered spans to the trace file until cancelled."""
+        if not self.enabled:
+            return
+        try:
+            while True:
+                await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+                await self.flush()
+        finally:
+            await self.flush()
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        try:
+            await asyncio.to_thread(self._write, batch)
+            self._exported.inc(len(batch))
+        except Exception as e:
+            self._dropped.inc(len(batch))
+            logger.warning("Could not write traces to %s: %s", self.path, e)
+
+    def _write(self, batch: list[tuple]):
+        if self._export_logger is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                self.path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            export_logger = logging.getLogger(f"{__name__}.export")
+            export_logger.propagate = False
+            export_logger.setLevel(logging.INFO)
+            export_logger.addHandler(handler)
+            self._export_logger = export_logger
+        self._export_logger.info(json.dumps(encode_spans(batch), separators=(",", ":")))
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        # OTLP/JSON encodes 64-bit integers as strings
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    if isinstance(value, (list, tuple)):
+        return {
+            "key": key,
+            "value": {"arrayValue": {"values": [{"stringValue": str(v)} for v in value]}},
+        }
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def encode_spans(batch: list[tuple]) -> dict:
+    """A batch of recorded spans as an OTLP/JSON ExportTraceServiceRequest."""
+    spans = []
+    for (
+        trace_id,
+        span_id,
+        parent_id,
+        name,
+        kind,
+        start_ns,
+        end_ns,
+        session_id,
+        turn,
+        attributes,
+        error,
+    ) in batch:
+        span = {
+            "traceId": trace_id,
+            "spanId": span_id,
+            "name": name,
+            "kind": kind,
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": [
+                _attribute("session.id", session_id),
+                _attribute("turn", turn),
+                *(_attribute(key, value) for key, value in (attributes or {}).items()),
+            ],
+            "status": (
+                {"code": STATUS_ERROR, "message": error} if error else {"code": STATUS_OK}
+            ),
+        }
+        if parent_id:
+            span["parentSpanId"] = parent_id
+        spans.append(span)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+tracer = Tracer()
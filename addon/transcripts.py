@@ -0,0 +1,261 @@
+"""
+Conversation history: transcripts aggregated into whole turns.
+
+Sessions collect the transcription fragments Gemini streams and hand over
+one Turn per user utterance and per model reply. The store keeps the last
+`transcript_turns` turns per device (a satellite's device_id or IP, so the
+history outlives the session) in a ring, feeds new turns to the live
+dashboard, and gives a session that is rebuilt for the same device a short
+recap of the recent conversation.
+
+Adding a turn only appends to memory; a background task writes pending
+turns to JSONL segments under /data/transcripts every few seconds, in a
+worker thread. A full segment is gzipped and the oldest are deleted, so
+the files stay small and bounded. The newest segments are read back on
+startup.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+
+from metrics import metrics
+from options import get_option
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_DIR = "/data/transcripts"
+# Turns kept per device; 0 keeps no history
+TRANSCRIPT_TURNS = int(get_option("transcript_turns", 50))
+# Turns older than this are left out of a rebuilt session's recap; 0 sends none
+RECAP_MAX_AGE_SECONDS = int(get_option("transcript_recap_minutes", 10)) * 60
+RECAP_TURNS = 6
+RECAP_MAX_CHARS = 1200
+# Devices with history in memory; the least recently active are dropped
+MAX_DEVICES = 64
+# Turns the dashboard can catch up on between two snapshots
+RECENT_TURNS = 256
+FLUSH_INTERVAL_SECONDS = 5.0
+SEGMENT_MAX_BYTES = 256 * 1024
+SEGMENTS_KEPT = 40
+# Segments read back into the rings on startup
+SEGMENTS_LOADED = 2
+SEGMENT_SUFFIX = ".jsonl"
+SEALED_SUFFIX = ".jsonl.gz"
+
+
+@dataclass(slots=True)
+class Turn:
+    """One user utterance or model reply."""
+
+    device: str
+    session: str
+    role: str  # "user" or "model"
+    text: str
+    started: float
+    ended: float
+    interrupted: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class TranscriptStore:
+    def __init__(
+        self,
+        directory: str = TRANSCRIPT_DIR,
+        turns_per_device: int = TRANSCRIPT_TURNS,
+    ):
+        self.directory = directory
+        self.turns_per_device = turns_per_device
+        self.enabled = turns_per_device > 0
+        # Insertion order doubles as recency: a device moves to the end
+        # whenever it gets a turn
+        self._devices: dict[str, deque[Turn]] = {}
+        self._recent: deque[tuple[int, Turn]] = deque(maxlen=RECENT_TURNS)
+        self._seq = 0
+        self._pending: list[Turn] = []
+        self._segment: str | None = None
+        self._turns = metrics.counter("transcripts.turns")
+        self._dropped = metrics.counter("transcripts.dropped")
+
+    def add(self, turn: Turn):
+        if not self.enabled or not turn.text.strip():
+            return
+        self._ring(turn.device).append(turn)
+        self._seq += 1
+        self._recent.append((self._seq, turn))
+        self._pending.append(turn)
+        self._turns.inc()
+
+    def _ring(self, device: str) -> deque[Turn]:
+        """The device's ring, moved to the most recently active end."""
+        ring = self._devices.pop(device, None)
+        if ring is None:
+            ring = deque(maxlen=self.turns_per_device)
+            if len(self._devices) >= MAX_DEVICES:
+                del self._devices[next(iter(self._devices))]
+        self._devices[device] = ring
+        return ring
+
+    # --- Reading ---
+
+    def devices(self) -> list[dict]:
+        return [
+            {"device": device, "turns": len(ring), "last_turn": ring[-1].ended}
+            for device, ring in reversed(self._devices.items())
+            if ring
+        ]
+
+    def history(self, device: str, limit: int | None = None) -> list[dict]:
+        """A device's turns, oldest first; the newest `limit` if given."""
+        turns = list(self._devices.get(device, ()))
+        if limit is not None:
+            turns = turns[-limit:] if limit > 0 else []
+        return [turn.to_dict() for turn in turns]
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def since(self, seq: int) -> list[dict]:
+        """Turns added after `seq` (see `seq`), oldest first."""
+        return [turn.to_dict() for turn_seq, turn in self._recent if turn_seq > seq]
+
+    def recap(self, device: str) -> str | None:
+        """
+        A few lines summing up the device's recent conversation, for a
+        session that starts without it; None if there is nothing recent.
+        """
+        if not RECAP_MAX_AGE_SECONDS:
+            return None
+        oldest = time.time() - RECAP_MAX_AGE_SECONDS
+        lines: list[str] = []
+        chars = 0
+        for turn in reversed(self._devices.get(device, ())):
+            if turn.ended < oldest or len(lines) >= RECAP_TURNS:
+                break
+            speaker = "User" if turn.role == "user" else "You"
+            line = f"{speaker}: {turn.text.strip()}"
+            if turn.interrupted:
+                line += " (interrupted)"
+            if chars + len(line) > RECAP_MAX_CHARS:
+                break
+            lines.append(line)
+            chars += len(line)
+        if not lines:
+            return None
+        lines.reverse()
+        return (
+            "The conversation so far, for context; don't repeat or answer it:\n"
+            + "\n".join(lines)
+        )
+
+    # --- Segments on disk ---
+
+    async def run(self):
+        """Loads saved history, then writes new turns to disk until cancelled."""
+        if not self.enabled:
+            return
+        try:
+            self._restore(await asyncio.to_thread(self._load))
+        except Exception as e:
+            logger.warning("Could not load transcripts from %s: %s", self.directory, e)
+        try:
+            while True:
+                await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+                await self.flush()
+        finally:
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except Exception as e:
+            self._dropped.inc(len(batch))
+            logger.warning("Could not write transcripts to %s: %s", self.directory, e)
+
+    def _segments(self) -> list[str]:
+        return sorted(
+            name
+            for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX) or name.endswith(SEALED_SUFFIX)
+        )
+
+    def _write(self, batch: list[Turn]):
+        if self._segment is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._segment = os.path.join(
+                self.directory,
+                f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**9:09d}{SEGMENT_SUFFIX}",
+            )
+        lines = "".join(
+            json.dumps(turn.to_dict(), separators=(",", ":")) + "\n" for turn in batch
+        )
+        with open(self._segment, "a", encoding="utf-8") as f:
+            f.write(lines)
+            size = f.tell()
+        if size >= SEGMENT_MAX_BYTES:
+            self._seal(self._segment)
+            self._segment = None
+
+    def _seal(self, path: str):
+        """Compresses a full segment and drops the oldest beyond SEGMENTS_KEPT."""
+        sealed = path[: -len(SEGMENT_SUFFIX)] + SEALED_SUFFIX
+        with open(path, "rb") as src, gzip.open(sealed, "wb") as dst:
+            dst.write(src.read())
+        os.remove(path)
+        segments = self._segments()
+        for name in segments[: max(0, len(segments) - SEGMENTS_KEPT)]:
+            os.remove(os.path.join(self.directory, name))
+
+    def _load(self) -> list[Turn]:
+        if not os.path.isdir(self.directory):
+            return []
+        # A plain segment left by the last run is sealed rather than reused,
+        # so every run starts a segment of its own
+        for name in self._segments():
+            if name.endswith(SEGMENT_SUFFIX):
+                self._seal(os.path.join(self.directory, name))
+        turns = []
+        for name in self._segments()[-SEGMENTS_LOADED:]:
+            with gzip.open(os.path.join(self.directory, name), "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        turns.append(Turn(**json.loads(line)))
+                    except (ValueError, TypeError):
+                        continue
+        return turns
+
+    def _restore(self, saved: list[Turn]):
+        """
+        Puts saved turns back in their rings, ahead of any added since
+        startup, without saving or streaming them again.
+        """
+        restored: dict[str, deque[Turn]] = {}
+        for turn in saved:
+            ring = restored.pop(turn.device, None)
+            if ring is None:
+                ring = deque(maxlen=self.turns_per_device)
+            ring.append(turn)
+            restored[turn.device] = ring
+        for device, ring in self._devices.items():
+            merged = restored.pop(device, None)
+            if merged is not None:
+                merged.extend(ring)
+                ring = merged
+            restored[device] = ring
+        for device in list(restored)[: max(0, len(restored) - MAX_DEVICES)]:
+            del restored[device]
+        self._devices = restored
+        if saved:
+            logger.info("Loaded %d transcript turns from %s", len(saved), self.directory)
+
+transcripts = TranscriptStore()
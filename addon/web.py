@@ -3,12 +3,21 @@ import logging
 import traceback
 from aiohttp import web, WSMsgType, ClientSession
 
-# from audio import WEB_INPUT_RATE
+from audio import WEB_INPUT_RATE
+from framing import MAX_RATE, MIN_RATE, VERSION as FRAME_VERSION, FramedLink
 from context import get_context, HA_URL, HA_TOKEN
-from intent_tools import IntentToolHandler, get_intent_tools
+from intent_tools import IntentToolHandler
+from tool_registry import registry
+from metrics import metrics
+from loop_monitor import loop_monitor
+from logger import log_levels, set_level, set_session_level
+from transcripts import transcripts
 
 logger = logging.getLogger(__name__)
 
+# The Supervisor's ingress proxy; it only lets through Home Assistant users
+INGRESS_PEER = "172.30.32.2"
+
 INDEX_HTML = """
 <!DOCTYPE html>
 <html>
@@ -34,6 +43,14 @@ with open("app/web.html", "r") as f:
     INDEX_HTML = f.read()
 
 
+def from_ingress(request: web.Request) -> bool:
+    """
+    Whether a request came through Home Assistant ingress, and so from a
+    signed-in user, rather than straight to the published port.
+    """
+    return request.remote == INGRESS_PEER
+
+
 class WebHandler:
     def __init__(self, proxy):
         self.proxy = proxy
@@ -99,21 +116,51 @@ class WebHandler:
         logger.info("Web Client Connected")
 
         session = None  # Track the session for this connection
+        link = None
         
         try:
             # First message is configuration
             config_msg = await ws.receive_json()
             mode = config_msg.get("mode", "bridge")
             token = config_msg.get("token")
+            # Picks the context profile; browsers without one match
+            # profiles by IP. Any client on the published port can claim a
+            # device_id, so it only keys conversation history via ingress.
+            device_id = config_msg.get("device_id")
+            device_key = device_id if from_ingress(request) else None
+            # Current pages capture at 16 kHz; older ones send the mic rate
+            input_rate = config_msg.get("sample_rate") or WEB_INPUT_RATE
+            if not isinstance(input_rate, int) or not MIN_RATE <= input_rate <= MAX_RATE:
+                logger.warning("Ignoring invalid sample_rate %r", input_rate)
+                input_rate = WEB_INPUT_RATE
+            # Framed audio if the page asks for this version; raw otherwise
+            if config_msg.get("framing") == FRAME_VERSION:
+                self.proxy.links[ws] = link = FramedLink(f"web:{request.remote}", input_rate)
+            await ws.send_json(
+                {"type": "framing", "version": FRAME_VERSION if link else 0}
+            )
 
             # Use the ws object itself as the key for web clients
-            session = self.proxy.get_session_for_client(ws, mode, token)
+            session = self.proxy.get_session_for_client(
+                ws, mode, token, device_id, input_rate=input_rate,
+                client_ip=request.remote, device_key=device_key,
+            )
 
             async for msg in ws:
                 if msg.type == WSMsgType.BINARY:
-                    await session.process_incoming_audio(msg.data)
+                    for payload in link.receive(msg.data) if link else (msg.data,):
+                        await session.process_incoming_audio(payload)
                 elif msg.type == WSMsgType.TEXT:
-                     logger.warning(f"Received unexpected text message from web client: {msg.data}")
+                    try:
+                        message = msg.json()
+                    except ValueError:
+                        message = {}
+                    if isinstance(message, dict) and message.get("type") == "playback_stats":
+                        session.record_playback_stats(message)
+                        if link and isinstance(message.get("downlink"), dict):
+                            link.record_report(message["downlink"])
+                    else:
+                        logger.warning("Received unexpected text message from web client: %s", msg.data)
                 elif msg.type == WSMsgType.ERROR:
                     logger.error(f"Websocket connection closed with exception {ws.exception()}")
                     break
@@ -128,6 +175,7 @@ class WebHandler:
                 self.proxy.remove_session_for_client(ws)
             if ws in self.proxy.web_clients:
                 self.proxy.web_clients.discard(ws)
+            self.proxy.links.pop(ws, None)
             
             # Ensure WebSocket is closed
             if not ws.closed:
@@ -151,22 +199,91 @@ class WebHandler:
     async def tool_list_handler(self, request: web.Request):
         """List all available tools."""
         try:
-            tools_data = []
-            tool_objs = get_intent_tools()
-            for tool in tool_objs:
-                funcs = tool.function_declarations or []
-                for func in funcs:
-                     tools_data.append({
-                         "name": func.name,
-                         "description": func.description,
-                         "parameters": func.parameters_json_schema
-                     })
-            
-            return web.json_response({"tools": tools_data})
+            tools_data = [
+                {
+                    "name": spec.name,
+                    "description": spec.description,
+                    "parameters": spec.parameters,
+                    "read_only": spec.read_only,
+                    "idempotent": spec.idempotent,
+                }
+                for spec in registry.specs
+                if spec.declared
+            ]
+
+            return web.json_response(
+                {"tools": tools_data, "version": registry.version, "digest": registry.digest}
+            )
         except Exception as e:
             logger.error(f"tool_list_handler error: {e}")
             return web.Response(text=f"Error: {e}", status=500)
-        
+
+    async def tool_reload_handler(self, request: web.Request):
+        """Reload tool definitions without restarting the add-on."""
+        try:
+            registry.reload()
+            return web.json_response({"success": True, "version": registry.version})
+        except Exception as e:
+            logger.error("tool_reload_handler error: %s", e)
+            return web.json_response({"success": False, "error": str(e)}, status=500)
+
+    async def log_levels_handler(self, request: web.Request):
+        """The add-on's log level and any per-session overrides."""
+        return web.json_response(
+            {**log_levels(), "active_sessions": [s.id for s in self.proxy.sessions.values()]}
+        )
+
+    async def set_log_level_handler(self, request: web.Request):
+        """
+        Changes a log level at runtime: {"level": "debug"} for the add-on, or
+        {"session": "<id>", "level": "debug"} for one session, where a null
+        level clears the override.
+        """
+        try:
+            data = await request.json()
+            if data.get("session"):
+                set_session_level(str(data["session"]), data.get("level"))
+            else:
+                set_level(data["level"])
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return web.json_response({"success": False, "error": str(e)}, status=400)
+        return web.json_response({"success": True, **log_levels()})
+
+    async def transcripts_handler(self, request: web.Request):
+        """
+        Devices with conversation history, or with ?device=<id> that
+        device's turns, oldest first (the newest ?limit= of them). Only
+        served through ingress.
+        """
+        if not from_ingress(request):
+            return web.json_response(
+                {"error": "Transcripts are only available through Home Assistant"},
+                status=403,
+            )
+        device = request.query.get("device")
+        if not device:
+            return web.json_response({"devices": transcripts.devices()})
+        try:
+            limit = int(request.query["limit"]) if "limit" in request.query else None
+        except ValueError:
+            return web.json_response({"error": "limit must be an integer"}, status=400)
+        return web.json_response(
+            {"device": device, "turns": transcripts.history(device, limit)}
+        )
+
+    async def metrics_handler(self, request: web.Request):
+        """Expose in-process counters, including tool cache hit rate."""
+        return web.json_response(
+            {
+                "tool_cache": self.proxy.ha_client.tool_cache.stats(),
+                "framing": {
+                    link.name: link.stats() for link in self.proxy.links.values()
+                },
+                "loop": loop_monitor.snapshot(),
+                "metrics": metrics.snapshot(),
+            }
+        )
+
     async def entity_list_handler(self, request: web.Request):
         """List all available entities."""
         try:
@@ -0,0 +1,378 @@
+"""
+Benchmark the add-on's audio hot paths: resample_audio for every rate pair
+the proxy uses, VADWrapper.is_speech, and GeminiSession.process_incoming_audio
+(resampling, VAD buffering and framing into Gemini-sized chunks).
+
+Inputs are fixed: a seeded synthetic speech-like signal generated at each
+source rate, or a recorded 16-bit mono WAV (--recorded) converted to each
+rate up front. Each case runs per-frame (20 ms, one UDP/WebSocket packet)
+and batched (1 s). For every case it reports throughput (audio seconds per
+wall second and calls per second), per-call latency percentiles and
+tracemalloc allocation figures (peak and retained bytes per call, from a
+separate pass since tracing slows everything down).
+
+Results go to a JSON file with the commit and library versions, and a
+previous file can be compared against to flag regressions:
+
+    python benchmarks/bench_audio.py --output before.json
+    (change something)
+    python benchmarks/bench_audio.py --output after.json --compare before.json
+
+Run from the repository root with the add-on's requirements installed. The
+VAD cases need the Silero model (--vad-model); they are skipped, not
+downloaded, when it is missing.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+import wave
+
+import numpy as np
+from scipy import signal as scipy_signal
+
+ADDON_DIR = Path(__file__).resolve().parent.parent / "addon"
+sys.path.insert(0, str(ADDON_DIR))
+# The session module needs a key to import; nothing here talks to Gemini
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from audio import (  # noqa: E402
+    ESP_INPUT_RATE,
+    ESP_OUTPUT_RATE,
+    GEMINI_INPUT_RATE,
+    GEMINI_OUTPUT_RATE,
+    WEB_INPUT_RATE,
+    resample_audio,
+)
+import vad  # noqa: E402
+
+# (source rate, destination rate, where it's used)
+RATE_PAIRS = [
+    (ESP_INPUT_RATE, GEMINI_INPUT_RATE, "satellite mic"),
+    (WEB_INPUT_RATE, GEMINI_INPUT_RATE, "browser mic"),
+    (GEMINI_OUTPUT_RATE, ESP_OUTPUT_RATE, "return audio"),
+]
+FRAME_SIZES_MS = [20, 1000]
+INPUT_SECONDS = 10
+ALLOC_CALLS = 200
+SEED = 0
+
+
+def synthetic_pcm(rate: int, seconds: int = INPUT_SECONDS, seed: int = SEED) -> bytes:
+    """Voiced, syllable-paced harmonics over a noise floor, as int16 PCM."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(rate * seconds) / rate
+    # Pitch gliding between 110 and 220 Hz, a few harmonics
+    f0 = 165 + 55 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    # Roughly four syllables a second, with pauses
+    envelope = np.clip(np.sin(2 * np.pi * 2 * t), 0, None) ** 2
+    pcm = 8000 * envelope * voiced + 200 * rng.standard_normal(len(t))
+    return np.clip(pcm, -32768, 32767).astype(np.int16).tobytes()
+
+
+def recorded_pcm(path: str, rate: int) -> bytes:
+    """A 16-bit mono WAV file converted to `rate`."""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise SystemExit(f"{path}: expected 16-bit mono PCM")
+        source_rate = wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if source_rate != rate:
+        gcd = np.gcd(source_rate, rate)
+        samples = scipy_signal.resample_poly(samples, rate // gcd, source_rate // gcd)
+    return np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+
+
+def split_frames(pcm: bytes, rate: int, frame_ms: int) -> list[bytes]:
+    size = rate * frame_ms // 1000 * 2
+    return [pcm[i : i + size] for i in range(0, len(pcm) - size + 1, size)]
+
+
+def percentiles_us(samples_ns: list[int]) -> dict:
+    ordered = sorted(samples_ns)
+
+    def pick(pct):
+        return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] / 1000, 2)
+
+    return {
+        "p50": pick(50),
+        "p90": pick(90),
+        "p99": pick(99),
+        "max": round(ordered[-1] / 1000, 2),
+        "mean": round(statistics.fmean(ordered) / 1000, 2),
+    }
+
+
+def measure_allocations(call, frames: list[bytes]) -> dict:
+    """Peak and retained traced bytes per call, as medians."""
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for frame in frames[:ALLOC_CALLS]:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call(frame)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_bytes": int(statistics.median(peaks)),
+        "retained_bytes": int(statistics.median(retained)),
+    }
+
+
+def run_case(call, frames: list[bytes], frame_seconds: float, min_time: float) -> dict:
+    """Times `call` over `frames`, repeating passes until `min_time` elapsed."""
+    for frame in frames[:10]:
+        call(frame)
+
+    latencies = []
+    started = time.perf_counter()
+    while True:
+        for frame in frames:
+            call_started = time.perf_counter_ns()
+            call(frame)
+            latencies.append(time.perf_counter_ns() - call_started)
+        wall = time.perf_counter() - started
+        if wall >= min_time:
+            break
+
+    return {
+        "calls": len(latencies),
+        "audio_seconds": round(len(latencies) * frame_seconds, 3),
+        "wall_seconds": round(wall, 3),
+        "realtime_factor": round(len(latencies) * frame_seconds / wall, 1),
+        "calls_per_second": round(len(latencies) / wall, 1),
+        "latency_us": percentiles_us(latencies),
+        "allocations": measure_allocations(call, frames),
+    }
+
+
+def bench_resample(inputs, min_time):
+    for src_rate, dst_rate, usage in RATE_PAIRS:
+        for frame_ms in FRAME_SIZES_MS:
+            frames = split_frames(inputs(src_rate), src_rate, frame_ms)
+            result = run_case(
+                lambda frame: resample_audio(frame, src_rate, dst_rate),
+                frames,
+                frame_ms / 1000,
+                min_time,
+            )
+            yield {
+                "name": "resample_audio",
+                "usage": usage,
+                "src_rate": src_rate,
+                "dst_rate": dst_rate,
+                "frame_ms": frame_ms,
+                **result,
+            }
+
+
+def bench_vad(wrapper, inputs, min_time):
+    # The model takes fixed 512-sample chunks, so there is no batched size
+    pcm = inputs(GEMINI_INPUT_RATE)
+    chunk_samples = vad.VAD_CHUNK_SIZE_SAMPLES
+    size = vad.VAD_CHUNK_SIZE_BYTES
+    frames = [pcm[i : i + size] for i in range(0, len(pcm) - size + 1, size)]
+    result = run_case(
+        wrapper.is_speech, frames, chunk_samples / GEMINI_INPUT_RATE, min_time
+    )
+    yield {
+        "name": "vad.is_speech",
+        "src_rate": GEMINI_INPUT_RATE,
+        "dst_rate": None,
+        "frame_ms": chunk_samples * 1000 // GEMINI_INPUT_RATE,
+        **result,
+    }
+
+
+def bench_pipeline(wrapper, inputs, min_time):
+    """GeminiSession.process_incoming_audio, run on an event loop."""
+    import session as session_module
+    from intent_tools import HomeAssistantClient
+
+    # Share one loaded model instead of loading (or downloading) per session
+    session_module.VADWrapper = lambda: wrapper
+    proxy = SimpleNamespace(ha_client=HomeAssistantClient())
+    loop = asyncio.new_event_loop()
+    try:
+        for src_rate in sorted({ESP_INPUT_RATE, WEB_INPUT_RATE, GEMINI_INPUT_RATE}):
+            for barge_in in (False, True) if wrapper else (False,):
+                for frame_ms in FRAME_SIZES_MS:
+                    session = session_module.GeminiSession(
+                        ("127.0.0.1", src_rate), proxy, None, input_rate=src_rate
+                    )
+                    # Barge-in: the model is talking, so every chunk goes through VAD
+                    session.ai_is_speaking = barge_in
+                    queue = session.audio_queue_mic
+
+                    def call(frame):
+                        loop.run_until_complete(session.process_incoming_audio(frame))
+                        while not queue.empty():
+                            queue.get_nowait()
+
+                    frames = split_frames(inputs(src_rate), src_rate, frame_ms)
+                    result = run_case(call, frames, frame_ms / 1000, min_time)
+                    yield {
+                        "name": "process_incoming_audio",
+                        "usage": "barge-in (VAD)" if barge_in else "listening",
+                        "src_rate": src_rate,
+                        "dst_rate": GEMINI_INPUT_RATE,
+                        "frame_ms": frame_ms,
+                        **result,
+                    }
+    finally:
+        loop.close()
+
+
+def load_vad(path: str):
+    if not os.path.exists(path):
+        print(f"VAD model {path} not found; skipping VAD cases")
+        return None
+    vad.VAD_MODEL_PATH = path
+    return vad.VADWrapper()
+
+
+def case_key(result: dict) -> tuple:
+    return (
+        result["name"],
+        result.get("usage"),
+        result["src_rate"],
+        result["dst_rate"],
+        result["frame_ms"],
+    )
+
+
+def describe(result: dict) -> str:
+    rates = f"{result['src_rate']}" + (f"->{result['dst_rate']}" if result["dst_rate"] else "")
+    usage = f" {result['usage']}" if result.get("usage") else ""
+    return f"{result['name']}{usage} {rates} {result['frame_ms']}ms"
+
+
+def git_revision() -> dict:
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=ADDON_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def environment() -> dict:
+    versions = {"numpy": np.__version__}
+    for module in ("scipy", "onnxruntime"):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        **versions,
+    }
+
+
+def compare(results: list[dict], baseline_path: str, threshold: float) -> int:
+    """Prints changes against a baseline; returns how many cases regressed."""
+    with open(baseline_path) as f:
+        baseline = {case_key(result): result for result in json.load(f)["results"]}
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (regression above {threshold:.0f}%):")
+    for result in results:
+        before = baseline.get(case_key(result))
+        if before is None:
+            print(f"  {describe(result):<56} new")
+            continue
+        p50 = _change(before["latency_us"]["p50"], result["latency_us"]["p50"])
+        peak = _change(
+            before["allocations"]["peak_bytes"], result["allocations"]["peak_bytes"]
+        )
+        regressed = p50 > threshold or peak > threshold
+        regressions += regressed
+        print(
+            f"  {describe(result):<56} p50 {p50:+7.1f}%   alloc peak {peak:+7.1f}%"
+            + ("   REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) * 100 / before if before else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds per case")
+    parser.add_argument("--recorded", help="16-bit mono WAV to use instead of synthetic input")
+    parser.add_argument("--vad-model", default=vad.VAD_MODEL_PATH)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression %%")
+    args = parser.parse_args()
+
+    if args.recorded:
+        with open(args.recorded, "rb") as f:
+            source = {"recorded": args.recorded, "sha256": hashlib.sha256(f.read()).hexdigest()}
+    else:
+        source = {"synthetic": True, "seconds": INPUT_SECONDS, "seed": SEED}
+
+    cache: dict[int, bytes] = {}
+
+    def inputs(rate: int) -> bytes:
+        if rate not in cache:
+            cache[rate] = (
+                recorded_pcm(args.recorded, rate) if args.recorded else synthetic_pcm(rate)
+            )
+        return cache[rate]
+
+    wrapper = load_vad(args.vad_model)
+    results = list(bench_resample(inputs, args.min_time))
+    if wrapper:
+        results.extend(bench_vad(wrapper, inputs, args.min_time))
+    results.extend(bench_pipeline(wrapper, inputs, args.min_time))
+
+    print(f"\n{'case':<56} {'x realtime':>10} {'p50 us':>9} {'p99 us':>9} {'peak B':>9}")
+    for result in results:
+        print(
+            f"{describe(result):<56} {result['realtime_factor']:>10.1f} "
+            f"{result['latency_us']['p50']:>9.1f} {result['latency_us']['p99']:>9.1f} "
+            f"{result['allocations']['peak_bytes']:>9}"
+        )
+
+    if args.output:
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "revision": git_revision(),
+            "environment": environment(),
+            "input": source,
+            "min_time": args.min_time,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
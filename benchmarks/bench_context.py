@@ -0,0 +1,155 @@
+"""
+Benchmark the incremental ContextBuilder against a full context rebuild.
+
+Builds a synthetic install (5,000 exposed entities by default) and reports
+the cost of a full render, a warm fetch and single-entity updates, plus
+the size of the full and compact encodings.
+
+Run from the repository root with Home Assistant installed:
+
+    python benchmarks/bench_context.py [--entities 5000] [--areas 40] [--token-budget 8000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from custom_components.gemini_tool_bridge.context import (
+    ContextBuilder,
+    estimate_tokens,
+    generate_compact_context,
+    generate_grouped_device_context,
+)
+
+
+def make_install(num_entities, num_areas, seed=0):
+    """Returns (raw_entities, [(entity_id, entity, device_id, device)])."""
+    rng = random.Random(seed)
+    areas = [None] + [f"area_{i}" for i in range(num_areas)]
+    devices = {}
+    non_device_entities = []
+    records = []
+
+    entity_index = 0
+    device_index = 0
+    while entity_index < num_entities:
+        area = rng.choice(areas)
+        if rng.random() < 0.2:
+            entity_id = f"light.lamp_{entity_index}"
+            entity = {
+                "entity_id": entity_id,
+                "friendly_name": f"Area {area} Lamp {entity_index}",
+                "area_id": area,
+            }
+            non_device_entities.append(entity)
+            records.append((entity_id, entity, None, None))
+            entity_index += 1
+            continue
+
+        device_id = f"device_{device_index}"
+        device = {"name": f"Device {device_index}", "name_by_user": None, "area_id": area}
+        entities = []
+        for _ in range(rng.randint(1, 6)):
+            entity_id = f"sensor.device_{device_index}_{entity_index}"
+            entity = {
+                "entity_id": entity_id,
+                "friendly_name": f"Device {device_index} Sensor {entity_index}",
+                "area_id": None,
+                # Every tenth sensor is a diagnostic one
+                "entity_category": "diagnostic" if entity_index % 10 == 0 else None,
+            }
+            entities.append(entity)
+            records.append((entity_id, entity, device_id, device))
+            entity_index += 1
+        devices[device_id] = {"device": device, "entities": entities}
+        device_index += 1
+
+    return {"devices": devices, "non_device_entities": non_device_entities}, records
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=5000)
+    parser.add_argument("--areas", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--token-budget", type=int, default=8000)
+    args = parser.parse_args()
+
+    raw, records = make_install(args.entities, args.areas)
+    print(f"{len(records)} entities, {len(raw['devices'])} devices, {args.areas} areas")
+
+    full = timed(lambda: generate_grouped_device_context(raw), args.repeat)
+
+    builder = ContextBuilder(None)
+
+    def initial_build():
+        for record in records:
+            builder.apply(*record)
+        return builder.context
+
+    started = time.perf_counter()
+    context = initial_build()
+    initial_ms = (time.perf_counter() - started) * 1000
+    assert context == generate_grouped_device_context(raw)
+
+    warm = timed(lambda: builder.context, args.repeat * 100)
+
+    rng = random.Random(1)
+
+    def rename_one():
+        entity_id, entity, device_id, device = rng.choice(records)
+        entity["friendly_name"] = f"Renamed {rng.random()}"
+        builder.apply(entity_id, entity, device_id, device)
+        return builder.context
+
+    update = timed(rename_one, args.repeat)
+
+    def move_device():
+        device_id = rng.choice(list(raw["devices"]))
+        info = raw["devices"][device_id]
+        info["device"] = {**info["device"], "area_id": f"area_{rng.randrange(args.areas)}"}
+        for entity in info["entities"]:
+            builder.apply(entity["entity_id"], entity, device_id, info["device"])
+        return builder.context
+
+    move = timed(move_device, args.repeat)
+    assert builder.context == generate_grouped_device_context(raw)
+
+    print(f"{'full rebuild':<28} median {full[0]:9.3f} ms   max {full[1]:9.3f} ms")
+    print(f"{'builder initial build':<28} {initial_ms:16.3f} ms")
+    print(f"{'warm fetch':<28} median {warm[0]:9.4f} ms   max {warm[1]:9.4f} ms")
+    print(f"{'entity rename + fetch':<28} median {update[0]:9.3f} ms   max {update[1]:9.3f} ms")
+    print(f"{'device move + fetch':<28} median {move[0]:9.3f} ms   max {move[1]:9.3f} ms")
+    print(f"context size: {len(context)} chars, ~{estimate_tokens(context)} tokens")
+
+    compact_ms = timed(lambda: generate_compact_context(raw), args.repeat)
+    budget_ms = timed(
+        lambda: generate_compact_context(raw, args.token_budget), args.repeat
+    )
+    for label, rendered, timing in (
+        ("compact", generate_compact_context(raw), compact_ms),
+        (
+            f"compact, {args.token_budget} tokens",
+            generate_compact_context(raw, args.token_budget),
+            budget_ms,
+        ),
+    ):
+        stats = rendered["stats"]
+        print(
+            f"{label:<28} median {timing[0]:9.3f} ms   "
+            f"{stats['chars']} chars, ~{stats['tokens']} tokens, "
+            f"{stats['entities']} entities ({stats['dropped']} dropped)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark /api/gemini_live/tools request latency with and without the
+LLMToolsCache.
+
+Serves a synthetic Assist tool set over HTTP: intent tools whose slots list
+every exposed entity, area and domain, plus one tool per exposed script. The
+uncached handler converts the schemas on every request, as GeminiToolsView
+used to; the cached one goes through LLMToolsCache. The real uncached path is
+slower still, since it also builds an Assist API instance per request.
+
+Run from the repository root with Home Assistant installed:
+
+    python benchmarks/bench_tools.py [--entities 500] [--requests 200]
+"""
+import argparse
+import asyncio
+from dataclasses import dataclass
+import statistics
+import time
+
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+import voluptuous as vol
+
+from custom_components.gemini_tool_bridge.llm_tools import LLMToolsCache, convert_tools
+from homeassistant.helpers.json import json_dumps
+
+INTENTS = [
+    "HassTurnOn",
+    "HassTurnOff",
+    "HassToggle",
+    "HassLightSet",
+    "HassFanSetSpeed",
+    "HassSetPosition",
+    "HassMediaPause",
+    "HassMediaUnpause",
+    "HassMediaNext",
+    "HassSetVolume",
+    "HassClimateSetTemperature",
+    "HassGetState",
+]
+
+
+@dataclass
+class FakeTool:
+    name: str
+    description: str
+    parameters: vol.Schema
+
+
+def make_tools(num_entities, num_areas):
+    names = [f"Entity {i}" for i in range(num_entities)]
+    areas = [f"Area {i}" for i in range(num_areas)]
+    domains = ["light", "switch", "fan", "cover", "media_player", "climate", "sensor"]
+    tools = [
+        FakeTool(
+            name=intent,
+            description=f"Runs {intent}",
+            parameters=vol.Schema(
+                {
+                    vol.Optional("name"): vol.In(names),
+                    vol.Optional("area"): vol.In(areas),
+                    vol.Optional("domain"): vol.All(cv_list, [vol.In(domains)]),
+                    vol.Optional("brightness"): vol.All(int, vol.Range(0, 100)),
+                }
+            ),
+        )
+        for intent in INTENTS
+    ]
+    # Exposed scripts become tools of their own
+    for i in range(num_entities // 20):
+        tools.append(
+            FakeTool(
+                name=f"script_{i}",
+                description=f"Runs script {i}",
+                parameters=vol.Schema({vol.Optional("value"): str}),
+            )
+        )
+    tools.append(FakeTool("GetLiveContext", "Current states", vol.Schema({})))
+    return tools
+
+
+def cv_list(value):
+    return value if isinstance(value, list) else [value]
+
+
+async def measure(session, url, requests):
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        async with session.get(url) as resp:
+            await resp.read()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=500)
+    parser.add_argument("--areas", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    tools = make_tools(args.entities, args.areas)
+
+    async def build():
+        return convert_tools(tools)
+
+    cache = LLMToolsCache(None, build)
+
+    async def uncached(request):
+        body = json_dumps({"success": True, "tools": await build()})
+        return web.Response(text=body, content_type="application/json")
+
+    async def cached(request):
+        _, body, etag = await cache.async_get()
+        return web.Response(
+            text=body, content_type="application/json", headers={"ETag": etag}
+        )
+
+    app = web.Application()
+    app.add_routes([web.get("/uncached", uncached), web.get("/cached", cached)])
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        async with ClientSession() as session:
+            # Warm up connections and the cache
+            await measure(session, server.make_url("/cached"), 5)
+            await measure(session, server.make_url("/uncached"), 5)
+
+            uncached_ms = await measure(
+                session, server.make_url("/uncached"), args.requests
+            )
+            cached_ms = await measure(session, server.make_url("/cached"), args.requests)
+
+            cache.async_invalidate()
+            started = time.perf_counter()
+            await measure(session, server.make_url("/cached"), 1)
+            rebuild_ms = (time.perf_counter() - started) * 1000
+    finally:
+        await server.close()
+
+    body = json_dumps({"success": True, "tools": await build()})
+    print(
+        f"{len(tools)} tools, {args.entities} exposed entities, {len(body)} byte body"
+    )
+    print(f"{'uncached':<24} median {uncached_ms[0]:8.3f} ms   p95 {uncached_ms[1]:8.3f} ms")
+    print(f"{'cached':<24} median {cached_ms[0]:8.3f} ms   p95 {cached_ms[1]:8.3f} ms")
+    print(f"{'first after invalidate':<24} {rebuild_ms:15.3f} ms")
+    print(f"cache builds: {cache.builds}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
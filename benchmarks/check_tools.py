@@ -0,0 +1,63 @@
+"""
+Check that the custom component's tool table matches the add-on's.
+
+The component (custom_components/gemini_tool_bridge/intent_tools.py) keeps a
+copy of the tools declared in addon/tool_definitions.py for direct mode.
+Both sides hash their table with `tools_digest`; this compares the digests
+and, when they differ, lists the tools that do.
+
+Run from the repository root:
+
+    python benchmarks/check_tools.py
+
+Exits 1 if the tables differ.
+"""
+import importlib.util
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "addon"))
+
+from tool_registry import registry
+
+FIELDS = ("description", "parameters", "read_only", "idempotent")
+
+
+def load_component_tools():
+    """The component's intent_tools module, loaded without Home Assistant."""
+    path = ROOT / "custom_components" / "gemini_tool_bridge" / "intent_tools.py"
+    spec = importlib.util.spec_from_file_location("component_intent_tools", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main() -> int:
+    component = load_component_tools()
+    addon_specs = {spec.name: spec for spec in registry.specs if spec.declared}
+    component_specs = {spec.name: spec for spec in component.TOOLS}
+
+    print(f"add-on    {registry.digest}  ({len(addon_specs)} tools)")
+    print(f"component {component.TOOLS_VERSION}  ({len(component_specs)} tools)")
+    if registry.digest == component.TOOLS_VERSION:
+        print("Tool tables match.")
+        return 0
+
+    for name in sorted(addon_specs.keys() - component_specs.keys()):
+        print(f"  {name}: only in the add-on")
+    for name in sorted(component_specs.keys() - addon_specs.keys()):
+        print(f"  {name}: only in the component")
+    for name in sorted(addon_specs.keys() & component_specs.keys()):
+        differing = [
+            field
+            for field in FIELDS
+            if getattr(addon_specs[name], field) != getattr(component_specs[name], field)
+        ]
+        if differing:
+            print(f"  {name}: {', '.join(differing)} differ")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,435 @@
+"""
+Replay a session recording (see addon/recorder.py) through GeminiSession
+against a local fake Gemini Live server, and measure the proxy.
+
+The recording's inbound audio is fed to process_incoming_audio on its
+original timeline, divided by --speed. The fake server speaks the Live
+WebSocket protocol and plays back what Gemini sent (audio, transcriptions,
+tool calls, interruptions, turn ends) on the same timeline. After a tool
+call it waits for the proxy's tool response before going on, as Gemini
+does. Tool calls are answered from the recording, not Home Assistant.
+
+It reports:
+
+* uplink: from feeding a packet to the fake server receiving the audio
+* downlink: from the server sending model audio to the proxy handing the
+  resampled audio to send_return_audio
+* process_incoming_audio per-call latency
+* CPU: the resampling and VAD time the session attributes to itself,
+  and the whole process's CPU time (fake server included)
+* event-loop lag during the replay
+
+Use --output to save the numbers and --compare to diff against an earlier
+run:
+
+    python benchmarks/replay_session.py room.glrec --speed 4 --output before.json
+    (change something)
+    python benchmarks/replay_session.py room.glrec --speed 4 --compare before.json
+
+Run from the repository root with the add-on's requirements installed. The
+google-genai client only connects over TLS, so the fake server uses a
+throwaway self-signed certificate made with the openssl command. The
+session only makes one connection, so recordings that reconnected to
+reload the context replay as a single connection.
+"""
+import argparse
+import asyncio
+import base64
+import bisect
+import json
+import os
+from pathlib import Path
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from aiohttp import WSMsgType, web
+
+ADDON_DIR = Path(__file__).resolve().parent.parent / "addon"
+sys.path.insert(0, str(ADDON_DIR))
+# The session module needs a key to import; the fake server ignores it
+os.environ.setdefault("GEMINI_API_KEY", "replay")
+
+from google import genai  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from audio import ESP_OUTPUT_RATE, GEMINI_OUTPUT_RATE  # noqa: E402
+from context import profile_key, set_streamed_context  # noqa: E402
+from intent_tools import HomeAssistantClient  # noqa: E402
+from loop_monitor import LoopMonitor  # noqa: E402
+from metrics import metrics  # noqa: E402
+import recorder  # noqa: E402
+import session as session_module  # noqa: E402
+
+# How long to wait for the last audio to come back after the script ends
+DRAIN_SECONDS = 5.0
+
+
+class Recording:
+    """A recording split into the client's and the server's side."""
+
+    def __init__(self, path: str):
+        self.meta: dict = {}
+        self.context = ""
+        self.audio_in: list[tuple[float, bytes]] = []
+        # (seconds, Live server message)
+        self.server: list[tuple[float, dict]] = []
+        self.tool_results: list[dict] = []
+        for record in recorder.read_recording(path):
+            at = record.at_ns / 1e9
+            if record.kind == recorder.KIND_META:
+                self.meta = record.json()
+            elif record.kind == recorder.KIND_AUDIO_IN:
+                self.audio_in.append((at, record.payload))
+            elif record.kind == recorder.KIND_MODEL_AUDIO:
+                self.server.append((at, _model_audio_message(record.payload)))
+            elif record.kind == recorder.KIND_TOOL_RESULT:
+                self.tool_results.append(record.json())
+            elif record.kind == recorder.KIND_EVENT:
+                event = record.json()
+                if event["type"] == "connect":
+                    self.context = self.context or event.get("context") or ""
+                message = _server_message(event)
+                if message is not None:
+                    self.server.append((at, message))
+        self.duration = max(
+            [at for at, _ in self.audio_in] + [at for at, _ in self.server] + [0.0]
+        )
+
+
+def _model_audio_message(audio: bytes) -> dict:
+    return {
+        "serverContent": {
+            "modelTurn": {
+                "parts": [
+                    {
+                        "inlineData": {
+                            "mimeType": f"audio/pcm;rate={GEMINI_OUTPUT_RATE}",
+                            "data": base64.b64encode(audio).decode(),
+                        }
+                    }
+                ]
+            }
+        }
+    }
+
+
+def _server_message(event: dict) -> dict | None:
+    """The Live server message behind a recorded event."""
+    kind = event["type"]
+    if kind == "tool_call":
+        return {
+            "toolCall": {
+                "functionCalls": [
+                    {"id": call["id"], "name": call["name"], "args": call["args"] or {}}
+                    for call in event["calls"]
+                ]
+            }
+        }
+    if kind == "input_transcription":
+        return {
+            "serverContent": {
+                "inputTranscription": {"text": event["text"], "finished": event["finished"]}
+            }
+        }
+    if kind == "output_transcription":
+        return {"serverContent": {"outputTranscription": {"text": event["text"]}}}
+    if kind == "interrupted":
+        return {"serverContent": {"interrupted": True}}
+    if kind == "turn_complete":
+        return {"serverContent": {"turnComplete": True}}
+    return None
+
+
+class FakeLiveServer:
+    """Plays the server side of a recording to the first client to connect."""
+
+    def __init__(self, recording: Recording, speed: float):
+        self.recording = recording
+        self.speed = speed
+        self.started = 0.0
+        # (arrival time, cumulative 16 kHz audio bytes received)
+        self.uplink: list[tuple[float, int]] = []
+        # (send time, cumulative 24 kHz audio bytes sent)
+        self.downlink: list[tuple[float, int]] = []
+        self.script_done = asyncio.Event()
+        self._tool_response = asyncio.Event()
+        self._played = False
+
+    async def websocket_handler(self, request: web.Request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        setup = await ws.receive()
+        if setup.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+            return ws
+        await ws.send_str(json.dumps({"setupComplete": {}}))
+
+        script = None
+        if not self._played:
+            self._played = True
+            script = asyncio.create_task(self._play(ws))
+        received = 0
+        try:
+            async for msg in ws:
+                if msg.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+                    break
+                message = json.loads(msg.data)
+                # The client library sends some fields in snake_case, which
+                # the Live API accepts alongside camelCase
+                realtime = message.get("realtimeInput") or message.get("realtime_input") or {}
+                audio = realtime.get("audio")
+                if audio:
+                    received += len(base64.urlsafe_b64decode(audio["data"]))
+                    self.uplink.append((time.perf_counter(), received))
+                if "toolResponse" in message or "tool_response" in message:
+                    self._tool_response.set()
+        finally:
+            if script:
+                script.cancel()
+        return ws
+
+    async def _play(self, ws: web.WebSocketResponse):
+        # A tool response slower than the recorded one pushes the rest of
+        # the script back
+        delay = 0.0
+        not_before = 0.0
+        sent = 0
+        try:
+            for at, message in self.recording.server:
+                scheduled = self.started + at / self.speed
+                due = max(scheduled + delay, not_before)
+                delay = due - scheduled
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                if "toolCall" in message:
+                    self._tool_response.clear()
+                await ws.send_str(json.dumps(message))
+                parts = message.get("serverContent", {}).get("modelTurn", {}).get("parts")
+                if parts:
+                    sent += len(base64.b64decode(parts[0]["inlineData"]["data"]))
+                    self.downlink.append((time.perf_counter(), sent))
+                if "toolCall" in message:
+                    await self._tool_response.wait()
+                    not_before = time.perf_counter()
+        finally:
+            self.script_done.set()
+
+
+class TimedQueue(asyncio.Queue):
+    """
+    The session's mic queue, noting when the packet behind each queued chunk
+    was fed in. Barge-in VAD drops chunks, so uplink latency is matched on
+    what was queued, not on what was fed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.fed_at = 0.0
+        self.total = 0
+        # (feed time, cumulative bytes queued)
+        self.queued: list[tuple[float, int]] = []
+
+    def put_nowait(self, item):
+        super().put_nowait(item)
+        self.total += len(item)
+        self.queued.append((self.fed_at, self.total))
+
+
+class ReplayToolHandler:
+    """Answers tool calls with the recorded results, after the recorded time."""
+
+    def __init__(self, results: list[dict], speed: float):
+        self.results = list(results)
+        self.speed = speed
+
+    async def handle_tool_calls(self, calls):
+        if not self.results:
+            return ["No result was recorded for this call"] * len(calls)
+        recorded = self.results.pop(0)
+        await asyncio.sleep(recorded["ms"] / 1000 / self.speed)
+        return recorded["results"]
+
+
+def make_certificate(directory: str) -> tuple[str, str]:
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+            "-keyout", key, "-out", cert,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def percentiles_ms(samples: list[float]) -> dict | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+
+    def pick(pct):
+        return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] * 1000, 2)
+
+    return {"count": len(ordered), "p50": pick(50), "p90": pick(90), "p99": pick(99), "max": pick(100)}
+
+
+def match_latencies(sent: list[tuple[float, int]], arrived: list[tuple[float, int]]) -> list[float]:
+    """
+    For each (time, cumulative bytes) on the sending side, how long until
+    the receiving side's cumulative count caught up with it.
+    """
+    arrived_bytes = [total for _, total in arrived]
+    latencies = []
+    for at, total in sent:
+        index = bisect.bisect_left(arrived_bytes, total)
+        if index < len(arrived):
+            latencies.append(arrived[index][0] - at)
+    return latencies
+
+
+async def replay(recording: Recording, speed: float) -> dict:
+    meta = recording.meta
+    input_rate = meta.get("input_rate") or session_module.ESP_INPUT_RATE
+    server = FakeLiveServer(recording, speed)
+    app = web.Application()
+    app.add_routes([web.get("/ws/{method}", server.websocket_handler)])
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        server_ssl = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        server_ssl.load_cert_chain(cert, key)
+        client_ssl = ssl.create_default_context(cafile=cert)
+
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "localhost", 0, ssl_context=server_ssl)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        returned: list[tuple[float, int]] = []
+        returned_bytes = 0
+
+        async def send_return_audio(chunk: bytes):
+            nonlocal returned_bytes
+            returned_bytes += len(chunk)
+            # In 24 kHz bytes, to line up with what the server sent
+            returned.append(
+                (time.perf_counter(), returned_bytes * GEMINI_OUTPUT_RATE // ESP_OUTPUT_RATE)
+            )
+
+        proxy = SimpleNamespace(ha_client=HomeAssistantClient(), sessions={})
+        session = session_module.GeminiSession(
+            ("replay", 0),
+            proxy,
+            send_return_audio,
+            mode=meta.get("mode", "bridge"),
+            input_rate=input_rate,
+        )
+        session.client = genai.Client(
+            api_key="replay",
+            http_options=types.HttpOptions(
+                api_version="v1alpha",
+                base_url=f"https://localhost:{port}",
+                async_client_args={"ssl": client_ssl},
+            ),
+        )
+        session.tool_handler = ReplayToolHandler(recording.tool_results, speed)
+        mic_queue = session.audio_queue_mic = TimedQueue()
+        set_streamed_context(profile_key(session.context_profile), recording.context)
+
+        monitor = LoopMonitor()
+        monitor_task = asyncio.create_task(monitor.run())
+        cpu_started = time.process_time()
+        server.started = time.perf_counter()
+        session.task = asyncio.create_task(session.run())
+
+        call_latencies = []
+        for at, packet in recording.audio_in:
+            due = server.started + at / speed
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            mic_queue.fed_at = time.perf_counter()
+            await session.process_incoming_audio(packet)
+            call_latencies.append(time.perf_counter() - mic_queue.fed_at)
+
+        await server.script_done.wait()
+        sent_total = server.downlink[-1][1] if server.downlink else 0
+        drain_until = time.perf_counter() + DRAIN_SECONDS
+        while (not returned or returned[-1][1] < sent_total) and time.perf_counter() < drain_until:
+            await asyncio.sleep(0.05)
+        wall = time.perf_counter() - server.started
+        cpu = time.process_time() - cpu_started
+
+        session.stop()
+        await asyncio.gather(session.task, return_exceptions=True)
+        monitor_task.cancel()
+        await asyncio.gather(monitor_task, return_exceptions=True)
+        await runner.cleanup()
+
+    return {
+        "recording": {
+            "session_id": meta.get("session_id"),
+            "input_rate": input_rate,
+            "duration_s": round(recording.duration, 3),
+            "audio_packets": len(recording.audio_in),
+            "server_messages": len(recording.server),
+            "tool_calls": len(recording.tool_results),
+        },
+        "speed": speed,
+        "wall_s": round(wall, 3),
+        "uplink_ms": percentiles_ms(match_latencies(mic_queue.queued, server.uplink)),
+        "downlink_ms": percentiles_ms(match_latencies(server.downlink, returned)),
+        "process_incoming_audio_ms": percentiles_ms(call_latencies),
+        "cpu": {
+            "process_s": round(cpu, 3),
+            "process_pct": round(cpu * 100 / wall, 1) if wall else None,
+            "resample_s": round(session.stats.resample_cpu, 3),
+            "vad_s": round(session.stats.vad_cpu, 3),
+        },
+        "loop_lag": metrics.latency("loop.lag").snapshot(),
+        "audio": {
+            "uplink_bytes": server.uplink[-1][1] if server.uplink else 0,
+            "downlink_bytes": sent_total,
+            "returned_bytes": returned_bytes,
+        },
+    }
+
+
+def compare(result: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path}:")
+    for section in ("uplink_ms", "downlink_ms", "process_incoming_audio_ms"):
+        before, after = baseline.get(section), result.get(section)
+        if before and after:
+            for pct in ("p50", "p99"):
+                print(f"  {section:<28} {pct}  {before[pct]:9.2f} -> {after[pct]:9.2f} ms")
+    for name in ("process_s", "resample_s", "vad_s"):
+        print(
+            f"  cpu {name:<24}      {baseline['cpu'][name]:9.3f} -> {result['cpu'][name]:9.3f} s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("recording", help="a .glrec file from /data/recordings")
+    parser.add_argument("--speed", type=float, default=1.0, help="timeline speed-up")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON from an earlier replay")
+    args = parser.parse_args()
+
+    recording = Recording(args.recording)
+    result = asyncio.run(replay(recording, args.speed))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,10 +12,20 @@ from homeassistant.core import (
 from homeassistant.helpers.typing import ConfigType
 
 from .const import DOMAIN
-from .gemini import generate_config, generate_token, get_gemini_client
+from .context import ContextBuilder, async_device_profile
+from .gemini import (
+    config_version,
+    generate_config_payload,
+    generate_token,
+    get_gemini_client,
+)
+from .llm_tools import LLMToolsCache
+from .token_pool import TokenPool
+from .websocket_api import async_register_websocket_commands
 from .views import (
     GeminiConfigView,
     GeminiEntitiesView,
+    GeminiIntentsView,
     GeminiSessionView,
     GeminiToolsView,
     CancelTimerView,
@@ -45,6 +55,29 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     _LOGGER.info("Setting up Gemini Tool Bridge from config entry")
 
+    # Keep the device context rendered and up to date from HA events
+    context_builder = ContextBuilder(hass)
+    hass.data.setdefault(DOMAIN, {})["context_builder"] = context_builder
+    context_builder.async_start()
+
+    # Converted LLM API tools, kept until the tool set or exposure changes
+    llm_tools = LLMToolsCache(hass)
+    hass.data[DOMAIN]["llm_tools"] = llm_tools
+    llm_tools.async_start()
+
+    # Direct-mode tokens are minted on the first request for a profile, then
+    # kept topped up so later requests are instant. Creating the client
+    # reads certificates, so do it off the event loop.
+    client = await hass.async_add_executor_job(get_gemini_client, entry.data["api_key"])
+    token_pool = TokenPool(
+        lambda profile: generate_token(client, hass, profile),
+        lambda profile: config_version(hass, profile),
+    )
+    hass.data[DOMAIN]["token_pool"] = token_pool
+    hass.data[DOMAIN]["remove_pool_listener"] = context_builder.async_add_listener(
+        token_pool.async_config_changed
+    )
+
     # Register the HTTP View (The API endpoint)
     # We check if it's already registered to avoid errors on reload
     tools_view = GeminiToolsView()
@@ -52,19 +85,26 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     config_view = GeminiConfigView()
     session_view = GeminiSessionView(entry.data["api_key"])
     cancel_timer_view = CancelTimerView()
+    intents_view = GeminiIntentsView()
     try:
         hass.http.register_view(tools_view)
         hass.http.register_view(entities_view)
         hass.http.register_view(config_view)
         hass.http.register_view(session_view)
         hass.http.register_view(cancel_timer_view)
+        hass.http.register_view(intents_view)
     except ValueError:
         pass  # Already registered
 
+    # Lets the add-on keep its context warm instead of polling
+    async_register_websocket_commands(hass)
+
     async def get_token_action(call: ServiceCall) -> ServiceResponse:
         """Handle the service action call."""
-        token = await generate_token(get_gemini_client(entry.data["api_key"]), hass)
-        return {"token": token.name}
+        profile = None
+        if device_id := call.data.get("device_id"):
+            profile = async_device_profile(hass, device_id)
+        return {"token": await token_pool.async_get_token(profile)}
 
     hass.services.async_register(
         DOMAIN, "get_token", get_token_action, supports_response=SupportsResponse.ONLY
@@ -72,8 +112,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     async def get_config_action(call: ServiceCall) -> ServiceResponse:
         """Handle the service action call."""
-        config = await generate_config(hass)
-        return {"config": config.model_dump(exclude_none=True)}
+        profile = None
+        if device_id := call.data.get("device_id"):
+            profile = async_device_profile(hass, device_id)
+        return {"config": await generate_config_payload(hass, profile)}
 
     hass.services.async_register(
         DOMAIN, "get_config", get_config_action, supports_response=SupportsResponse.ONLY
@@ -94,4 +136,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 # 3. This is called when you remove the integration
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
+    data = hass.data.get(DOMAIN, {})
+    if remove_pool_listener := data.pop("remove_pool_listener", None):
+        remove_pool_listener()
+    if token_pool := data.pop("token_pool", None):
+        token_pool.async_stop()
+    if context_builder := data.pop("context_builder", None):
+        context_builder.async_stop()
+    if llm_tools := data.pop("llm_tools", None):
+        llm_tools.async_stop()
+    data.pop("config_cache", None)
     return True
@@ -1,21 +1,31 @@
 """Generation of context for the Gemini model."""
+import hashlib
 import re
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
 from typing import TypedDict
 
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+)
 from homeassistant.components.homeassistant import (
     exposed_entities as ha_exposed_entities,
 )
 
-DEVICE_CONTEXT_PREFIX_LINES = [
-    # TODO: Update location details as appropriate for the deployment
-    "You are running on My Display, located in the Office area of an apartment in Jamaica Plain, MA. Use this location for any location-based context like weather or time.",
-    "",
+from .const import DOMAIN
+
+TOOL_NOTES_LINES = [
     "TOOL NOTES: In the description of each tool, parameters are listed in square brackets [] to indicate possible slot combinations.",
     "For example, [name, area+name] means the tool can be used with either the 'name' parameter alone or the 'area' parameter with the 'name' parameter together, but will fail if area is used alone.",
     "Any tool that can be called with a 'name' parameter can also be called with an 'entity_id' parameter instead of 'name' for more precise targeting.",
-    "",
+]
+
+DEVICE_NOTES_LINES = [
     "ENTITY AND DEVICE NOTES: The following lists group entities by their assigned Areas in Home Assistant.",
     "Each entity is represented with its User Friendly Name and Entity ID for tool usage.",
     "Entity names that start with their device name have been shortened. A '*' indicates this (e.g., 'Humidifier Temperature' is shown as '*Temperature' under Humidifier.)",
@@ -24,24 +34,90 @@ DEVICE_CONTEXT_PREFIX_LINES = [
     "DEVICE AND ENTITY LIST:",
 ]
 
-entity_name_map: dict[str, str] = {}
+COMPACT_NOTES_LINES = [
+    "ENTITY NOTES: Entities are listed by Area, one line per domain. Braces expand to Entity IDs: 'light.kitchen_{ceiling, island}' is light.kitchen_ceiling and light.kitchen_island.",
+    "A name after '=' is the entity's User Friendly Name; without one, the name is the Entity ID with underscores as spaces (light.kitchen_ceiling is 'Kitchen Ceiling').",
+    "",
+    "ENTITY LIST:",
+]
 
-def format_entity_name(entity, device_name=None, area_name=None):
+
+def context_prefix_lines(location_lines=None, compact=False) -> list[str]:
     """
-    Helper to get a cleaned up entity name.
-    Strips device and area names from the start if present.
+    The static instructions above the entity list, led by the device's
+    location when a profile gives one.
     """
-    eid = entity.get("entity_id")
+    return [
+        *((*location_lines, "") if location_lines else ()),
+        *TOOL_NOTES_LINES,
+        "",
+        *(COMPACT_NOTES_LINES if compact else DEVICE_NOTES_LINES),
+    ]
+
 
-    friendly_name = (
+DEVICE_CONTEXT_PREFIX_LINES = context_prefix_lines()
+COMPACT_CONTEXT_PREFIX_LINES = context_prefix_lines(compact=True)
+
+CONTEXT_FORMATS = ("full", "compact")
+
+# Entities from outside a profile's own and neighboring areas
+DEFAULT_OTHER_AREA_LIMIT = 50
+# Scoped renderings a ContextBuilder keeps between changes
+MAX_CACHED_RENDERINGS = 32
+
+# Entity categories that are never useful to the model
+EXCLUDED_ENTITY_CATEGORIES = {"diagnostic", "config"}
+
+# Lower sorts first; the lowest-priority entities are dropped to fit a budget
+DOMAIN_PRIORITY = {
+    "light": 0,
+    "switch": 0,
+    "fan": 0,
+    "cover": 0,
+    "climate": 0,
+    "lock": 0,
+    "media_player": 0,
+    "vacuum": 1,
+    "humidifier": 1,
+    "valve": 1,
+    "water_heater": 1,
+    "scene": 1,
+    "script": 1,
+    "todo": 1,
+    "timer": 1,
+    "input_boolean": 1,
+    "weather": 1,
+    "sensor": 3,
+    "binary_sensor": 3,
+}
+DEFAULT_DOMAIN_PRIORITY = 2
+
+# Rough characters per token for English text and identifiers
+CHARS_PER_TOKEN = 4
+
+
+def content_etag(body: str | bytes) -> str:
+    """A strong ETag for a response body."""
+    if isinstance(body, str):
+        body = body.encode()
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+def entity_friendly_name(entity) -> str:
+    """The name the user knows an entity by, before any shortening."""
+    return (
         entity.get("friendly_name")
         or entity.get("name")
         or entity.get("original_name")
-        or eid.split(".")[1].replace("_", " ")
+        or entity["entity_id"].split(".")[1].replace("_", " ")
     )
-    entity_name_map[eid] = friendly_name
 
-    name = truncate_name_for_area(friendly_name, area_name)
+
+def format_entity_name(entity, device_name=None, area_name=None):
+    """
+    Helper to get a cleaned up entity name.
+    Strips device and area names from the start if present.
+    """
+    name = truncate_name_for_area(entity_friendly_name(entity), area_name)
 
     if device_name and name.lower().startswith(device_name.lower()):
         short_name = name[len(device_name) :].strip()
@@ -73,77 +149,477 @@ def truncate_name_for_area(device_name: str, area_name=None):
     return name
 
 
-def generate_grouped_device_context(data):
+UNASSIGNED_AREA = "General / Unassigned"
+
+
+def area_label(area_name):
+    """The section heading used for an area id."""
+    name = area_name if area_name else UNASSIGNED_AREA
+    return name.replace("_", " ").title()
+
+
+def order_areas(area_names):
+    """Sorts area headings, keeping the unassigned section last."""
+    sorted_areas = sorted(area_names)
+    if UNASSIGNED_AREA in sorted_areas:
+        sorted_areas.remove(UNASSIGNED_AREA)
+        sorted_areas.append(UNASSIGNED_AREA)
+    return sorted_areas
+
+
+def is_hidden_device(device_data) -> bool:
+    """Devices whose entities are left out of the context."""
+    device_name = device_data.get("name_by_user") or device_data.get("name") or ""
+    return (
+        "Adaptive Lighting" in (device_data.get("name") or "")
+        or "Adaptive Lighting" in device_name
+    )
+
+
+def render_device_entry(device_data, entities):
+    """Renders one device line, or None if the device should be skipped."""
+    device_data = device_data or {}
+    if not entities:
+        return None
+
+    device_name = device_data.get("name_by_user") or device_data.get("name") or ""
+    if is_hidden_device(device_data):
+        return None
+
+    area = device_data.get("area_id")
+    truncated_device_name = truncate_name_for_area(device_name, area)
+    entity_strings = []
+    for entity in entities:
+        eid = entity.get("entity_id")
+        label = format_entity_name(entity, truncated_device_name, area)
+        entity_strings.append(f"{label} ({eid})")
+
+    # if len(entity_strings) == 1:
+    #     if entity_strings[0].startswith(device_name):
+    #         entry = f"- {entity_strings[0]}"
+    #     else:
+    #         entry = f"- {device_name}: {entity_strings[0]}"
+    # else:
+
+    return f"- {truncated_device_name}: {', '.join(entity_strings)}"
+
+
+def render_entity_entry(entity):
+    """Renders the line for an entity that has no device."""
+    label = format_entity_name(entity, None, entity.get("area_id"))
+    return f"- {label} ({entity.get('entity_id')})"
+
+
+def render_area_block(area, items):
+    """Renders an area section; `items` must already be sorted."""
+    return "".join([f"Area: {area}\n", *(f"  {item}\n" for item in items)])
+
+
+def join_context(blocks, prefix_lines=None):
+    """Joins rendered area blocks under the static instructions."""
+    if prefix_lines is None:
+        prefix_lines = DEVICE_CONTEXT_PREFIX_LINES
+    header = "\n".join([*prefix_lines, ""])
+    if not blocks:
+        return header
+    return header + "\n" + "\n".join(blocks)
+
+
+def generate_grouped_device_context(data, prefix_lines=None):
     """
     Generates a device-centric context string.
     """
     area_map = {}
 
     def add_to_map(area_name, entry_str):
-        name = area_name if area_name else "General / Unassigned"
-        clean_name = name.replace("_", " ").title()
+        clean_name = area_label(area_name)
         if clean_name not in area_map:
             area_map[clean_name] = []
         area_map[clean_name].append(entry_str)
 
     if "devices" in data:
         for _, device_info in data["devices"].items():
-            device_data = device_info.get("device", {})
-            entities = device_info.get("entities", [])
-
-            if not entities:
-                continue
-
-            device_name = device_data.get("name_by_user") or device_data.get("name")
-            if (
-                "Adaptive Lighting" in device_data.get("name", "")
-                or "Adaptive Lighting" in device_name
-            ):
-                continue
-
-            area = device_data.get("area_id")
-            entity_strings = []
-            for entity in entities:
-                eid = entity.get("entity_id")
-                truncated_device_name = truncate_name_for_area(device_name, area)
-                label = format_entity_name(entity, truncated_device_name, area)
-                entity_strings.append(f"{label} ({eid})")
-
-            # if len(entity_strings) == 1:
-            #     if entity_strings[0].startswith(device_name):
-            #         entry = f"- {entity_strings[0]}"
-            #     else:
-            #         entry = f"- {device_name}: {entity_strings[0]}"
-            # else:
-
-            entry = f"- {truncated_device_name}: {', '.join(entity_strings)}"
-
-            add_to_map(area, entry)
+            device_data = device_info.get("device") or {}
+            entry = render_device_entry(device_data, device_info.get("entities", []))
+            if entry is not None:
+                add_to_map(device_data.get("area_id"), entry)
 
     if "non_device_entities" in data:
         for entity in data["non_device_entities"]:
-            eid = entity.get("entity_id")
-            area = entity.get("area_id")
-            label = format_entity_name(entity, None, area)
-            if area:
-                add_to_map(area, f"- {label} ({eid})")
-            else:
-              add_to_map("General / Unassigned", f"- {label} ({eid})")
+            add_to_map(entity.get("area_id"), render_entity_entry(entity))
 
-    lines = [*DEVICE_CONTEXT_PREFIX_LINES, ""]
-    sorted_areas = sorted(area_map.keys())
+    return join_context(
+        [
+            render_area_block(area, sorted(area_map[area]))
+            for area in order_areas(area_map)
+        ],
+        prefix_lines,
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimated model tokens for a piece of context."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+class ContextStats(TypedDict):
+    """Size of a rendered context."""
+    chars: int
+    tokens: int
+    entities: int
+    dropped: int
+
+
+class RenderedContext(TypedDict):
+    """A rendered context string with its size."""
+    text: str
+    stats: ContextStats
+
+
+def _compact_name(name: str) -> str:
+    if any(char in name for char in ",{}="):
+        return f'"{name}"'
+    return name
+
+
+def _compact_item(object_id: str, suffix: str, name: str) -> str:
+    """One entity inside a domain line; the name is left out if implied."""
+    if name.lower() == object_id.replace("_", " ").lower():
+        return suffix
+    return f"{suffix}={_compact_name(name)}"
+
+
+def _common_prefix(object_ids: list[str]) -> str:
+    """The longest shared prefix ending in '_', or ''."""
+    if len(object_ids) < 2:
+        return ""
+    first, last = min(object_ids), max(object_ids)
+    length = 0
+    while length < len(first) and first[length] == last[length]:
+        length += 1
+    return first[: first.rfind("_", 0, length) + 1]
+
+
+def render_compact_domain(domain: str, entities: list[tuple[str, str]]) -> str:
+    """
+    Renders one domain line from (object_id, name) pairs, factoring out
+    the shared object_id prefix.
+    """
+    object_ids = [object_id for object_id, _ in entities]
+    prefix = _common_prefix(object_ids)
+    items = [
+        _compact_item(object_id, object_id[len(prefix) :], name)
+        for object_id, name in sorted(entities)
+    ]
+    if len(items) == 1 and not prefix:
+        return f"{domain}.{items[0]}"
+    return f"{domain}.{prefix}{{{', '.join(items)}}}"
+
+
+def _compact_candidates(data) -> list[tuple[tuple, str, str, str]]:
+    """
+    Exposed entities worth listing, as (priority key, area, entity_id, name),
+    best first.
+    """
+    candidates = []
+
+    def add(entity, area_id):
+        if entity.get("entity_category") in EXCLUDED_ENTITY_CATEGORIES:
+            return
+        eid = entity.get("entity_id")
+        name = entity_friendly_name(entity)
+        area = area_label(entity.get("area_id") or area_id)
+        domain = eid.split(".")[0]
+        priority = DOMAIN_PRIORITY.get(domain, DEFAULT_DOMAIN_PRIORITY)
+        candidates.append(((priority, area == UNASSIGNED_AREA, eid), area, eid, name))
+
+    for device_info in data.get("devices", {}).values():
+        device_data = device_info.get("device") or {}
+        if is_hidden_device(device_data):
+            continue
+        for entity in device_info.get("entities", []):
+            add(entity, device_data.get("area_id"))
 
-    if "General / Unassigned" in sorted_areas:
-        sorted_areas.remove("General / Unassigned")
-        sorted_areas.append("General / Unassigned")
+    for entity in data.get("non_device_entities", []):
+        add(entity, None)
+
+    candidates.sort()
+    return candidates
+
+
+def _render_compact(candidates, dropped: int, prefix_lines=None) -> str:
+    areas: dict[str, dict[str, list[tuple[str, str]]]] = {}
+    for _, area, eid, name in candidates:
+        domain, object_id = eid.split(".", 1)
+        areas.setdefault(area, {}).setdefault(domain, []).append((object_id, name))
+
+    blocks = [
+        render_area_block(
+            area,
+            [
+                render_compact_domain(domain, entities)
+                for domain, entities in sorted(areas[area].items())
+            ],
+        )
+        for area in order_areas(areas)
+    ]
+    if dropped:
+        blocks.append(
+            f"({dropped} lower-priority entities omitted; use GetLiveContext to see all.)\n"
+        )
+    return join_context(
+        blocks, COMPACT_CONTEXT_PREFIX_LINES if prefix_lines is None else prefix_lines
+    )
+
+
+def generate_compact_context(
+    data, token_budget: int | None = None, prefix_lines=None
+) -> RenderedContext:
+    """
+    Generates a compact, domain-grouped context string.
+
+    Diagnostic and config entities are left out. With a token budget,
+    the lowest-priority entities (sensors first, unassigned areas last
+    within a domain tier) are dropped until the estimate fits.
+    """
+    candidates = _compact_candidates(data)
+    keep = len(candidates)
+    text = _render_compact(candidates, 0, prefix_lines)
+
+    # Shrink the entity list by the overshoot ratio (ignoring the fixed
+    # header and omission note); converges in a few renders
+    header_tokens = estimate_tokens(
+        _render_compact([], len(candidates), prefix_lines)
+    )
+    while token_budget and keep and estimate_tokens(text) > token_budget:
+        list_tokens = max(estimate_tokens(text) - header_tokens, 1)
+        target = max(token_budget - header_tokens, 0)
+        keep = max(min(keep - 1, keep * target // list_tokens), 0)
+        text = _render_compact(
+            candidates[:keep], len(candidates) - keep, prefix_lines
+        )
+
+    return RenderedContext(
+        text=text,
+        stats=ContextStats(
+            chars=len(text),
+            tokens=estimate_tokens(text),
+            entities=keep,
+            dropped=len(candidates) - keep,
+        ),
+    )
+
+
+def context_stats(text: str, entities: int) -> ContextStats:
+    """Size of a full-format context string."""
+    return ContextStats(
+        chars=len(text), tokens=estimate_tokens(text), entities=entities, dropped=0
+    )
+
+
+def count_entities(data) -> int:
+    """Number of entities in a raw entities payload."""
+    return len(data.get("non_device_entities", [])) + sum(
+        len(info.get("entities", [])) for info in data.get("devices", {}).values()
+    )
+
+
+@dataclass(frozen=True)
+class ContextSnapshot:
+    """
+    One version of the whole-house context with the entity names it was
+    built from. Immutable, so readers share it without copying; a change
+    produces a new snapshot instead.
+    """
 
-    for area in sorted_areas:
-        lines.append(f"Area: {area}")
-        for item in sorted(area_map[area]):
-            lines.append(f"  {item}")
-        lines.append("")
+    version: int
+    text: str
+    etag: str
+    stats: ContextStats
+    # entity_id -> friendly name, for every exposed entity
+    names: Mapping[str, str]
 
-    return "\n".join(lines)
+    @classmethod
+    def build(
+        cls, version: int, rendered: RenderedContext, names: Mapping[str, str]
+    ) -> "ContextSnapshot":
+        """Copies `names` unless it is already a read-only view to share."""
+        if not isinstance(names, MappingProxyType):
+            names = MappingProxyType(dict(names))
+        return cls(
+            version=version,
+            text=rendered["text"],
+            etag=content_etag(rendered["text"]),
+            stats=rendered["stats"],
+            names=names,
+        )
+
+
+def entity_names(data) -> dict[str, str]:
+    """entity_id -> friendly name for a raw entities payload."""
+    entities = [
+        *data.get("non_device_entities", []),
+        *(
+            entity
+            for info in data.get("devices", {}).values()
+            for entity in info.get("entities", [])
+        ),
+    ]
+    return {entity["entity_id"]: entity_friendly_name(entity) for entity in entities}
+
+
+@dataclass(frozen=True)
+class ContextProfile:
+    """
+    What one satellite sees: its own and neighboring areas in full, plus a
+    capped number of entities from everywhere else.
+    """
+
+    area: str | None = None
+    neighbors: tuple[str, ...] = ()
+    # None lists every other entity
+    other_area_limit: int | None = DEFAULT_OTHER_AREA_LIMIT
+    # Where the device is, for weather, time and the like; without it (or
+    # an area) the context names no location
+    location: str | None = None
+
+    @property
+    def scoped(self) -> bool:
+        return bool(self.area or self.neighbors)
+
+    def prefix_lines(self, compact=False) -> list[str]:
+        location_lines = None
+        if self.location or self.area:
+            location = self.location or (
+                f"You are running on a device located in the {area_label(self.area)} area."
+            )
+            location_lines = [location]
+            if self.area:
+                location_lines.append(
+                    "When a request does not name an area, assume it means this area."
+                )
+            if self.scoped and self.other_area_limit is not None:
+                location_lines.append(
+                    "Only nearby areas are listed in full; use GetLiveContext for entities elsewhere in the home."
+                )
+        return context_prefix_lines(location_lines, compact)
+
+
+def scope_raw_entities(data, profile: ContextProfile) -> "RawEntities":
+    """
+    Keeps every entity in the profile's areas and the highest-priority
+    `other_area_limit` entities from the rest.
+    """
+    if not profile.scoped or profile.other_area_limit is None:
+        return data
+
+    local_areas = {area_label(area) for area in (profile.area, *profile.neighbors) if area}
+    keep: set[str] = set()
+    others = []
+
+    def consider(entity, area_id):
+        eid = entity.get("entity_id")
+        if area_label(area_id) in local_areas:
+            keep.add(eid)
+            return
+        priority = DOMAIN_PRIORITY.get(eid.split(".")[0], DEFAULT_DOMAIN_PRIORITY)
+        if entity.get("entity_category") in EXCLUDED_ENTITY_CATEGORIES:
+            priority += len(DOMAIN_PRIORITY)
+        others.append((priority, eid))
+
+    for device_info in data.get("devices", {}).values():
+        device_area = (device_info.get("device") or {}).get("area_id")
+        for entity in device_info.get("entities", []):
+            consider(entity, device_area)
+    for entity in data.get("non_device_entities", []):
+        consider(entity, entity.get("area_id"))
+
+    others.sort()
+    keep.update(eid for _, eid in others[: profile.other_area_limit])
+
+    devices = {}
+    for device_id, device_info in data.get("devices", {}).items():
+        entities = [e for e in device_info.get("entities", []) if e.get("entity_id") in keep]
+        if entities:
+            devices[device_id] = {**device_info, "entities": entities}
+    return RawEntities(
+        devices=devices,
+        non_device_entities=[
+            entity
+            for entity in data.get("non_device_entities", [])
+            if entity.get("entity_id") in keep
+        ],
+    )
+
+
+def render_context(
+    data,
+    profile: ContextProfile | None = None,
+    context_format: str = "full",
+    token_budget: int | None = None,
+) -> RenderedContext:
+    """Renders raw entities in the given format, scoped to a profile."""
+    prefix_lines = None
+    if profile is not None:
+        data = scope_raw_entities(data, profile)
+        prefix_lines = profile.prefix_lines(compact=context_format == "compact")
+
+    if context_format == "compact":
+        return generate_compact_context(data, token_budget, prefix_lines)
+
+    text = generate_grouped_device_context(data, prefix_lines)
+    return RenderedContext(text=text, stats=context_stats(text, count_entities(data)))
+
+
+@callback
+def async_device_profile(hass: HomeAssistant, device_id: str, **overrides) -> ContextProfile:
+    """
+    A profile for a Home Assistant device (e.g. a voice satellite), placed
+    in the device's area. Explicit overrides win over the registry.
+    """
+    values = {key: value for key, value in overrides.items() if value is not None}
+    if device := dr.async_get(hass).async_get(device_id):
+        values.setdefault("area", device.area_id)
+        name = device.name_by_user or device.name
+        if name and values["area"]:
+            values.setdefault(
+                "location",
+                f"You are running on {name}, located in the {area_label(values['area'])} area.",
+            )
+    return ContextProfile(**values)
+
+
+@callback
+def async_profile_from_params(hass: HomeAssistant, params) -> ContextProfile | None:
+    """
+    Reads a profile from request parameters: `device_id` and/or `area`,
+    `neighbors` (comma separated), `other_area_limit` and `location`.
+    Raises ValueError on invalid values.
+    """
+    overrides = {
+        "area": params.get("area") or None,
+        "neighbors": tuple(
+            area.strip() for area in (params.get("neighbors") or "").split(",") if area.strip()
+        )
+        or None,
+        "location": params.get("location") or None,
+    }
+    if params.get("other_area_limit") not in (None, ""):
+        try:
+            other_area_limit = int(params["other_area_limit"])
+        except ValueError:
+            raise ValueError("other_area_limit must be an integer") from None
+        if other_area_limit < 0:
+            raise ValueError("other_area_limit must not be negative")
+        overrides["other_area_limit"] = other_area_limit
+
+    if device_id := params.get("device_id"):
+        return async_device_profile(hass, device_id, **overrides)
+    if any(value is not None for value in overrides.values()):
+        return ContextProfile(
+            **{key: value for key, value in overrides.items() if value is not None}
+        )
+    return None
 
 
 class RawEntities(TypedDict):
@@ -196,9 +672,378 @@ async def get_raw_entities(hass: HomeAssistant):
 
     return RawEntities(devices=devices, non_device_entities=non_device_entities)
 
-async def generate_context_from_ha(hass: HomeAssistant):
+class _EntityRecord:
+    """An exposed entity as the context builder last saw it."""
+
+    __slots__ = ("entity", "device_id", "area")
+
+    def __init__(self, entity: dict, device_id: str | None, area: str):
+        self.entity = entity
+        self.device_id = device_id
+        # Section heading this entity (or its device) renders under
+        self.area = area
+
+
+class ContextBuilder:
+    """
+    Keeps the grouped device context up to date from registry, exposure and
+    state events instead of rebuilding it on every request.
+
+    Each change re-renders only the area sections it touches; `context`
+    returns the cached string and only re-joins sections after a change.
+    """
+
+    ASSISTANT = "conversation"
+
+    def __init__(self, hass: HomeAssistant | None):
+        self.hass = hass
+        self._entities: dict[str, _EntityRecord] = {}
+        self._devices: dict[str, dict] = {}
+        # device_id -> entity ids (dict for stable insertion order)
+        self._device_entities: dict[str, dict[str, None]] = {}
+        self._device_area: dict[str, str] = {}
+        # Section heading -> rendered members ("device"/"entity", id)
+        self._area_members: dict[str, set[tuple[str, str]]] = {}
+        self._area_blocks: dict[str, str] = {}
+        self._dirty_areas: set[str] = set()
+        # entity_id -> friendly name of every exposed entity
+        self._names: dict[str, str] = {}
+        # Read-only copy of _names shared by snapshots until a name changes,
+        # so subscribers can tell an unchanged map by identity
+        self._names_view: Mapping[str, str] | None = None
+        self._snapshot: ContextSnapshot | None = None
+        # (profile, format, token budget) -> rendering and ETag, until the next change
+        self._renderings: dict[tuple, tuple[RenderedContext, str]] = {}
+        self._unsubs: list[CALLBACK_TYPE] = []
+        self._listeners: list[CALLBACK_TYPE] = []
+        self.version = 0
+
+    # --- Lifecycle ---
+
+    @callback
+    def async_start(self):
+        """Builds the initial context and subscribes to change events."""
+        assert self.hass is not None
+        bus = self.hass.bus
+        self._unsubs = [
+            bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, self._on_entity_registry),
+            bus.async_listen(dr.EVENT_DEVICE_REGISTRY_UPDATED, self._on_device_registry),
+            bus.async_listen(ar.EVENT_AREA_REGISTRY_UPDATED, self._on_area_registry),
+            bus.async_listen(EVENT_STATE_CHANGED, self._on_state_changed),
+            ha_exposed_entities.async_listen_entity_updates(
+                self.hass, self.ASSISTANT, self._on_exposure_changed
+            ),
+        ]
+        self.async_rebuild()
+
+    @callback
+    def async_stop(self):
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+
+    @callback
+    def async_add_listener(self, listener: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """
+        Calls `listener` when the rendered context goes stale; it is called
+        once per change, not again until the context is read.
+        """
+        self._listeners.append(listener)
+
+        @callback
+        def remove_listener():
+            self._listeners.remove(listener)
+
+        return remove_listener
+
+    @callback
+    def async_rebuild(self):
+        """Drops everything and re-reads all exposed entities."""
+        assert self.hass is not None
+        for entity_id in list(self._entities):
+            self.apply(entity_id, None)
+        for state in self.hass.states.async_all():
+            self.refresh_entity(state.entity_id)
+
+    # --- Event handlers ---
+
+    @callback
+    def _on_entity_registry(self, event: Event):
+        self.refresh_entity(event.data["entity_id"])
+        if old_entity_id := event.data.get("old_entity_id"):
+            self.refresh_entity(old_entity_id)
+
+    @callback
+    def _on_device_registry(self, event: Event):
+        device_id = event.data["device_id"]
+        for entity_id in list(self._device_entities.get(device_id, ())):
+            self.refresh_entity(entity_id)
+
+    @callback
+    def _on_area_registry(self, event: Event):
+        # Sections are keyed by area id, so only that section can change
+        area = area_label(event.data.get("area_id"))
+        if area in self._area_members:
+            self._mark_dirty(area)
+
+    @callback
+    def _on_state_changed(self, event: Event):
+        old_state = event.data.get("old_state")
+        new_state = event.data.get("new_state")
+        if (
+            old_state is None
+            or new_state is None
+            or old_state.name != new_state.name
+            or old_state.attributes.get("friendly_name")
+            != new_state.attributes.get("friendly_name")
+        ):
+            self.refresh_entity(event.data["entity_id"])
+
+    @callback
+    def _on_exposure_changed(self):
+        # The listener does not say which entity changed; compare exposure
+        # flags (cheap lookups) and only re-render the ones that flipped.
+        assert self.hass is not None
+        for state in self.hass.states.async_all():
+            exposed = ha_exposed_entities.async_should_expose(
+                self.hass, self.ASSISTANT, state.entity_id
+            )
+            if exposed != (state.entity_id in self._entities):
+                self.refresh_entity(state.entity_id)
+
+    # --- Incremental updates ---
+
+    @callback
+    def refresh_entity(self, entity_id: str):
+        """Re-reads one entity (and its device) from Home Assistant."""
+        assert self.hass is not None
+        state = self.hass.states.get(entity_id)
+        if state is None or not ha_exposed_entities.async_should_expose(
+            self.hass, self.ASSISTANT, entity_id
+        ):
+            self.apply(entity_id, None)
+            return
+
+        entity_entry = er.async_get(self.hass).async_get(entity_id)
+        entity_dict = {
+            "entity_id": entity_id,
+            "state": state.state,
+            "name": state.name,
+            "friendly_name": state.attributes.get("friendly_name"),
+        }
+        if entity_entry:
+            entity_dict = {**entity_entry.extended_dict, **entity_dict}
+
+        device = None
+        device_id = entity_entry.device_id if entity_entry else None
+        if device_id:
+            device_entry = dr.async_get(self.hass).async_get(device_id)
+            device = device_entry.dict_repr if device_entry else {}
+
+        self.apply(entity_id, entity_dict, device_id, device)
+
+    def apply(self, entity_id, entity_dict, device_id=None, device=None):
+        """
+        Records the current view of one entity (None removes it) and marks
+        the affected area sections dirty.
+        """
+        old = self._entities.get(entity_id)
+        if old is not None and (entity_dict is None or old.device_id != device_id):
+            del self._entities[entity_id]
+            if old.device_id:
+                members = self._device_entities.get(old.device_id, {})
+                members.pop(entity_id, None)
+                self._mark_dirty(old.area)
+                if not members:
+                    self._device_entities.pop(old.device_id, None)
+                    self._devices.pop(old.device_id, None)
+                    self._device_area.pop(old.device_id, None)
+                    self._remove_member(old.area, ("device", old.device_id))
+            else:
+                self._remove_member(old.area, ("entity", entity_id))
+            if self._names.pop(entity_id, None) is not None:
+                self._names_view = None
+            old = None
+
+        if entity_dict is None:
+            return
+
+        if device_id:
+            device = device or {}
+            area = area_label(device.get("area_id"))
+            previous_area = self._device_area.get(device_id)
+            if previous_area is not None and previous_area != area:
+                # The device moved; its other entities move with it
+                self._remove_member(previous_area, ("device", device_id))
+                for other in self._device_entities.get(device_id, ()):
+                    self._entities[other].area = area
+            self._devices[device_id] = device
+            self._device_area[device_id] = area
+            self._device_entities.setdefault(device_id, {})[entity_id] = None
+            self._add_member(area, ("device", device_id))
+        else:
+            area = area_label(entity_dict.get("area_id"))
+            if old is not None and old.area != area:
+                self._remove_member(old.area, ("entity", entity_id))
+            self._add_member(area, ("entity", entity_id))
+
+        self._entities[entity_id] = _EntityRecord(entity_dict, device_id, area)
+        name = entity_friendly_name(entity_dict)
+        if self._names.get(entity_id) != name:
+            self._names[entity_id] = name
+            self._names_view = None
+
+    def _add_member(self, area, member):
+        self._area_members.setdefault(area, set()).add(member)
+        self._mark_dirty(area)
+
+    def _remove_member(self, area, member):
+        members = self._area_members.get(area)
+        if members is not None:
+            members.discard(member)
+            if not members:
+                del self._area_members[area]
+        self._mark_dirty(area)
+
+    def is_exposed(self, entity_id: str) -> bool:
+        return entity_id in self._entities
+
+    def _mark_dirty(self, area):
+        was_clean = self._snapshot is not None or bool(self._renderings)
+        self._dirty_areas.add(area)
+        self._snapshot = None
+        self._renderings.clear()
+        if was_clean:
+            for listener in self._listeners:
+                listener()
+
+    def _render_area(self, area) -> str | None:
+        items = []
+        for kind, member_id in self._area_members.get(area, ()):
+            if kind == "device":
+                entry = render_device_entry(
+                    self._devices.get(member_id),
+                    [
+                        self._entities[entity_id].entity
+                        for entity_id in self._device_entities.get(member_id, ())
+                    ],
+                )
+            else:
+                entry = render_entity_entry(self._entities[member_id].entity)
+            if entry is not None:
+                items.append(entry)
+        return render_area_block(area, sorted(items)) if items else None
+
+    # --- Readers ---
+
+    @property
+    def snapshot(self) -> ContextSnapshot:
+        """
+        The current context, ETag and name map together; rebuilt only after
+        a change, so repeated reads return the same object.
+        """
+        if self._snapshot is None:
+            for area in self._dirty_areas:
+                block = self._render_area(area)
+                if block is None:
+                    self._area_blocks.pop(area, None)
+                else:
+                    self._area_blocks[area] = block
+            self._dirty_areas.clear()
+            text = join_context(
+                [self._area_blocks[area] for area in order_areas(self._area_blocks)]
+            )
+            self.version += 1
+            if self._names_view is None:
+                self._names_view = MappingProxyType(dict(self._names))
+            self._snapshot = ContextSnapshot.build(
+                self.version,
+                RenderedContext(text=text, stats=context_stats(text, len(self._entities))),
+                self._names_view,
+            )
+        return self._snapshot
+
+    @property
+    def context(self) -> str:
+        """The rendered context; cached until something changes."""
+        return self.snapshot.text
+
+    @property
+    def etag(self) -> str:
+        """ETag of `context`, hashed once per change."""
+        return self.snapshot.etag
+
+    @property
+    def stats(self) -> ContextStats:
+        """Size of the full-format `context`."""
+        return self.snapshot.stats
+
+    def render(
+        self,
+        profile: ContextProfile | None = None,
+        context_format: str = "full",
+        token_budget: int | None = None,
+    ) -> tuple[RenderedContext, str]:
+        """
+        A rendering and its ETag, cached per (profile, format, budget) until
+        the next change. The unscoped full context is kept incrementally.
+        """
+        if profile is None and context_format == "full":
+            snapshot = self.snapshot
+            return RenderedContext(text=snapshot.text, stats=snapshot.stats), snapshot.etag
+
+        key = (profile, context_format, token_budget)
+        cached = self._renderings.get(key)
+        if cached is None:
+            rendered = render_context(
+                self.raw_entities(), profile, context_format, token_budget
+            )
+            if len(self._renderings) >= MAX_CACHED_RENDERINGS:
+                # Drop the oldest; profiles come from a short, fixed list
+                del self._renderings[next(iter(self._renderings))]
+            cached = self._renderings[key] = (rendered, content_etag(rendered["text"]))
+        return cached
+
+    def raw_entities(self) -> "RawEntities":
+        """The exposed entities in the shape returned by get_raw_entities."""
+        devices = {}
+        non_device_entities = []
+        for entity_id, record in self._entities.items():
+            entity = record.entity
+            if self.hass is not None and (state := self.hass.states.get(entity_id)):
+                entity = {**entity, "state": state.state}
+            if record.device_id:
+                device_info = devices.setdefault(
+                    record.device_id,
+                    {"device": self._devices.get(record.device_id), "entities": []},
+                )
+                device_info["entities"].append(entity)
+            else:
+                non_device_entities.append(entity)
+        return RawEntities(devices=devices, non_device_entities=non_device_entities)
+
+
+@callback
+def get_context_builder(hass: HomeAssistant) -> ContextBuilder | None:
+    """The running context builder, if the integration has started one."""
+    return hass.data.get(DOMAIN, {}).get("context_builder")
+
+
+async def generate_context_from_ha(
+    hass: HomeAssistant, profile: ContextProfile | None = None
+):
     """The main function to get the context string directly from HA."""
+    if builder := get_context_builder(hass):
+        return builder.render(profile)[0]["text"]
+
+    raw_data = await get_raw_entities(hass)
+    return render_context(raw_data, profile)["text"]
+
+
+async def async_get_snapshot(hass: HomeAssistant) -> ContextSnapshot:
+    """The builder's snapshot, or a one-off one built from the registries."""
+    if builder := get_context_builder(hass):
+        return builder.snapshot
+
     raw_data = await get_raw_entities(hass)
-    # This call populates the entity_name_map
-    context = generate_grouped_device_context(raw_data)
-    return context
+    return ContextSnapshot.build(0, render_context(raw_data), entity_names(raw_data))
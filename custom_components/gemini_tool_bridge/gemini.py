@@ -8,30 +8,38 @@ from homeassistant.core import HomeAssistant
 import google.genai as genai
 from google.genai import types
 
+from .const import DOMAIN
 from .context import (
+    ContextProfile,
     generate_context_from_ha,
+    get_context_builder,
 )
-from .intent_tools import get_intent_tools
+from .intent_tools import TOOLS_VERSION, get_intent_tools
+from .token_pool import NEW_SESSION_WINDOW_SECONDS, TOKEN_USES
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def generate_token(client: genai.Client, hass: HomeAssistant) -> types.AuthToken:
+async def generate_token(
+    client: genai.Client, hass: HomeAssistant, profile: ContextProfile | None = None
+) -> types.AuthToken:
 
     _LOGGER.info("Received request for a new Gemini session")
 
     try:
         now = datetime.datetime.now(tz=datetime.timezone.utc)
 
-        token = client.auth_tokens.create(
+        # The async client keeps the network call off the event loop
+        token = await client.aio.auth_tokens.create(
             config={
-                "uses": 10,
+                "uses": TOKEN_USES,
                 "expire_time": now + datetime.timedelta(hours=20),
-                "new_session_expire_time": now + datetime.timedelta(hours=1),
+                "new_session_expire_time": now
+                + datetime.timedelta(seconds=NEW_SESSION_WINDOW_SECONDS),
                 "http_options": {"api_version": "v1alpha"},
                 "live_connect_constraints": {
                     "model": "gemini-2.5-flash-native-audio-preview-12-2025",
-                    "config": await generate_config(hass),
+                    "config": await generate_config(hass, profile),
                 },
             }
         )
@@ -45,33 +53,111 @@ async def generate_token(client: genai.Client, hass: HomeAssistant) -> types.Aut
         raise e
 
 
-async def generate_config(hass: HomeAssistant) -> types.LiveConnectConfig:
+def config_version(hass: HomeAssistant, profile: ContextProfile | None = None) -> str:
+    """Identifies the config generate_config would build right now."""
+    if builder := get_context_builder(hass):
+        return f"{TOOLS_VERSION}:{builder.render(profile)[1]}"
+    return f"{TOOLS_VERSION}"
+
+
+DEFAULT_VOICE = "Aoede"
+BASE_INSTRUCTION = "You are a helpful and friendly AI assistant. Be concise."
+# Built configs kept per (profile, voice)
+MAX_CACHED_CONFIGS = 32
+
+
+class _CachedConfig:
+    """A built LiveConnectConfig and, once asked for, its serialized form."""
+
+    __slots__ = ("version", "config", "_payload")
+
+    def __init__(self, version: str | None, config: types.LiveConnectConfig):
+        self.version = version
+        self.config = config
+        self._payload: dict | None = None
+
+    @property
+    def payload(self) -> dict:
+        if self._payload is None:
+            self._payload = self.config.model_dump(mode="json", exclude_none=True)
+        return self._payload
+
+
+def _build_config(context: str, voice: str) -> types.LiveConnectConfig:
+    full_system_instruction = f"{BASE_INSTRUCTION}\n\n{context}"
+
+    return types.LiveConnectConfig(
+        response_modalities=[types.Modality.AUDIO],
+        tools=get_intent_tools(),
+        system_instruction=types.Content(
+            parts=[types.Part.from_text(text=full_system_instruction)],
+            role="user",
+        ),
+        speech_config=types.SpeechConfig(
+            voice_config=types.VoiceConfig(
+                prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=voice)
+            )
+        ),
+        output_audio_transcription=types.AudioTranscriptionConfig(),
+        input_audio_transcription=types.AudioTranscriptionConfig(),
+        realtime_input_config=types.RealtimeInputConfig(
+            turn_coverage=types.TurnCoverage.TURN_INCLUDES_ALL_INPUT
+        ),
+    )
+
+
+async def _async_get_config(
+    hass: HomeAssistant, profile: ContextProfile | None, voice: str
+) -> _CachedConfig:
+    """
+    The config for (profile, voice), rebuilt only when the context or tools
+    version changed since it was last built.
+    """
+    if get_context_builder(hass) is None:
+        # Without the builder there is no cheap way to tell the context changed
+        context = await generate_context_from_ha(hass, profile)
+        return _CachedConfig(None, _build_config(context, voice))
+
+    cache: dict[tuple, _CachedConfig] = hass.data[DOMAIN].setdefault("config_cache", {})
+    key = (profile, voice)
+    version = config_version(hass, profile)
+    cached = cache.get(key)
+    if cached is not None and cached.version == version:
+        return cached
+
+    context = await generate_context_from_ha(hass, profile)
+    cached = _CachedConfig(version, _build_config(context, voice))
+    cache.pop(key, None)
+    if len(cache) >= MAX_CACHED_CONFIGS:
+        del cache[next(iter(cache))]
+    cache[key] = cached
+    return cached
+
+
+async def generate_config(
+    hass: HomeAssistant,
+    profile: ContextProfile | None = None,
+    voice: str = DEFAULT_VOICE,
+) -> types.LiveConnectConfig:
+    """The session config, shared between callers; do not mutate."""
     try:
-        # 1. Generate context and tools
-        context = await generate_context_from_ha(hass)
-        base_instruction = "You are a helpful and friendly AI assistant. Be concise."
-        full_system_instruction = f"{base_instruction}\n\n{context}"
-
-        config = types.LiveConnectConfig(
-            response_modalities=[types.Modality.AUDIO],
-            tools=get_intent_tools(),
-            system_instruction=types.Content(
-                parts=[types.Part.from_text(text=full_system_instruction)],
-                role="user",
-            ),
-            speech_config=types.SpeechConfig(
-                voice_config=types.VoiceConfig(
-                    prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name="Aoede")
-                )
-            ),
-            output_audio_transcription=types.AudioTranscriptionConfig(),
-            input_audio_transcription=types.AudioTranscriptionConfig(),
-            realtime_input_config=types.RealtimeInputConfig(
-                turn_coverage=types.TurnCoverage.TURN_INCLUDES_ALL_INPUT
-            ),
-        )
+        return (await _async_get_config(hass, profile, voice)).config
+
+    except Exception as e:
+        _LOGGER.error(f"Error creating config: {e}")
+        error_trace = traceback.format_exc()
+        _LOGGER.error(f"Traceback: {error_trace}")
+        raise e
+
 
-        return config
+async def generate_config_payload(
+    hass: HomeAssistant,
+    profile: ContextProfile | None = None,
+    voice: str = DEFAULT_VOICE,
+) -> dict:
+    """The session config as JSON-ready data, serialized once per version."""
+    try:
+        return (await _async_get_config(hass, profile, voice)).payload
 
     except Exception as e:
         _LOGGER.error(f"Error creating config: {e}")
@@ -0,0 +1,167 @@
+"""Home Assistant LLM API tools converted to Gemini's schema, cached."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+
+from homeassistant.const import (
+    EVENT_COMPONENT_LOADED,
+    EVENT_SERVICE_REGISTERED,
+    EVENT_SERVICE_REMOVED,
+)
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import llm
+from homeassistant.helpers.json import json_dumps
+from homeassistant.components.homeassistant import (
+    exposed_entities as ha_exposed_entities,
+)
+from voluptuous_openapi import convert
+
+from .const import DOMAIN
+from .context import content_etag
+
+_LOGGER = logging.getLogger(__name__)
+
+ASSISTANT = "conversation"
+
+
+def _get_llm_context():
+    """Create LLMContext safely handling different HA versions."""
+    # Try the most recent signature (Platform, Context, Prompt, Language, Assistant, DeviceID)
+    try:
+        return llm.LLMContext(
+            platform=DOMAIN,
+            context=None,
+            language="en",
+            assistant="conversation",
+            device_id=None,
+        )  # type: ignore
+    except TypeError:
+        pass
+
+    # Fallback to older signature (minus Device ID)
+    try:
+        return llm.LLMContext(
+            platform=DOMAIN,
+            context=None,
+            user_prompt=None,  # type: ignore
+            language="en",
+            assistant="conversation",
+            device_id=None,
+        )
+    except TypeError:
+        pass
+
+    # Fallback to very old/minimal signature
+    return llm.LLMContext(
+        platform=DOMAIN,
+        context=None,
+        user_prompt=None,  # type: ignore
+        language="en",
+    )  # type: ignore
+
+
+def convert_tools(tools, custom_serializer=None) -> list[dict]:
+    """Converts LLM API tools to Gemini's expected JSON Schema."""
+    return [
+        {
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": convert(tool.parameters, custom_serializer=custom_serializer),
+        }
+        for tool in tools
+    ]
+
+
+async def async_build_gemini_tools(hass: HomeAssistant) -> list[dict]:
+    """Fetches the Assist API's tools and converts them; the slow path."""
+    # The Assist API handles which entities are 'exposed' to Voice Assistants
+    api = llm.AssistAPI(hass)
+    llm_api = await api.async_get_api_instance(_get_llm_context())
+
+    tools = llm_api.tools
+    _LOGGER.info(f"Fetched {len(tools)} tools from LLM API")
+    return convert_tools(tools, llm_api.custom_serializer)
+
+
+class LLMToolsCache:
+    """
+    Keeps the converted tool list and its JSON body until the tool set or
+    entity exposure changes.
+
+    Tools come from intents (registered as integrations load), from exposed
+    scripts (services) and from exposed entities, so the cache is dropped on
+    component loads, service (un)registration, entity registry updates and
+    exposure changes.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant | None,
+        build: Callable[[], Awaitable[list[dict]]] | None = None,
+    ):
+        self.hass = hass
+        self._build = build or (lambda: async_build_gemini_tools(hass))
+        self._body: str | None = None
+        self._etag: str | None = None
+        self._tools: list[dict] | None = None
+        self._lock = asyncio.Lock()
+        self._unsubs: list[CALLBACK_TYPE] = []
+        # Bumped on every invalidation; a build that overlaps one is not kept
+        self._generation = 0
+        self.builds = 0
+
+    @callback
+    def async_start(self):
+        assert self.hass is not None
+        bus = self.hass.bus
+        self._unsubs = [
+            bus.async_listen(EVENT_COMPONENT_LOADED, self._on_event),
+            bus.async_listen(EVENT_SERVICE_REGISTERED, self._on_event),
+            bus.async_listen(EVENT_SERVICE_REMOVED, self._on_event),
+            bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, self._on_event),
+            ha_exposed_entities.async_listen_entity_updates(
+                self.hass, ASSISTANT, self.async_invalidate
+            ),
+        ]
+
+    @callback
+    def async_stop(self):
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+
+    @callback
+    def _on_event(self, event: Event):
+        self.async_invalidate()
+
+    @callback
+    def async_invalidate(self):
+        self._generation += 1
+        self._body = self._etag = self._tools = None
+
+    async def async_get(self) -> tuple[list[dict], str, str]:
+        """The converted tools, their JSON response body and its ETag."""
+        if self._body is None:
+            async with self._lock:
+                # Another request may have built it while we waited
+                if self._body is None:
+                    generation = self._generation
+                    tools = await self._build()
+                    body = json_dumps({"success": True, "tools": tools})
+                    self.builds += 1
+                    if generation != self._generation:
+                        # Invalidated mid-build: serve it once, don't keep it
+                        return tools, body, content_etag(body)
+                    self._tools, self._body = tools, body
+                    self._etag = content_etag(body)
+
+        assert self._tools is not None and self._etag is not None
+        return self._tools, self._body, self._etag
+
+
+@callback
+def get_llm_tools_cache(hass: HomeAssistant) -> LLMToolsCache | None:
+    """The running tools cache, if the integration has started one."""
+    return hass.data.get(DOMAIN, {}).get("llm_tools")
@@ -0,0 +1,191 @@
+"""Pre-minted ephemeral tokens for direct-mode sessions."""
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+import logging
+import time
+from typing import Generic, TypeVar
+
+from google.genai import types
+
+_LOGGER = logging.getLogger(__name__)
+
+# Sessions each token may start (its `uses`)
+TOKEN_USES = 10
+# A token may start new sessions for this long after it is minted
+NEW_SESSION_WINDOW_SECONDS = 60 * 60
+# Stop handing out tokens this close to the end of that window
+EXPIRY_MARGIN_SECONDS = 5 * 60
+# Tokens kept ready per profile
+POOL_SIZE = 2
+# Wait for a burst of context changes to settle before re-minting
+REFILL_DELAY_SECONDS = 2.0
+# A config change only re-mints for keys that got a token this recently
+WARM_SECONDS = 30 * 60
+
+K = TypeVar("K")
+
+
+class _PooledToken:
+    __slots__ = ("name", "uses_left", "usable_until")
+
+    def __init__(self, name: str, minted_at: float):
+        self.name = name
+        self.uses_left = TOKEN_USES
+        self.usable_until = (
+            minted_at + NEW_SESSION_WINDOW_SECONDS - EXPIRY_MARGIN_SECONDS
+        )
+
+
+class _Pool:
+    """Tokens minted for one config version."""
+
+    __slots__ = ("version", "tokens")
+
+    def __init__(self, version: str):
+        self.version = version
+        self.tokens: deque[_PooledToken] = deque()
+
+    def take(self) -> str | None:
+        """Spends one use of the oldest usable token."""
+        now = time.monotonic()
+        while self.tokens:
+            token = self.tokens[0]
+            if token.usable_until <= now:
+                self.tokens.popleft()
+                continue
+            token.uses_left -= 1
+            if token.uses_left <= 0:
+                self.tokens.popleft()
+            return token.name
+        return None
+
+
+class TokenPool(Generic[K]):
+    """
+    Keeps a few minted tokens per key (a context profile) for the current
+    config version, so handing one out is a dict lookup.
+
+    `version(key)` identifies the config a token would be minted with;
+    tokens minted for an older version are never handed out. `mint(key)`
+    creates a token without blocking the event loop.
+
+    Nothing is minted until a key is first asked for. A config change
+    re-mints only for keys asked for within WARM_SECONDS; the others are
+    dropped and start cold again.
+    """
+
+    def __init__(
+        self,
+        mint: Callable[[K], Awaitable[types.AuthToken]],
+        version: Callable[[K], str],
+        size: int = POOL_SIZE,
+    ):
+        self._mint = mint
+        self._version = version
+        self._size = size
+        self._pools: dict[K, _Pool] = {}
+        self._refills: dict[K, asyncio.Task] = {}
+        self._last_used: dict[K, float] = {}
+        self._refill_handle: asyncio.TimerHandle | None = None
+        self.minted = 0
+        self.served = 0
+
+    async def async_get_token(self, key: K) -> str:
+        """A token for the key's current config; waits only if none is ready."""
+        self._last_used[key] = time.monotonic()
+        version = self._version(key)
+        pool = self._pools.get(key)
+        if pool is None or pool.version != version:
+            pool = self._pools[key] = _Pool(version)
+
+        name = pool.take()
+        while name is None:
+            # Cold start or a config change: wait for the next mint
+            await asyncio.shield(self._ensure_refill(key))
+            pool = self._pools[key]
+            name = pool.take()
+
+        self.served += 1
+        if len(pool.tokens) < self._size:
+            self._ensure_refill(key)
+        return name
+
+    def async_config_changed(self):
+        """Re-mints for recently used keys once changes settle."""
+        if self._refill_handle is not None:
+            self._refill_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._refill_handle = loop.call_later(REFILL_DELAY_SECONDS, self._refill_all)
+
+    def async_stop(self):
+        if self._refill_handle is not None:
+            self._refill_handle.cancel()
+            self._refill_handle = None
+        for task in self._refills.values():
+            task.cancel()
+        self._refills.clear()
+        self._pools.clear()
+        self._last_used.clear()
+
+    def _refill_all(self):
+        self._refill_handle = None
+        idle_since = time.monotonic() - WARM_SECONDS
+        for key, last_used in list(self._last_used.items()):
+            if last_used >= idle_since:
+                self._ensure_refill(key)
+            elif key not in self._refills:
+                # Its tokens are for the old config anyway
+                del self._last_used[key]
+                self._pools.pop(key, None)
+
+    def _ensure_refill(self, key: K) -> asyncio.Task:
+        task = self._refills.get(key)
+        if task is None or task.done():
+            task = self._refills[key] = asyncio.get_running_loop().create_task(
+                self._refill(key)
+            )
+            # Errors are logged in _refill; waiters still see them
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _refill(self, key: K):
+        """Mints until the key's pool holds `size` tokens for the current config."""
+        try:
+            # Bounded so a config that keeps changing can't mint forever
+            for _ in range(self._size + 2):
+                version = self._version(key)
+                pool = self._pools.get(key)
+                if pool is None or pool.version != version:
+                    pool = self._pools[key] = _Pool(version)
+                if len(pool.tokens) >= self._size:
+                    return
+
+                minted_at = time.monotonic()
+                token = await self._mint(key)
+                self.minted += 1
+                # The config may have changed while minting; keep the token
+                # only if it still matches.
+                if self._version(key) == version:
+                    pool.tokens.append(_PooledToken(token.name, minted_at))
+                else:
+                    _LOGGER.debug("Discarding token minted for an outdated config")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _LOGGER.error("Error minting token: %s", e)
+            raise
+        finally:
+            if self._refills.get(key) is asyncio.current_task():
+                del self._refills[key]
+
+    def stats(self) -> dict:
+        return {
+            "minted": self.minted,
+            "served": self.served,
+            "ready": {
+                str(key): sum(token.uses_left for token in pool.tokens)
+                for key, pool in self._pools.items()
+            },
+        }
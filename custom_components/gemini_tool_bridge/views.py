@@ -1,9 +1,11 @@
 """The Gemini Tool Bridge integration."""
 
+import asyncio
 import logging
 import traceback
 
 import voluptuous as vol
+from aiohttp import hdrs
 from aiohttp.web import Request, Response
 from homeassistant.components.http.data_validator import RequestDataValidator
 from homeassistant.core import HomeAssistant
@@ -13,21 +15,82 @@ from homeassistant.helpers import (
 from homeassistant.helpers import (
     http as http_helpers,
 )
+from homeassistant.helpers import (
+    intent,
+)
 from homeassistant.helpers import (
     llm,
 )
-from voluptuous_openapi import convert
+from homeassistant.helpers.json import json_dumps
 
 from .const import DOMAIN
 from .context import (
-    entity_name_map,
-    generate_grouped_device_context,
+    CONTEXT_FORMATS,
+    ContextStats,
+    async_device_profile,
+    async_profile_from_params,
+    content_etag,
+    entity_names,
+    get_context_builder,
     get_raw_entities,
+    render_context,
 )
-from .gemini import generate_config, generate_token, get_gemini_client
+from .gemini import generate_config_payload, generate_token, get_gemini_client
+from .llm_tools import async_build_gemini_tools, get_llm_tools_cache
 
 _LOGGER = logging.getLogger(__name__)
 
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match covers the given ETag."""
+    header = request.headers.get(hdrs.IF_NONE_MATCH)
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _conditional_response(
+    request: Request,
+    body: str,
+    content_type: str,
+    etag: str | None = None,
+    extra_headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    Serves a body with an ETag, answering 304 when the client already has it.
+    The body is compressed when the client accepts it.
+    """
+    if etag is None:
+        etag = content_etag(body)
+    headers = {
+        hdrs.ETAG: etag,
+        hdrs.CACHE_CONTROL: "no-cache",
+        **(extra_headers or {}),
+    }
+
+    if _etag_matches(request, etag):
+        return Response(status=304, headers=headers)
+
+    response = Response(text=body, content_type=content_type, headers=headers)
+    if len(body) >= COMPRESS_MIN_BYTES:
+        # Picks gzip/deflate from Accept-Encoding, or sends it as is
+        response.enable_compression()
+    return response
+
+
+def _stats_headers(stats: ContextStats) -> dict[str, str]:
+    """Response headers reporting the size of a rendered context."""
+    return {
+        "X-Context-Chars": str(stats["chars"]),
+        "X-Context-Tokens": str(stats["tokens"]),
+        "X-Context-Entities": str(stats["entities"]),
+        "X-Context-Dropped": str(stats["dropped"]),
+    }
+
 
 class GeminiSessionView(http_helpers.HomeAssistantView):
     """A view to create a session for direct connection."""
@@ -46,26 +109,33 @@ class GeminiSessionView(http_helpers.HomeAssistantView):
         """Handle POST requests to create a session."""
         hass: HomeAssistant = request.app["hass"]
         api_key = self.api_key
+        profile = None
         try:
             data = await request.json()
             api_key = data.get("api_key", api_key)
+            if device_id := data.get("device_id"):
+                profile = async_device_profile(hass, device_id)
         except Exception:
             pass
 
         if not api_key:
             raise ValueError("API key is required")
 
-        client = get_gemini_client(api_key)
-
         _LOGGER.info("Received request for a new Gemini session")
 
         try:
-            token = await generate_token(client, hass)
+            token_pool = hass.data.get(DOMAIN, {}).get("token_pool")
+            if token_pool is not None and api_key == self.api_key:
+                token_name = await token_pool.async_get_token(profile)
+            else:
+                # A caller-supplied key can't use tokens minted with ours
+                client = await hass.async_add_executor_job(get_gemini_client, api_key)
+                token_name = (await generate_token(client, hass, profile)).name
 
             return self.json(
                 {
                     "success": True,
-                    "token": token.name,
+                    "token": token_name,
                 }
             )
 
@@ -90,7 +160,7 @@ class GeminiConfigView(http_helpers.HomeAssistantView):
         _LOGGER.info("Received request for Gemini config")
 
         try:
-            return self.json(await generate_config(hass))
+            return self.json(await generate_config_payload(hass))
 
         except Exception as e:
             _LOGGER.error(f"Error fetching config: {e}")
@@ -104,41 +174,6 @@ class GeminiToolsView(http_helpers.HomeAssistantView):
     name = "api:gemini_live:tools"
     requires_auth = True  # Requires the Supervisor Token or Long-Lived Token
 
-    def _get_llm_context(self):
-        """Create LLMContext safely handling different HA versions."""
-        # Try the most recent signature (Platform, Context, Prompt, Language, Assistant, DeviceID)
-        try:
-            return llm.LLMContext(
-                platform=DOMAIN,
-                context=None,
-                language="en",
-                assistant="conversation",
-                device_id=None,
-            )  # type: ignore
-        except TypeError:
-            pass
-
-        # Fallback to older signature (minus Device ID)
-        try:
-            return llm.LLMContext(
-                platform=DOMAIN,
-                context=None,
-                user_prompt=None,  # type: ignore
-                language="en",
-                assistant="conversation",
-                device_id=None,
-            )
-        except TypeError:
-            pass
-
-        # Fallback to very old/minimal signature
-        return llm.LLMContext(
-            platform=DOMAIN,
-            context=None,
-            user_prompt=None,  # type: ignore
-            language="en",
-        )  # type: ignore
-
     async def get(self, request: Request):
         """Handle GET requests to fetch tools."""
         hass = request.app["hass"]
@@ -146,37 +181,12 @@ class GeminiToolsView(http_helpers.HomeAssistantView):
         _LOGGER.info("Received request for Gemini tools")
 
         try:
-            # 1. Get the LLM API for the default 'Assist' pipeline
-            # This handles the logic of which entities are 'exposed' to Voice Assistants
-            llm_context = self._get_llm_context()
-            # Get the LLM API instance (handles entity exposure logic)
-            # We assume the default LLM API for Home Assistant
-            # llm_apis = llm.async_get_apis(hass)
-
-            # exposed_entities = llm._get_exposed_entities(hass, "assist")
-            api = llm.AssistAPI(hass)
-
-            llm_api = await api.async_get_api_instance(llm_context)
-
-            # 2. Get the tools (functions) exposed to this API
-            tools = llm_api.tools
-
-            _LOGGER.info(f"Fetched {len(tools)} tools from LLM API")
-
-            # 3. Convert to Gemini's expected JSON Schema
-            gemini_tools = []
-
-            for tool in tools:
-                tool_def = {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": convert(
-                        tool.parameters, custom_serializer=llm_api.custom_serializer
-                    ),
-                }
-                # tool_def = conversation._format_tool(tool, llm_api.custom_serializer)
-                gemini_tools.append(tool_def)
+            if cache := get_llm_tools_cache(hass):
+                # Converted once per tool set / exposure change
+                _, body, etag = await cache.async_get()
+                return _conditional_response(request, body, "application/json", etag)
 
+            gemini_tools = await async_build_gemini_tools(hass)
             return self.json({"success": True, "tools": gemini_tools})
 
         except Exception as e:
@@ -202,34 +212,77 @@ class GeminiEntitiesView(http_helpers.HomeAssistantView):
 
             # _LOGGER.warning(f"Fetched {len(exposed_entities)} entities from LLM API")
 
-            return self.json({"success": True, "entities": exposed_entities})
+            body = json_dumps({"success": True, "entities": exposed_entities})
+            return _conditional_response(request, body, "application/json")
 
         except Exception as e:
             _LOGGER.error(f"Error fetching entities: {e}")
             return self.json({"success": False, "error": str(e)})
 
     async def post(self, request: Request):
-        """Handle POST requests to fetch entities."""
+        """
+        Handle POST requests to fetch entities.
+
+        Text responses take `format=full|compact` and, for compact, an
+        optional `token_budget` query parameter; their size is reported in
+        the X-Context-* headers. They can be scoped to one satellite with
+        `device_id` and/or `area`, `neighbors` (comma separated),
+        `other_area_limit` and `location`.
+        """
         hass: HomeAssistant = request.app["hass"]
         _LOGGER.info("Received POST request for Gemini entities")
 
+        query = request.query
+        context_format = query.get("format", "full")
         try:
-            raw_entities = await get_raw_entities(hass)
+            token_budget = int(query.get("token_budget") or 0) or None
+            if context_format not in CONTEXT_FORMATS:
+                raise ValueError(f"Unknown format: {context_format}")
+            profile = async_profile_from_params(hass, query)
+        except ValueError as e:
+            return self.json({"success": False, "error": str(e)}, status_code=400)
+
+        try:
+            builder = get_context_builder(hass)
 
             # Check content type to decide on response format
             if request.content_type == "application/json":
+                if builder:
+                    raw_entities = builder.raw_entities()
+                    names = builder.snapshot.names
+                else:
+                    raw_entities = await get_raw_entities(hass)
+                    names = entity_names(raw_entities)
                 # For the web UI, include the name map
-                return self.json(
+                body = json_dumps(
                     {
                         "success": True,
                         **raw_entities,
-                        "entity_name_map": entity_name_map,
+                        "entity_name_map": dict(names),
                     }
                 )
+                return _conditional_response(request, body, "application/json")
             else:
-                # For the addon, generate the formatted context string
-                formatted_context = generate_grouped_device_context(raw_entities)
-                return Response(text=formatted_context, content_type="text/plain")
+                # For the addon, serve the formatted context string
+                if builder:
+                    rendered, etag = builder.render(
+                        profile, context_format, token_budget
+                    )
+                else:
+                    rendered = render_context(
+                        await get_raw_entities(hass),
+                        profile,
+                        context_format,
+                        token_budget,
+                    )
+                    etag = None
+                return _conditional_response(
+                    request,
+                    rendered["text"],
+                    "text/plain",
+                    etag,
+                    _stats_headers(rendered["stats"]),
+                )
 
         except Exception as e:
             _LOGGER.error(f"Error fetching entities: {e}")
@@ -238,6 +291,78 @@ class GeminiEntitiesView(http_helpers.HomeAssistantView):
             return self.json({"success": False, "error": str(e)})
 
 
+def _error_response(language: str, message: str) -> intent.IntentResponse:
+    response = intent.IntentResponse(language=language)
+    response.async_set_error(intent.IntentResponseErrorCode.FAILED_TO_HANDLE, message)
+    return response
+
+
+async def _async_handle_intent(
+    hass: HomeAssistant, intent_name: str, data: dict, context, language: str
+) -> dict:
+    """Handle a single intent the same way /api/intent/handle does."""
+    slots = {key: {"value": value} for key, value in data.items()}
+    try:
+        intent_result = await intent.async_handle(
+            hass, DOMAIN, intent_name, slots, "", context, language=language
+        )
+    except intent.IntentError as err:
+        _LOGGER.warning(f"Error handling intent {intent_name}: {err}")
+        intent_result = _error_response(language, str(err))
+    except Exception as err:
+        # Sibling intents in the batch may already have run, so this one
+        # fails alone rather than failing the whole request
+        _LOGGER.exception("Unexpected error handling intent %s", intent_name)
+        intent_result = _error_response(language, f"Unexpected error: {err}")
+
+    response = intent_result.as_dict()
+    speech = response.get("speech", {}).get("plain", {}).get("speech", "Done.")
+    return {"name": intent_name, "speech": speech, "response": response}
+
+
+class GeminiIntentsView(http_helpers.HomeAssistantView):
+    """A view to handle a batch of intents concurrently in one request."""
+
+    url = "/api/gemini_live/intents"
+    name = "api:gemini_live:intents"
+    requires_auth = True  # Requires the Supervisor Token or Long-Lived Token
+
+    @RequestDataValidator(
+        vol.Schema(
+            {
+                vol.Required("intents"): [
+                    vol.Schema(
+                        {
+                            vol.Required("name"): cv.string,
+                            vol.Optional("data", default={}): vol.Schema(
+                                {}, extra=vol.ALLOW_EXTRA
+                            ),
+                        }
+                    )
+                ],
+                vol.Optional("language"): cv.string,
+            }
+        )
+    )
+    async def post(self, request: Request, data: dict):
+        """Handle POST requests to run several intents."""
+        hass: HomeAssistant = request.app["hass"]
+        language = data.get("language", hass.config.language)
+        context = self.context(request)
+
+        _LOGGER.info(f"Received batch of {len(data['intents'])} intents")
+
+        results = await asyncio.gather(
+            *(
+                _async_handle_intent(
+                    hass, item["name"], item["data"], context, language
+                )
+                for item in data["intents"]
+            )
+        )
+        return self.json({"success": True, "results": results})
+
+
 timer_start_schema = vol.Schema(
     {
         vol.Required("operation"): vol.Literal("start"),
@@ -0,0 +1,203 @@
+"""WebSocket API that pushes context changes to the add-on."""
+
+import asyncio
+from collections.abc import Mapping
+import logging
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN
+from .context import (
+    CONTEXT_FORMATS,
+    ContextBuilder,
+    ContextProfile,
+    async_profile_from_params,
+    get_context_builder,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SUBSCRIBE_CONTEXT = f"{DOMAIN}/subscribe_context"
+# Coalesce bursts of changes into one push
+PUSH_DELAY_SECONDS = 0.25
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Required("key"): cv.string,
+        vol.Optional("device_id"): cv.string,
+        vol.Optional("area"): cv.string,
+        vol.Optional("neighbors"): cv.string,
+        vol.Optional("other_area_limit"): vol.Coerce(int),
+        vol.Optional("location"): cv.string,
+    }
+)
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant):
+    websocket_api.async_register_command(hass, websocket_subscribe_context)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): SUBSCRIBE_CONTEXT,
+        vol.Optional("format", default="full"): vol.In(CONTEXT_FORMATS),
+        vol.Optional("token_budget"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        # Extra scoped variants to keep current; the whole-house context is
+        # always sent under the key "default"
+        vol.Optional("profiles", default=[]): [PROFILE_SCHEMA],
+        vol.Optional("states", default=True): cv.boolean,
+    }
+)
+@callback
+def websocket_subscribe_context(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+):
+    """
+    Streams context versions, entity name map changes and state changes of
+    exposed entities until the client unsubscribes.
+    """
+    builder = get_context_builder(hass)
+    if builder is None:
+        connection.send_error(msg["id"], "not_ready", "Gemini Tool Bridge is not set up")
+        return
+
+    profiles: dict[str, ContextProfile | None] = {"default": None}
+    try:
+        for params in msg["profiles"]:
+            profiles[params["key"]] = async_profile_from_params(hass, params)
+    except ValueError as e:
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, str(e))
+        return
+
+    subscription = _ContextSubscription(hass, connection, msg, builder, profiles)
+    connection.subscriptions[msg["id"]] = subscription.async_unsubscribe
+    connection.send_result(msg["id"])
+    subscription.async_start()
+
+
+class _ContextSubscription:
+    """One client's subscription; only changes are sent after the first push."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        connection: websocket_api.ActiveConnection,
+        msg: dict[str, Any],
+        builder: ContextBuilder,
+        profiles: dict[str, ContextProfile | None],
+    ):
+        self.hass = hass
+        self.connection = connection
+        self.msg_id = msg["id"]
+        self.context_format = msg["format"]
+        self.token_budget = msg.get("token_budget")
+        self.builder = builder
+        self.profiles = profiles
+        self._versions: dict[str, str] = {}
+        # Name map as last sent (snapshots are immutable, so no copy is
+        # needed); None until the first push
+        self._names: Mapping[str, str] | None = None
+        self._states: dict[str, dict | None] = {}
+        self._push_handle: asyncio.TimerHandle | None = None
+        self._unsubs: list[CALLBACK_TYPE] = []
+        self._stream_states = msg["states"]
+
+    @callback
+    def async_start(self):
+        self._unsubs.append(self.builder.async_add_listener(self._schedule_push))
+        if self._stream_states:
+            self._unsubs.append(
+                self.hass.bus.async_listen(EVENT_STATE_CHANGED, self._on_state_changed)
+            )
+        self._push()
+
+    @callback
+    def async_unsubscribe(self):
+        if self._push_handle is not None:
+            self._push_handle.cancel()
+            self._push_handle = None
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+
+    @callback
+    def _on_state_changed(self, event: Event):
+        entity_id = event.data["entity_id"]
+        if not self.builder.is_exposed(entity_id):
+            return
+        new_state = event.data.get("new_state")
+        self._states[entity_id] = (
+            {
+                "state": new_state.state,
+                "last_changed": new_state.last_changed.isoformat(),
+            }
+            if new_state is not None
+            else None
+        )
+        self._schedule_push()
+
+    @callback
+    def _schedule_push(self):
+        if self._push_handle is None:
+            self._push_handle = self.hass.loop.call_later(
+                PUSH_DELAY_SECONDS, self._push
+            )
+
+    @callback
+    def _send(self, payload: dict):
+        self.connection.send_message(websocket_api.event_message(self.msg_id, payload))
+
+    @callback
+    def _push(self):
+        self._push_handle = None
+        names = self.builder.snapshot.names
+
+        for key, profile in self.profiles.items():
+            rendered, etag = self.builder.render(
+                profile, self.context_format, self.token_budget
+            )
+            if self._versions.get(key) != etag:
+                self._versions[key] = etag
+                self._send(
+                    {
+                        "type": "context",
+                        "key": key,
+                        "version": etag,
+                        "text": rendered["text"],
+                        "stats": rendered["stats"],
+                    }
+                )
+
+        # Send what changed in the name map since last time; a snapshot that
+        # kept its name map hands back the same object, so skip the diff
+        if names is not self._names:
+            first = self._names is None
+            sent = self._names or {}
+            updated = {
+                entity_id: name
+                for entity_id, name in names.items()
+                if sent.get(entity_id) != name
+            }
+            removed = [entity_id for entity_id in sent if entity_id not in names]
+            self._names = names
+            if first or updated or removed:
+                self._send(
+                    {
+                        "type": "name_map",
+                        "replace": first,
+                        "updated": updated,
+                        "removed": removed,
+                    }
+                )
+
+        if self._states:
+            states, self._states = self._states, {}
+            self._send({"type": "states", "states": states})